@@ -59,6 +59,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'utils.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,10 +95,26 @@ WSGI_APPLICATION = 'AcadAI_Project.wsgi.application'
 REST_FRAMEWORK = {
     "EXCEPTION_HANDLER": "utils.exceptions.custom_exception_handler",
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Builds request.user from the token's claims, without a user query
+        'auth_app.authentication.ClaimsJWTAuthentication',
     ]
 }
 
+# Grading engine
+GRADING = {
+    'MODE': config('GRADING_MODE', default='sync'),
+    'WORKER_PROCESSES': config('GRADING_WORKER_PROCESSES', default=2, cast=int),
+    'EXECUTOR': config('GRADING_EXECUTOR', default='inline'),
+    'EXECUTOR_WORKERS': config('GRADING_EXECUTOR_WORKERS', default=0, cast=int) or None,
+}
+
+# Login password checks (see auth_app.hashing)
+LOGIN = {
+    'HASH_WORKERS': config('LOGIN_HASH_WORKERS', default=0, cast=int) or None,
+    'HASH_QUEUE': config('LOGIN_HASH_QUEUE', default=32, cast=int),
+    'HASH_TIMEOUT': config('LOGIN_HASH_TIMEOUT', default=5.0, cast=float),
+}
+
 # Custom User Model
 AUTH_USER_MODEL = 'auth_app.User' 
 
@@ -116,7 +133,7 @@ if DATABASE_URL:
         'default': dj.parse(
             config('DATABASE_URL'),
             conn_max_age=600,
-            ssl_require=True
+            ssl_require=config('DB_SSL_REQUIRE', default=True, cast=bool)
         )
     }
 else:
@@ -17,9 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from utils.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("auth/", include("auth_app.urls")),
     path("exam/", include("Acad_ai_app.urls")),
-    path("course/", include("course_module.urls"))
+    path("course/", include("course_module.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
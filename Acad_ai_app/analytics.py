@@ -0,0 +1,257 @@
+"""
+Exam and question analytics maintained incrementally.
+
+Grading applies F() deltas to ExamStats, ExamScoreBucket and QuestionStats
+rows inside the grading transaction, so serving an exam's analytics reads a
+handful of small rows whatever the number of submissions. A regrade applies
+the difference between the old and new result. `rebuild_exam_analytics`
+recomputes the rows from the submissions tables.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Sum, Value, When
+from django.utils import timezone
+
+from .models import (
+    Exam,
+    ExamScoreBucket,
+    ExamStats,
+    Question,
+    QuestionStats,
+    Submission,
+    SubmissionAnswer,
+)
+
+HISTOGRAM_BUCKETS = 10
+BUCKET_WIDTH = 100 // HISTOGRAM_BUCKETS
+
+ZERO = Decimal("0.00")
+
+
+def score_bucket(percentage) -> int:
+    return min(max(int(percentage // BUCKET_WIDTH), 0), HISTOGRAM_BUCKETS - 1)
+
+
+def _contribution(graded_at, percentage, passed) -> Optional[Dict]:
+    """What one submission adds to its exam's rollup (None if ungraded)"""
+    if graded_at is None or percentage is None:
+        return None
+    percentage = Decimal(percentage)
+    return {
+        "graded_count": 1,
+        "passed_count": 1 if passed else 0,
+        "percentage_sum": percentage,
+        "percentage_sq_sum": percentage * percentage,
+        "bucket": score_bucket(percentage),
+    }
+
+
+def _ensure_exam_rows(exam_id: int):
+    ExamStats.objects.get_or_create(exam_id=exam_id)
+    ExamScoreBucket.objects.bulk_create(
+        [ExamScoreBucket(exam_id=exam_id, bucket=bucket) for bucket in range(HISTOGRAM_BUCKETS)],
+        ignore_conflicts=True,
+    )
+
+
+def record_exam_grading(exam_id: int, previous: Optional[Dict], current: Optional[Dict],
+                        create: bool = True):
+    """
+    A submission of the exam changed from `previous` to `current` (dicts of
+    graded_at, percentage and passed; None for "not there").
+    """
+    before = _contribution(**previous) if previous else None
+    after = _contribution(**current) if current else None
+    if before is None and after is None:
+        return
+
+    empty = {"graded_count": 0, "passed_count": 0, "percentage_sum": ZERO, "percentage_sq_sum": ZERO}
+    changes = {
+        field: F(field) + ((after or empty)[field] - (before or empty)[field])
+        for field in empty
+    }
+    changes["updated_at"] = timezone.now()
+
+    updated = ExamStats.objects.filter(exam_id=exam_id).update(**changes)
+    if not updated:
+        if not create:
+            return
+        _ensure_exam_rows(exam_id)
+        ExamStats.objects.filter(exam_id=exam_id).update(**changes)
+
+    old_bucket = before["bucket"] if before else None
+    new_bucket = after["bucket"] if after else None
+    if old_bucket != new_bucket:
+        # Only the buckets that exist; a None bucket would compile to
+        # "bucket IS NULL"
+        moves = [(bucket, delta) for bucket, delta in ((new_bucket, 1), (old_bucket, -1)) if bucket is not None]
+        ExamScoreBucket.objects.filter(
+            exam_id=exam_id, bucket__in=[bucket for bucket, _ in moves]
+        ).update(count=F("count") + Case(
+            *[When(bucket=bucket, then=Value(delta)) for bucket, delta in moves],
+            default=Value(0),
+        ))
+
+
+def record_answer_grades(deltas: Dict[int, tuple], create: bool = True):
+    """
+    Apply per-question changes: {question_id: (answer_count_delta, marks_delta)}
+    in one UPDATE.
+    """
+    deltas = {qid: delta for qid, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+
+    if create:
+        QuestionStats.objects.bulk_create(
+            [QuestionStats(question_id=qid) for qid in deltas], ignore_conflicts=True
+        )
+    QuestionStats.objects.filter(question_id__in=deltas).update(
+        answer_count=F("answer_count") + Case(
+            *[When(question_id=qid, then=Value(count)) for qid, (count, _) in deltas.items()],
+            default=Value(0),
+        ),
+        marks_sum=F("marks_sum") + Case(
+            *[When(question_id=qid, then=Value(float(marks))) for qid, (_, marks) in deltas.items()],
+            default=Value(0.0),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def answer_grade_deltas(previous_marks: Iterable, answers: Iterable[SubmissionAnswer]) -> Dict[int, tuple]:
+    """Per-question deltas between answers' previous and new awarded_marks"""
+    deltas = {}
+    for old, answer in zip(previous_marks, answers):
+        count, marks = deltas.get(answer.question_id, (0, 0.0))
+        if old is None:
+            count += 1
+            old = 0.0
+        deltas[answer.question_id] = (count, marks + float(answer.awarded_marks) - float(old))
+    return deltas
+
+
+def get_exam_analytics(exam_id: int) -> Optional[Dict]:
+    """Exam and per-question rollups, or None if the exam does not exist"""
+    exam = (
+        Exam.objects.filter(pk=exam_id)
+        .values(
+            "id", "title",
+            "stats__graded_count", "stats__passed_count",
+            "stats__percentage_sum", "stats__percentage_sq_sum",
+        )
+        .first()
+    )
+    if exam is None:
+        return None
+
+    graded_count = exam["stats__graded_count"] or 0
+    mean = variance = 0.0
+    if graded_count:
+        mean = float(exam["stats__percentage_sum"]) / graded_count
+        # Population variance from the running sums; clamp rounding noise
+        variance = max(float(exam["stats__percentage_sq_sum"]) / graded_count - mean * mean, 0.0)
+
+    counts = dict(
+        ExamScoreBucket.objects.filter(exam_id=exam_id).values_list("bucket", "count")
+    )
+    histogram = [
+        {
+            "range": f"{bucket * BUCKET_WIDTH}-{(bucket + 1) * BUCKET_WIDTH}",
+            "count": counts.get(bucket, 0),
+        }
+        for bucket in range(HISTOGRAM_BUCKETS)
+    ]
+
+    questions = []
+    for question in (
+        Question.objects.filter(exam_id=exam_id)
+        .values("id", "text", "question_type", "marks", "stats__answer_count", "stats__marks_sum")
+        .order_by("id")
+    ):
+        answer_count = question["stats__answer_count"] or 0
+        mean_marks = (question["stats__marks_sum"] / answer_count) if answer_count else 0.0
+        questions.append({
+            "question_id": question["id"],
+            "text": question["text"],
+            "question_type": question["question_type"],
+            "marks": question["marks"],
+            "answer_count": answer_count,
+            "mean_awarded_marks": round(mean_marks, 2),
+            # Classical difficulty index: share of the available marks earned
+            # on average (1.0 = everybody got full marks)
+            "difficulty_index": (
+                round(mean_marks / question["marks"], 3) if question["marks"] else None
+            ),
+        })
+
+    return {
+        "exam_id": exam["id"],
+        "title": exam["title"],
+        "graded_count": graded_count,
+        "passed_count": exam["stats__passed_count"] or 0,
+        "pass_rate": round(exam["stats__passed_count"] / graded_count * 100, 2) if graded_count else 0.0,
+        "mean_percentage": round(mean, 2),
+        "variance": round(variance, 2),
+        "std_dev": round(variance ** 0.5, 2),
+        "histogram": histogram,
+        "questions": questions,
+    }
+
+
+@transaction.atomic
+def rebuild_exam_analytics(exam_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute analytics rows from the submissions tables, for all exams or
+    only the given ones. Returns the number of exams rebuilt.
+    """
+    exams = Exam.objects.all()
+    if exam_ids is not None:
+        exams = exams.filter(pk__in=list(exam_ids))
+    exam_ids = list(exams.values_list("id", flat=True))
+
+    ExamStats.objects.filter(exam_id__in=exam_ids).delete()
+    ExamScoreBucket.objects.filter(exam_id__in=exam_ids).delete()
+    QuestionStats.objects.filter(question__exam_id__in=exam_ids).delete()
+
+    graded = Submission.objects.filter(
+        exam_id__in=exam_ids, graded_at__isnull=False, percentage__isnull=False
+    )
+    stats = {
+        exam_id: ExamStats(exam_id=exam_id) for exam_id in exam_ids
+    }
+    buckets = {
+        (exam_id, bucket): ExamScoreBucket(exam_id=exam_id, bucket=bucket)
+        for exam_id in exam_ids
+        for bucket in range(HISTOGRAM_BUCKETS)
+    }
+    for exam_id, percentage, passed in graded.values_list(
+        "exam_id", "percentage", "passed"
+    ).iterator(chunk_size=2000):
+        row = stats[exam_id]
+        row.graded_count += 1
+        row.passed_count += 1 if passed else 0
+        row.percentage_sum += percentage
+        row.percentage_sq_sum += percentage * percentage
+        buckets[(exam_id, score_bucket(percentage))].count += 1
+
+    question_rows = [
+        QuestionStats(
+            question_id=row["question_id"],
+            answer_count=row["answer_count"],
+            marks_sum=row["marks_sum"] or 0.0,
+        )
+        for row in SubmissionAnswer.objects.filter(
+            question__exam_id__in=exam_ids, awarded_marks__isnull=False
+        )
+        .values("question_id")
+        .annotate(answer_count=Count("id"), marks_sum=Sum("awarded_marks"))
+        .order_by()
+    ]
+
+    ExamStats.objects.bulk_create(stats.values(), batch_size=1000)
+    ExamScoreBucket.objects.bulk_create(buckets.values(), batch_size=1000)
+    QuestionStats.objects.bulk_create(question_rows, batch_size=1000)
+    return len(exam_ids)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AcadAiAppConfig(AppConfig):
     name = 'Acad_ai_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,224 @@
+"""
+Cached student-facing exam papers.
+
+At exam start every student fetches the same paper. The paper is rendered
+once per exam version into JSON bytes and cached under
+"exam:payload:<id>:<version>"; Exam.version is bumped whenever the exam or
+one of its questions changes, so an edit never has to find and delete the
+stale payload, it simply stops being referenced.
+
+Resolving the current version goes through a short-lived pointer in the
+cache. Saves delete the pointer once their transaction commits, which is
+immediate with a shared cache backend; with per-process caches (locmem)
+other workers pick up the new version within EXAM_POINTER_TIMEOUT seconds.
+
+The exam list and submission validation only need to know which exams are
+open. Active exams that have not ended are kept as an OpenExams snapshot,
+in the cache and in each process, and checked against the clock in memory,
+so exams opening and closing on schedule need no refresh. Exam saves drop
+the snapshot like the version pointers.
+"""
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from grading.cache import LRUCache
+from utils.fast_json import dumps
+from .models import Exam, Question
+from .rows import EXAM_LIST_COLUMNS, QUESTION_COLUMNS, fetch_rows
+
+EXAM_POINTER_TIMEOUT = 5
+EXAM_PAYLOAD_TIMEOUT = 60 * 60 * 24
+ACTIVE_EXAM_COUNT_KEY = "exam:active_count"
+OPEN_EXAMS_KEY = "exam:open"
+OPEN_EXAMS_TIMEOUT = 60
+
+# Rows in the snapshot: the exam list's columns plus the window
+OPEN_EXAM_COLUMNS = (
+    *EXAM_LIST_COLUMNS,
+    ("start_time", "start_time"),
+    ("end_time", "end_time"),
+)
+
+# Cached "version" of exams that do not exist or are inactive, so repeated
+# requests for them do not reach the database either
+_NOT_AVAILABLE = 0
+
+# Payloads never change for a given key, so each process keeps the hottest
+# ones in memory and skips the cache round trip entirely
+_local_payloads = LRUCache(64)
+
+# (snapshot, monotonic expiry) of this process's copy of OpenExams
+_local_open_exams = None
+
+
+def _pointer_key(exam_id: int) -> str:
+    return f"exam:version:{exam_id}"
+
+
+def _payload_key(exam_id: int, version: int) -> str:
+    return f"exam:payload:{exam_id}:{version}"
+
+
+def current_version(exam_id: int) -> Optional[int]:
+    """Current version of an active exam, or None if it is not available"""
+    key = _pointer_key(exam_id)
+    version = cache.get(key)
+    if version is None:
+        version = (
+            Exam.objects.filter(pk=exam_id, is_active=True)
+            .values_list("version", flat=True)
+            .first()
+        ) or _NOT_AVAILABLE
+        cache.set(key, version, EXAM_POINTER_TIMEOUT)
+    return version or None
+
+
+def active_exam_count() -> int:
+    count = cache.get(ACTIVE_EXAM_COUNT_KEY)
+    if count is None:
+        count = Exam.objects.filter(is_active=True).count()
+        cache.set(ACTIVE_EXAM_COUNT_KEY, count, EXAM_POINTER_TIMEOUT)
+    return count
+
+
+class OpenExams:
+    """Active exams that have not ended, with their availability windows"""
+
+    def __init__(self, rows: List[Dict]):
+        self.rows = rows
+        self.windows: Dict[int, Tuple[Optional[datetime], Optional[datetime]]] = {
+            row["id"]: (row["start_time"], row["end_time"]) for row in rows
+        }
+
+    @classmethod
+    def load(cls) -> "OpenExams":
+        exams = Exam.objects.not_ended(timezone.now()).order_by("id")
+        return cls(fetch_rows(exams, OPEN_EXAM_COLUMNS))
+
+    @staticmethod
+    def _is_open(start_time, end_time, now) -> bool:
+        return (start_time is None or start_time <= now) and (end_time is None or end_time >= now)
+
+    def open_rows(self, now: Optional[datetime] = None) -> List[Dict]:
+        """Exam list rows (EXAM_LIST_COLUMNS) of the exams open at now"""
+        now = now or timezone.now()
+        return [
+            {key: row[key] for key, _ in EXAM_LIST_COLUMNS}
+            for row in self.rows
+            if self._is_open(row["start_time"], row["end_time"], now)
+        ]
+
+    def availability_error(self, exam_id: int, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Why the exam cannot be submitted at now, or None if it is open.
+        Exams missing from the snapshot (inactive, ended or unknown) raise
+        KeyError; only the database can tell those apart.
+        """
+        start_time, end_time = self.windows[exam_id]
+        now = now or timezone.now()
+        if start_time and now < start_time:
+            return "This exam has not started yet."
+        if end_time and now > end_time:
+            return "This exam has already ended."
+        return None
+
+
+def get_open_exams() -> OpenExams:
+    global _local_open_exams
+    local = _local_open_exams
+    if local is not None and local[1] > time.monotonic():
+        return local[0]
+
+    snapshot = cache.get(OPEN_EXAMS_KEY)
+    if snapshot is None:
+        snapshot = OpenExams.load()
+        cache.set(OPEN_EXAMS_KEY, snapshot, OPEN_EXAMS_TIMEOUT)
+    _local_open_exams = (snapshot, time.monotonic() + EXAM_POINTER_TIMEOUT)
+    return snapshot
+
+
+def render_exam_payload(exam_id: int) -> Tuple[int, bytes]:
+    """Render an exam paper to JSON bytes, returning the version it reflects"""
+    exam = (
+        Exam.objects.filter(pk=exam_id)
+        .values("id", "title", "duration_minutes", "version")
+        .get()
+    )
+    questions = fetch_rows(
+        Question.objects.filter(exam_id=exam_id).order_by("id"), QUESTION_COLUMNS
+    )
+    payload = dumps({
+        "id": exam["id"],
+        "title": exam["title"],
+        "duration_minutes": exam["duration_minutes"],
+        "questions": questions,
+    })
+    return exam["version"], payload
+
+
+def get_exam_payload(exam_id: int) -> Optional[Tuple[int, bytes]]:
+    """
+    (version, JSON bytes) of an active exam's paper, or None if the exam does
+    not exist or is inactive.
+    """
+    version = current_version(exam_id)
+    if version is None:
+        return None
+
+    key = _payload_key(exam_id, version)
+    payload = _local_payloads.get(key)
+    if payload is not None:
+        return version, payload
+
+    payload = cache.get(key)
+    if payload is None:
+        try:
+            rendered_version, payload = render_exam_payload(exam_id)
+        except Exam.DoesNotExist:
+            return None
+        # The exam may have moved on since the pointer was cached; store the
+        # payload under the version it was actually rendered from
+        if rendered_version != version:
+            version, key = rendered_version, _payload_key(exam_id, rendered_version)
+        cache.set(key, payload, EXAM_PAYLOAD_TIMEOUT)
+
+    _local_payloads.set(key, payload)
+    return version, payload
+
+
+def forget_exams(exam_ids: Iterable[int], active_count: bool = False):
+    """
+    Drop cached version pointers after commit; with active_count (the exams
+    themselves changed) also the active count and the open exams snapshot
+    """
+    keys = [_pointer_key(exam_id) for exam_id in exam_ids]
+    if active_count:
+        keys += [ACTIVE_EXAM_COUNT_KEY, OPEN_EXAMS_KEY]
+
+    def forget():
+        global _local_open_exams
+        cache.delete_many(keys)
+        if active_count:
+            _local_open_exams = None
+
+    transaction.on_commit(forget)
+
+
+def bump_exam_versions(exam_ids: Iterable[int]):
+    """
+    Invalidate the cached papers of the given exams.
+
+    Signals cover Question.save()/delete(); bulk paths (bulk_create, queryset
+    update/delete) must call this themselves.
+    """
+    exam_ids = set(exam_ids)
+    if not exam_ids:
+        return
+    Exam.objects.filter(pk__in=exam_ids).update(version=F("version") + 1)
+    forget_exams(exam_ids)
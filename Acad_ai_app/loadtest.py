@@ -0,0 +1,245 @@
+"""
+Local HTTP load generator for the exam and submission endpoints.
+
+The harness runs against a gunicorn server backed by a throwaway database
+(see the `loadtest` management command) and models the two traffic spikes
+of an exam: everybody fetching the same paper at the start, and everybody
+submitting within a short window at the end.
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+LOADTEST_PASSWORD = "loadtest-password"
+
+# Synthetic exam used by the load test
+EXAM_QUESTIONS = (
+    ("mcq", 6),
+    ("true_false", 2),
+    ("short", 2),
+    ("essay", 2),
+)
+
+
+def _percentile(sorted_values, percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def seed(students: int) -> Dict:
+    """
+    Populate the (throwaway) database with one staff user, a course, an exam
+    and `students` student accounts sharing one pre-hashed password.
+    """
+    from auth_app.models import User
+    from course_module.models import Course
+    from .models import Exam, Question
+
+    password_hash = make_password(LOADTEST_PASSWORD)
+
+    staff = User(username="loadtest-staff", email="staff@loadtest.local",
+                 user_type="staff", password=password_hash)
+    staff.save()
+
+    course = Course.objects.create(name="Load Test", code="LOAD-101")
+    exam = Exam.objects.create(course=course, title="Load Test Exam",
+                               duration_minutes=60, created_by=staff)
+
+    questions = []
+    for question_type, count in EXAM_QUESTIONS:
+        for number in range(count):
+            question = Question(exam=exam, text=f"{question_type} question {number + 1}",
+                                question_type=question_type, marks=5)
+            if question_type == "mcq":
+                question.choices = ["A", "B", "C", "D"]
+                question.expected_answer = "B"
+            elif question_type == "true_false":
+                question.expected_answer = "true"
+            else:
+                question.expected_answer = (
+                    "Photosynthesis converts light energy into chemical energy "
+                    "stored in glucose, releasing oxygen as a by-product"
+                )
+                question.keywords = ["light", "energy", "glucose", "oxygen"]
+            questions.append(question)
+    Question.objects.bulk_create(questions)
+    Exam.objects.filter(pk=exam.pk).questions_added(len(questions), sum(q.marks for q in questions))
+
+    # One extra account is used only for query profiling
+    accounts = [
+        User(username=f"loadtest-student-{i}", email=f"student{i}@loadtest.local",
+             user_type="student", password=password_hash)
+        for i in range(students + 1)
+    ]
+    User.objects.bulk_create(accounts, batch_size=1000)
+
+    return {
+        "exam_id": exam.id,
+        "questions": [
+            {"id": q.id, "question_type": q.question_type}
+            for q in Question.objects.filter(exam=exam).order_by("id")
+        ],
+        "students": [f"student{i}@loadtest.local" for i in range(students)],
+        "profile_student": f"student{students}@loadtest.local",
+    }
+
+
+def answers_payload(exam_id: int, questions: List[Dict], rng: random.Random) -> Dict:
+    answers = []
+    for question in questions:
+        if question["question_type"] == "mcq":
+            text = rng.choice(["A", "B", "C", "D"])
+        elif question["question_type"] == "true_false":
+            text = rng.choice(["true", "false"])
+        else:
+            text = " ".join(rng.choice(
+                "light energy glucose oxygen plants leaves water carbon the and of".split()
+            ) for _ in range(rng.randint(20, 300)))
+        answers.append({"question_id": question["id"], "answer_text": text})
+    return {"exam_id": exam_id, "answers": answers}
+
+
+def profile_queries(fixture: Dict) -> Dict[str, int]:
+    """
+    SQL queries issued by one request to each endpoint, measured in-process
+    against the same database the server uses.
+    """
+    client = Client(HTTP_HOST="localhost")
+    counts = {}
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.post("/auth/login", {"email": fixture["profile_student"],
+                                               "password": LOADTEST_PASSWORD})
+    counts["POST auth/login"] = len(ctx.captured_queries)
+    token = response.json()["data"]["tokens"]["access"]
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    exam_id = fixture["exam_id"]
+    for label, path in (
+        ("GET exam/all", "/exam/all"),
+        ("GET exam/<id>", f"/exam/{exam_id}"),
+        ("GET exam/submissions", "/exam/submissions"),
+    ):
+        with CaptureQueriesContext(connection) as ctx:
+            client.get(path, **auth)
+        counts[label] = len(ctx.captured_queries)
+
+    payload = answers_payload(exam_id, fixture["questions"], random.Random(0))
+    with CaptureQueriesContext(connection) as ctx:
+        client.post("/exam/submissions", json.dumps(payload),
+                    content_type="application/json", **auth)
+    counts["POST exam/submissions"] = len(ctx.captured_queries)
+
+    return counts
+
+
+class LoadClient:
+    """Minimal JSON HTTP client that records latency and errors per endpoint"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, label: str, method: str, path: str, token: Optional[str] = None,
+                payload: Optional[Dict] = None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers,
+                                     method=method)
+
+        started = time.perf_counter()
+        body, failed = None, False
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                body = response.read()
+        except (urllib.error.URLError, OSError):
+            failed = True
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.samples[label].append(elapsed)
+            if failed:
+                self.errors[label] += 1
+        return json.loads(body) if body else None
+
+    def reset(self):
+        self.samples.clear()
+        self.errors.clear()
+
+    def summary(self, wall_seconds: float) -> Dict[str, Dict]:
+        results = {}
+        for label, samples in self.samples.items():
+            latencies = sorted(samples)
+            errors = self.errors.get(label, 0)
+            results[label] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "throughput_rps": round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+            }
+        return results
+
+
+def login_all(client: LoadClient, emails: List[str], concurrency: int) -> Dict[str, str]:
+    def login(email):
+        body = client.request("POST auth/login", "POST", "/auth/login",
+                              payload={"email": email, "password": LOADTEST_PASSWORD})
+        try:
+            return email, body["data"]["tokens"]["access"]
+        except (TypeError, KeyError):
+            return email, None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return {email: token for email, token in pool.map(login, emails) if token}
+
+
+def exam_start_stampede(client: LoadClient, tokens: List[str], exam_id: int, concurrency: int):
+    """Every student lists the open exams and fetches the same paper at once"""
+    def start(token):
+        client.request("GET exam/all", "GET", "/exam/all", token)
+        client.request("GET exam/<id>", "GET", f"/exam/{exam_id}", token)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(start, tokens))
+
+
+def exam_end_burst(client: LoadClient, tokens: List[str], exam_id: int, questions: List[Dict],
+                   concurrency: int, window: float, seed_value: int = 0):
+    """Every student submits at a random moment inside `window` seconds"""
+    rng = random.Random(seed_value)
+    schedule = sorted((rng.uniform(0, window), token) for token in tokens)
+    payloads = {token: answers_payload(exam_id, questions, rng) for _, token in schedule}
+    started = time.monotonic()
+
+    def submit(item):
+        offset, token = item
+        delay = started + offset - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        client.request("POST exam/submissions", "POST", "/exam/submissions", token,
+                       payloads[token])
+        client.request("GET exam/submissions", "GET", "/exam/submissions", token)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(submit, schedule))
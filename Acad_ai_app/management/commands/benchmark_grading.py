@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from grading.benchmark import (
+    DEFAULT_EXAM_MIX,
+    compare_to_baseline,
+    load_baseline,
+    run_benchmark,
+    save_baseline,
+)
+from grading.executor import EXECUTOR_MODES
+
+DEFAULT_BASELINE = settings.BASE_DIR / "benchmarks" / "grading_baseline.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the grading engine on synthetic cohorts and fail when it "
+        "regresses against a stored JSON baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cohorts",
+            type=int,
+            nargs="+",
+            default=[100, 1000],
+            help="Cohort sizes in submissions (e.g. 100 1000 10000 50000)",
+        )
+        for question_type, count in DEFAULT_EXAM_MIX.items():
+            parser.add_argument(
+                f"--{question_type.replace('_', '-')}",
+                type=int,
+                default=count,
+                dest=question_type,
+                help=f"{question_type} questions in the synthetic exam",
+            )
+        parser.add_argument("--executor", choices=EXECUTOR_MODES, default="inline")
+        parser.add_argument("--workers", type=int, default=None)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store these results as the new baseline instead of comparing",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed relative slowdown before a metric counts as a regression",
+        )
+
+    def handle(self, *args, **options):
+        mix = {question_type: options[question_type] for question_type in DEFAULT_EXAM_MIX}
+        results = run_benchmark(
+            options["cohorts"], options["executor"], options["workers"], options["seed"], mix
+        )
+
+        for cohort, cohort_results in results["cohorts"].items():
+            self.stdout.write(
+                f"cohort {cohort}: {cohort_results['answers']} answers, "
+                f"{cohort_results['answers_per_second']} answers/s, "
+                f"peak RSS {cohort_results['peak_rss_mb']}MB"
+            )
+            for question_type, metrics in sorted(cohort_results["types"].items()):
+                self.stdout.write(
+                    f"  {question_type:<10} {metrics['answers_per_second']:>10} answers/s  "
+                    f"p50 {metrics['p50_ms']}ms  p95 {metrics['p95_ms']}ms  p99 {metrics['p99_ms']}ms"
+                )
+
+        if options["save_baseline"]:
+            save_baseline(results, options["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {options['baseline']}"))
+            return
+
+        baseline = load_baseline(options["baseline"])
+        if baseline is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"No baseline at {options['baseline']}; run with --save-baseline to create one"
+                )
+            )
+            return
+
+        try:
+            regressions = compare_to_baseline(results, baseline, options["tolerance"])
+        except ValueError as e:
+            raise CommandError(f"{e}. Rerun with the baseline's options or --save-baseline")
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(regression)
+            raise CommandError(f"{len(regressions)} grading performance regressions")
+
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
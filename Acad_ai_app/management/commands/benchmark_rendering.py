@@ -0,0 +1,158 @@
+import json
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from Acad_ai_app.exam_cache import render_exam_payload
+from Acad_ai_app.models import Exam, Question, Submission
+from Acad_ai_app.rows import (
+    EXAM_LIST_COLUMNS,
+    SUBMISSION_LIST_COLUMNS,
+    fetch_rows,
+    lookups,
+    rename_rows,
+)
+from Acad_ai_app.serializers import (
+    ExamListSerializer,
+    QuestionSerializer,
+    SubmissionListSerializer,
+)
+from course_module.models import Course
+from utils.fast_json import orjson
+from utils.responses import fast_response
+
+PAGE_SIZE = 100
+
+
+def _render(data):
+    return JSONRenderer().render({"success": True, "message": "", "data": data})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializer rendering with the values()/fast JSON path of "
+        "the exam list, exam paper and submission history endpoints, on "
+        "synthetic data that is rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[100, 1000],
+            help="Exams, questions per exam paper and submissions to render",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"JSON encoder: {'orjson' if orjson else 'json (stdlib)'}")
+        self.stdout.write(
+            f"{'endpoint':<18}{'rows':>7}{'serializer ms':>15}{'lean ms':>10}"
+            f"{'speedup':>9}  same output"
+        )
+        for rows in options["rows"]:
+            with transaction.atomic():
+                cases = self._seed(rows)
+                for name, serializer_path, lean_path in cases:
+                    same = json.loads(serializer_path()) == json.loads(lean_path())
+                    serializer_ms = self._time(serializer_path, options["repeat"])
+                    lean_ms = self._time(lean_path, options["repeat"])
+                    self.stdout.write(
+                        f"{name:<18}{rows:>7}{serializer_ms:>15.2f}{lean_ms:>10.2f}"
+                        f"{serializer_ms / lean_ms:>8.1f}x  {same}"
+                    )
+                transaction.set_rollback(True)
+
+    def _time(self, render, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render()
+        return (time.perf_counter() - started) * 1000 / repeat
+
+    def _seed(self, rows):
+        User = get_user_model()
+        now = timezone.now()
+        staff = User.objects.create_user("bench-staff", "bench-staff@example.com", user_type="staff")
+        student = User.objects.create_user("bench-student", "bench-student@example.com")
+        course = Course.objects.create(name="Benchmark", code="BENCH")
+        exams = Exam.objects.bulk_create([
+            Exam(course=course, title=f"Exam {i}", duration_minutes=60, created_by=staff)
+            for i in range(rows)
+        ])
+        Question.objects.bulk_create([
+            Question(
+                exam=exams[0],
+                text=f"Question {i}",
+                question_type="mcq",
+                expected_answer="b",
+                marks=2,
+                choices=["a", "b", "c", "d"],
+            )
+            for i in range(rows)
+        ])
+        Submission.objects.bulk_create([
+            Submission(
+                student=student,
+                exam=exam,
+                status="graded",
+                total_score=Decimal("7.50"),
+                percentage=Decimal("75.00"),
+                passed=True,
+                graded_at=now,
+                feedback="Well done",
+            )
+            for exam in exams
+        ])
+
+        active_exams = Exam.objects.filter(is_active=True)
+        history = Submission.objects.filter(student=student).order_by("-submitted_at", "-id")
+        paper_questions = Question.objects.filter(exam_id=exams[0].id).order_by("id")
+
+        def exam_list_serializer():
+            exams = active_exams.only(
+                "id", "title", "duration_minutes", "course_id", "course__name", "course__code",
+            ).select_related("course")
+            return _render({
+                "exams": ExamListSerializer(exams, many=True).data,
+                "count": exams.count(),
+            })
+
+        def exam_list_lean():
+            exams = fetch_rows(active_exams, EXAM_LIST_COLUMNS)
+            return fast_response(data={"exams": exams, "count": len(exams)}).content
+
+        def exam_paper_serializer():
+            exam = Exam.objects.only("id", "title", "duration_minutes").get(pk=exams[0].id)
+            return JSONRenderer().render({
+                "id": exam.id,
+                "title": exam.title,
+                "duration_minutes": exam.duration_minutes,
+                "questions": QuestionSerializer(
+                    paper_questions.only(*QuestionSerializer.Meta.fields), many=True
+                ).data,
+            })
+
+        def exam_paper_lean():
+            return render_exam_payload(exams[0].id)[1]
+
+        def submissions_serializer():
+            page = history.select_related("exam", "exam__course")[:PAGE_SIZE]
+            return _render({"results": SubmissionListSerializer(page, many=True).data})
+
+        def submissions_lean():
+            page = history.values(*lookups(SUBMISSION_LIST_COLUMNS))[:PAGE_SIZE]
+            return fast_response(
+                data={"results": rename_rows(page, SUBMISSION_LIST_COLUMNS)}
+            ).content
+
+        return [
+            ("exam list", exam_list_serializer, exam_list_lean),
+            ("exam paper", exam_paper_serializer, exam_paper_lean),
+            ("submission page", submissions_serializer, submissions_lean),
+        ]
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Acad_ai_app.models import Exam
+from Acad_ai_app.results_export import EXPORT_FORMATS, stream_results
+
+
+class Command(BaseCommand):
+    help = "Stream an exam's graded results (totals and per-question marks) to a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam", type=int)
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+        parser.add_argument("--output", "-o", default=None,
+                            help="Output file (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not Exam.objects.filter(id=options["exam"]).exists():
+            raise CommandError(f"Exam {options['exam']} does not exist")
+
+        chunks = stream_results(options["exam"], options["format"], options["chunk_size"])
+        if options["output"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,70 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from grading.conf import grading_setting
+from grading.pipeline import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run local worker processes that grade queued submissions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=None,
+            help="Number of worker processes (defaults to GRADING['WORKER_PROCESSES'])",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument("--poll-interval", type=float, default=None)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the current queue and exit instead of polling forever",
+        )
+
+    def handle(self, *args, **options):
+        processes = options["processes"] or grading_setting("WORKER_PROCESSES")
+        worker_options = {
+            "once": options["once"],
+            "batch_size": options["batch_size"],
+            "poll_interval": options["poll_interval"],
+        }
+
+        if processes <= 1:
+            graded = run_worker(**worker_options)
+            self.stdout.write(self.style.SUCCESS(f"Graded {graded} submissions"))
+            return
+
+        # Children must open their own database connections
+        connections.close_all()
+
+        workers = [
+            multiprocessing.Process(target=run_worker, kwargs=worker_options, daemon=False)
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {processes} grading workers")
+
+        def stop(signum, frame):
+            # SIGTERM makes each worker finish its batch, shut down its
+            # grading pool and exit (see run_worker)
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        previous_handlers = {
+            signum: signal.signal(signum, stop) for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            for worker in workers:
+                worker.join()
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(self.style.SUCCESS("Grading workers stopped"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Acad_ai_app.models import Exam
+from Acad_ai_app.question_import import import_questions, iter_rows
+from utils.tabular import IMPORT_FORMATS, ImportFormatError, detect_format
+
+
+class Command(BaseCommand):
+    help = "Import questions into an exam from a CSV or JSONL question bank"
+
+    def add_arguments(self, parser):
+        parser.add_argument("exam", type=int, help="Exam to add the questions to")
+        parser.add_argument("path", help="CSV or JSONL file")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, default=None,
+                            help="File format (default: from the file extension)")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if not Exam.objects.filter(id=options["exam"]).exists():
+            raise CommandError(f"Exam {options['exam']} does not exist")
+
+        try:
+            fmt = detect_format(options["path"], options["format"])
+            with open(options["path"], "rb") as fileobj:
+                report = import_questions(
+                    options["exam"],
+                    iter_rows(fileobj, fmt),
+                    chunk_size=options["chunk_size"],
+                    progress=self._progress,
+                )
+        except (ImportFormatError, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"  line {error['line']}: {error['errors']}")
+        if report["errors_truncated"]:
+            self.stderr.write("  (further errors not shown)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} of {report['rows']} rows into exam "
+            f"{options['exam']} ({report['failed']} failed)"
+        ))
+
+    def _progress(self, report):
+        self.stdout.write(f"  {report['rows']} rows read, {report['created']} imported")
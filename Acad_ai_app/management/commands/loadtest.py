@@ -0,0 +1,176 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from Acad_ai_app.loadtest import (
+    LoadClient,
+    exam_end_burst,
+    exam_start_stampede,
+    login_all,
+    profile_queries,
+    seed,
+)
+
+SCENARIOS = ("stampede", "burst")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"gunicorn did not start listening on port {port}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test login, exam and submission endpoints against a local "
+        "gunicorn server backed by a throwaway database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+        parser.add_argument(
+            "--burst-window",
+            type=float,
+            default=60.0,
+            help="Seconds over which all submissions arrive in the exam-end burst",
+        )
+        parser.add_argument(
+            "--gunicorn-workers",
+            type=int,
+            default=None,
+            help="Default 4, or 1 on SQLite, which locks the whole database for each write",
+        )
+        parser.add_argument("--gunicorn-threads", type=int, default=1)
+        parser.add_argument(
+            "--database-url",
+            default=None,
+            help="Throwaway database to use (defaults to a temporary SQLite file)",
+        )
+        parser.add_argument("--json", dest="json_path", default=None,
+                            help="Also write the report to this file")
+        # Internal: runs inside the throwaway environment to seed and profile
+        parser.add_argument("--seed-only", action="store_true", help="(internal)")
+
+    def handle(self, *args, **options):
+        if options["seed_only"]:
+            fixture = seed(options["students"])
+            fixture["query_counts"] = profile_queries(fixture)
+            self.stdout.write(json.dumps(fixture))
+            return
+
+        database_url = options["database_url"]
+        sqlite = database_url is None or database_url.startswith("sqlite")
+        if options["gunicorn_workers"] is None:
+            options["gunicorn_workers"] = 1 if sqlite else 4
+        if sqlite and "burst" in options["scenarios"]:
+            self.stderr.write(self.style.WARNING(
+                "SQLite serializes writes, so the exam-end burst measures its write lock "
+                "rather than the app (and extra gunicorn workers only add 'database is "
+                "locked' errors). Pass --database-url postgres://... (a scratch database) "
+                "for realistic submission numbers."
+            ))
+
+        with tempfile.TemporaryDirectory(prefix="acadai-loadtest-") as tmpdir:
+            database_url = database_url or f"sqlite:///{tmpdir}/loadtest.sqlite3"
+            env = {
+                **os.environ,
+                "DATABASE_URL": database_url,
+                "DB_SSL_REQUIRE": "False",
+            }
+            manage = [sys.executable, str(settings.BASE_DIR / "manage.py")]
+
+            self.stdout.write(f"Preparing throwaway database {database_url}")
+            subprocess.run(manage + ["migrate", "--noinput", "-v", "0"], env=env,
+                           check=True, cwd=settings.BASE_DIR)
+            seeded = subprocess.run(
+                manage + ["loadtest", "--seed-only", "--students", str(options["students"])],
+                env=env, check=True, capture_output=True, text=True, cwd=settings.BASE_DIR,
+            )
+            fixture = json.loads(seeded.stdout.strip().splitlines()[-1])
+
+            port = _free_port()
+            server = subprocess.Popen(
+                [sys.executable, "-m", "gunicorn", "AcadAI_Project.wsgi",
+                 "--bind", f"127.0.0.1:{port}",
+                 "--workers", str(options["gunicorn_workers"]),
+                 "--threads", str(options["gunicorn_threads"]),
+                 "--log-level", "warning"],
+                env=env, cwd=settings.BASE_DIR,
+            )
+            try:
+                _wait_for_port(port, timeout=30)
+                report = self._run(f"http://127.0.0.1:{port}", fixture, options)
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        report["query_counts"] = fixture["query_counts"]
+        self._print(report)
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump(report, f, indent=2)
+
+    def _run(self, base_url, fixture, options):
+        client = LoadClient(base_url)
+        concurrency = options["concurrency"]
+        report = {"scenarios": {}}
+
+        started = time.perf_counter()
+        tokens = login_all(client, fixture["students"], concurrency)
+        report["scenarios"]["login"] = client.summary(time.perf_counter() - started)
+        if not tokens:
+            raise CommandError("No student could log in; is the server healthy?")
+        tokens = list(tokens.values())
+
+        if "stampede" in options["scenarios"]:
+            client.reset()
+            started = time.perf_counter()
+            exam_start_stampede(client, tokens, fixture["exam_id"], concurrency)
+            report["scenarios"]["exam-start stampede"] = client.summary(
+                time.perf_counter() - started
+            )
+
+        if "burst" in options["scenarios"]:
+            client.reset()
+            started = time.perf_counter()
+            exam_end_burst(client, tokens, fixture["exam_id"], fixture["questions"],
+                           concurrency, options["burst_window"])
+            report["scenarios"]["exam-end burst"] = client.summary(
+                time.perf_counter() - started
+            )
+
+        return report
+
+    def _print(self, report):
+        for scenario, endpoints in report["scenarios"].items():
+            self.stdout.write(self.style.MIGRATE_HEADING(scenario))
+            for label, metrics in sorted(endpoints.items()):
+                queries = report["query_counts"].get(label, "?")
+                self.stdout.write(
+                    f"  {label:<24} {metrics['requests']:>6} req  "
+                    f"{metrics['throughput_rps']:>8} req/s  "
+                    f"p50 {metrics['p50_ms']}ms  p95 {metrics['p95_ms']}ms  "
+                    f"p99 {metrics['p99_ms']}ms  errors {metrics['error_rate']:.2%}  "
+                    f"queries/request {queries}"
+                )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from Acad_ai_app.analytics import rebuild_exam_analytics
+
+
+class Command(BaseCommand):
+    help = "Recompute exam and question analytics from the submissions tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exams",
+            type=int,
+            nargs="+",
+            default=None,
+            help="Only rebuild these exam ids (default: every exam)",
+        )
+
+    def handle(self, *args, **options):
+        exams = rebuild_exam_analytics(options["exams"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt analytics for {exams} exams"))
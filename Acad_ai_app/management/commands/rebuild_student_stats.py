@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from Acad_ai_app.stats import rebuild_student_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-student submission statistics from the submissions table"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--students",
+            type=int,
+            nargs="+",
+            default=None,
+            help="Only rebuild these student ids (default: everyone)",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_student_stats(options["students"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt statistics for {rows} students"))
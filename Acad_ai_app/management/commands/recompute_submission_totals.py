@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from Acad_ai_app.analytics import rebuild_exam_analytics
+from Acad_ai_app.models import Submission
+from grading.pipeline import recompute_submission_totals
+
+CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute total_score, percentage and passed of graded submissions "
+        "from their answers (e.g. after question marks changed)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exams",
+            type=int,
+            nargs="+",
+            default=None,
+            help="Only these exam ids (default: every exam)",
+        )
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        submissions = Submission.objects.filter(status="graded")
+        if options["exams"]:
+            submissions = submissions.filter(exam_id__in=options["exams"])
+
+        chunk, updated = [], 0
+        for submission_id in submissions.order_by("id").values_list("id", flat=True).iterator(
+            chunk_size=options["chunk_size"]
+        ):
+            chunk.append(submission_id)
+            if len(chunk) >= options["chunk_size"]:
+                updated += recompute_submission_totals(chunk)
+                chunk = []
+                self.stdout.write(f"  {updated} submissions recomputed")
+        if chunk:
+            updated += recompute_submission_totals(chunk)
+
+        rebuild_exam_analytics(options["exams"])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed {updated} submissions"))
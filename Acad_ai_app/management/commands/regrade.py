@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from Acad_ai_app.models import Exam, Question, RegradeJob
+from grading.regrade import create_regrade_job, run_pending_regrades, run_regrade_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Regrade graded answers after questions changed, streaming them in "
+        "resumable chunks"
+    )
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--exam", type=int, help="Regrade this exam now")
+        target.add_argument("--resume", type=int, metavar="JOB_ID",
+                            help="Resume an interrupted or failed regrade job")
+        target.add_argument("--pending", action="store_true",
+                            help="Run the jobs queued through the API")
+        parser.add_argument(
+            "--questions",
+            type=int,
+            nargs="+",
+            default=None,
+            help="With --exam, only regrade answers to these questions",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        if options["pending"]:
+            ran = run_pending_regrades(chunk_size=chunk_size, progress=self._progress)
+            self.stdout.write(self.style.SUCCESS(f"Ran {ran} regrade jobs"))
+            return
+
+        if options["resume"]:
+            try:
+                job = RegradeJob.objects.get(id=options["resume"])
+            except RegradeJob.DoesNotExist:
+                raise CommandError(f"Regrade job {options['resume']} does not exist")
+            if job.status == "completed":
+                raise CommandError(f"Regrade job {job.id} already completed")
+        else:
+            if not Exam.objects.filter(id=options["exam"]).exists():
+                raise CommandError(f"Exam {options['exam']} does not exist")
+            question_ids = options["questions"] or []
+            unknown = set(question_ids) - set(
+                Question.objects.filter(exam_id=options["exam"], id__in=question_ids)
+                .values_list("id", flat=True)
+            )
+            if unknown:
+                raise CommandError(f"Questions {sorted(unknown)} are not part of exam {options['exam']}")
+            job = create_regrade_job(options["exam"], question_ids)
+            self.stdout.write(f"Created regrade job {job.id}")
+
+        job = run_regrade_job(job, chunk_size=chunk_size, progress=self._progress)
+        if job.status == "failed":
+            raise CommandError(
+                f"Regrade job {job.id} failed: {job.error} "
+                f"(resume with --resume {job.id})"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Regrade job {job.id} completed: {job.processed_answers} answers regraded"
+        ))
+
+    def _progress(self, job):
+        self.stdout.write(
+            f"  job {job.id}: {job.processed_answers}/{job.total_answers} answers"
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0011_remove_course_acad_ai_app_code_0ef605_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='grading_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='grading_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['status', 'submitted_at'], name='Acad_ai_app_status_ccde30_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0012_submission_grading_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 01:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0013_exam_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['student', '-submitted_at', '-id'], name='Acad_ai_app_student_c17570_idx'),
+        ),
+    ]
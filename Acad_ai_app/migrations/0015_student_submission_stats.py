@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-18 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def backfill_stats(apps, schema_editor):
+    Submission = apps.get_model("Acad_ai_app", "Submission")
+    StudentSubmissionStats = apps.get_model("Acad_ai_app", "StudentSubmissionStats")
+
+    graded = Q(graded_at__isnull=False)
+    totals = Submission.objects.values("student_id").annotate(
+        total_submissions=Count("id"),
+        graded_count=Count("id", filter=graded),
+        passed_count=Count("id", filter=graded & Q(passed=True)),
+        score_sum=Sum("total_score", filter=graded),
+        percentage_sum=Sum("percentage", filter=graded),
+    ).order_by()
+    StudentSubmissionStats.objects.bulk_create(
+        [
+            StudentSubmissionStats(
+                student_id=row["student_id"],
+                total_submissions=row["total_submissions"],
+                graded_count=row["graded_count"],
+                passed_count=row["passed_count"],
+                score_sum=row["score_sum"] or 0,
+                percentage_sum=row["percentage_sum"] or 0,
+            )
+            for row in totals
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0014_submission_history_index'),
+        ('auth_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentSubmissionStats',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='submission_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_submissions', models.IntegerField(default=0)),
+                ('graded_count', models.IntegerField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('score_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('percentage_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'student submission stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0 on 2026-10-18 01:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+HISTOGRAM_BUCKETS = 10
+
+
+def backfill_analytics(apps, schema_editor):
+    Exam = apps.get_model("Acad_ai_app", "Exam")
+    Submission = apps.get_model("Acad_ai_app", "Submission")
+    SubmissionAnswer = apps.get_model("Acad_ai_app", "SubmissionAnswer")
+    ExamStats = apps.get_model("Acad_ai_app", "ExamStats")
+    ExamScoreBucket = apps.get_model("Acad_ai_app", "ExamScoreBucket")
+    QuestionStats = apps.get_model("Acad_ai_app", "QuestionStats")
+
+    exam_ids = list(Exam.objects.values_list("id", flat=True))
+    stats = {exam_id: ExamStats(exam_id=exam_id) for exam_id in exam_ids}
+    buckets = {
+        (exam_id, bucket): ExamScoreBucket(exam_id=exam_id, bucket=bucket)
+        for exam_id in exam_ids
+        for bucket in range(HISTOGRAM_BUCKETS)
+    }
+    graded = Submission.objects.filter(graded_at__isnull=False, percentage__isnull=False)
+    for exam_id, percentage, passed in graded.values_list(
+        "exam_id", "percentage", "passed"
+    ).iterator(chunk_size=2000):
+        row = stats[exam_id]
+        row.graded_count += 1
+        row.passed_count += 1 if passed else 0
+        row.percentage_sum += percentage
+        row.percentage_sq_sum += percentage * percentage
+        bucket = min(max(int(percentage // 10), 0), HISTOGRAM_BUCKETS - 1)
+        buckets[(exam_id, bucket)].count += 1
+
+    ExamStats.objects.bulk_create(stats.values(), batch_size=1000)
+    ExamScoreBucket.objects.bulk_create(buckets.values(), batch_size=1000)
+    QuestionStats.objects.bulk_create(
+        [
+            QuestionStats(
+                question_id=row["question_id"],
+                answer_count=row["answer_count"],
+                marks_sum=row["marks_sum"] or 0.0,
+            )
+            for row in SubmissionAnswer.objects.filter(awarded_marks__isnull=False)
+            .values("question_id")
+            .annotate(answer_count=Count("id"), marks_sum=Sum("awarded_marks"))
+            .order_by()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0015_student_submission_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamStats',
+            fields=[
+                ('exam', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Acad_ai_app.exam')),
+                ('graded_count', models.IntegerField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('percentage_sum', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('percentage_sq_sum', models.DecimalField(decimal_places=4, default=0, max_digits=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'exam stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('question', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='Acad_ai_app.question')),
+                ('answer_count', models.IntegerField(default=0)),
+                ('marks_sum', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'question stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExamScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='Acad_ai_app.exam')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam', 'bucket'), name='unique_exam_score_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_analytics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 01:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Exam = apps.get_model("Acad_ai_app", "Exam")
+    Question = apps.get_model("Acad_ai_app", "Question")
+
+    questions = Question.objects.filter(exam_id=OuterRef("pk")).order_by().values("exam_id")
+    Exam.objects.update(
+        question_count=Coalesce(Subquery(questions.annotate(n=Count("id")).values("n")), 0),
+        total_marks=Coalesce(Subquery(questions.annotate(total=Sum("marks")).values("total")), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0017_regrade_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='total_marks',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 02:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0018_exam_question_totals'),
+        ('course_module', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['is_active', 'start_time', 'end_time'], name='exam_open_window_idx'),
+        ),
+    ]
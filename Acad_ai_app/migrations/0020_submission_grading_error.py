@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Acad_ai_app', '0019_exam_open_window_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='submission',
+            name='grading_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In Progress'), ('submitted', 'Submitted'), ('grading', 'Grading'), ('graded', 'Graded'), ('failed', 'Grading Failed')], db_index=True, default='in_progress', max_length=20),
+        ),
+    ]
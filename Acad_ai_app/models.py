@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 from django.conf import settings
 from course_module.models import Course
@@ -9,6 +10,44 @@ from course_module.models import Course
 
 ### don't forget to add throttling
 
+class ExamQuerySet(models.QuerySet):
+    def questions_added(self, count, marks):
+        """
+        Account for newly created questions in question_count/total_marks.
+        Also bumps the version, so callers only need exam_cache.forget_exams.
+        """
+        return self.update(
+            question_count=models.F("question_count") + count,
+            total_marks=models.F("total_marks") + marks,
+            version=models.F("version") + 1,
+        )
+
+    def refresh_question_totals(self):
+        """Recount question_count/total_marks after edits or deletions"""
+        questions = Question.objects.filter(exam_id=models.OuterRef("pk")).order_by().values("exam_id")
+        return self.update(
+            question_count=Coalesce(
+                models.Subquery(questions.annotate(n=models.Count("id")).values("n")), 0
+            ),
+            total_marks=Coalesce(
+                models.Subquery(questions.annotate(total=models.Sum("marks")).values("total")), 0
+            ),
+            version=models.F("version") + 1,
+        )
+
+    def not_ended(self, now):
+        """Active exams whose window has not closed (open now or upcoming)"""
+        return self.filter(
+            models.Q(end_time__isnull=True) | models.Q(end_time__gte=now), is_active=True
+        )
+
+    def open_at(self, now):
+        """Active exams whose availability window contains now"""
+        return self.not_ended(now).filter(
+            models.Q(start_time__isnull=True) | models.Q(start_time__lte=now)
+        )
+
+
 class Exam(models.Model):
     course = models.ForeignKey(
         Course, on_delete=models.CASCADE, related_name="exams", db_index=True
@@ -23,6 +62,42 @@ class Exam(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, db_index=True, null=True)
     updated_at = models.DateTimeField(auto_now=True, null=True)
+    # Bumped whenever the exam or any of its questions changes; keys the
+    # cached student-facing exam payload (see exam_cache)
+    version = models.PositiveIntegerField(default=1)
+    # Maintained as questions are added, edited and removed (see
+    # ExamQuerySet) so submission and grading skip the aggregates
+    question_count = models.PositiveIntegerField(default=0)
+    total_marks = models.PositiveIntegerField(default=0)
+
+    objects = ExamQuerySet.as_manager()
+
+    # Written with F() by question writes; save() never overwrites them
+    # from a possibly stale instance
+    QUESTION_TOTAL_FIELDS = ("question_count", "total_marks")
+
+    class Meta:
+        indexes = [
+            # Serves open_at()/not_ended(), which load the open exams snapshot
+            models.Index(fields=["is_active", "start_time", "end_time"], name="exam_open_window_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        bump = not self._state.adding
+        if bump:
+            # Increment in the database so concurrent question edits are not
+            # overwritten by this instance's stale version
+            self.version = models.F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in self.QUESTION_TOTAL_FIELDS
+                ]
+            kwargs["update_fields"] = {*update_fields, "version"}
+        super().save(*args, **kwargs)
+        if bump:
+            self.refresh_from_db(fields=["version", *self.QUESTION_TOTAL_FIELDS])
 
 
 class Question(models.Model):
@@ -69,6 +144,16 @@ class SubmissionQuerySet(models.QuerySet):
     def for_student(self, student):
         return self.filter(student=student)
 
+    def delete(self):
+        # Submissions and answers have no delete receivers (so cascades from
+        # an exam or user stay bulk DELETEs); direct deletes adjust the
+        # statistics here. See Acad_ai_app.signals
+        from .signals import forget_submissions
+
+        with transaction.atomic():
+            forget_submissions(self)
+            return super().delete()
+
 
 class SubmissionManager(models.Manager.from_queryset(SubmissionQuerySet)):
     def for_student(self, student):
@@ -90,6 +175,8 @@ class Submission(models.Model):
         ('submitted', 'Submitted'),
         ('grading', 'Grading'),
         ('graded', 'Graded'),
+        # Queued grading gave up after GRADING['QUEUE_MAX_ATTEMPTS']
+        ('failed', 'Grading Failed'),
     ]
     status = models.CharField(
         max_length=20,
@@ -116,9 +203,30 @@ class Submission(models.Model):
     
     feedback = models.TextField(blank=True)
 
+    # Queued grading bookkeeping (see grading.pipeline)
+    grading_started_at = models.DateTimeField(null=True, blank=True)
+    grading_attempts = models.PositiveSmallIntegerField(default=0)
+    # Last grading failure of a queued submission (see grading.pipeline)
+    grading_error = models.TextField(blank=True)
+
     # ✅ ADD THIS LINE - Assign the custom manager
     objects = SubmissionManager()
 
+    def delete(self, *args, **kwargs):
+        from .signals import forget_submissions
+
+        with transaction.atomic():
+            forget_submissions(Submission.objects.filter(pk=self.pk))
+            return super().delete(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Grading queue: oldest submitted first
+            models.Index(fields=["status", "submitted_at"]),
+            # Keyset pagination of a student's history (see KeysetPagination)
+            models.Index(fields=["student", "-submitted_at", "-id"]),
+        ]
+
 
 class SubmissionAnswer(models.Model):
     submission = models.ForeignKey(
@@ -127,3 +235,102 @@ class SubmissionAnswer(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     answer_text = models.TextField()
     awarded_marks = models.FloatField(null=True, blank=True)
+
+
+class StudentSubmissionStats(models.Model):
+    """
+    Running per-student totals behind the submission statistics endpoint,
+    maintained as submissions are created and graded (see Acad_ai_app.stats).
+    A submission counts as graded once it has a graded_at timestamp.
+    """
+    student = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="submission_stats",
+    )
+    total_submissions = models.IntegerField(default=0)
+    graded_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    percentage_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "student submission stats"
+
+
+class ExamStats(models.Model):
+    """
+    Running score distribution of an exam's graded submissions, maintained as
+    submissions are graded (see Acad_ai_app.analytics). Mean and variance of
+    `percentage` are derived from the sum and sum of squares.
+    """
+    exam = models.OneToOneField(
+        Exam, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    graded_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    percentage_sum = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    percentage_sq_sum = models.DecimalField(max_digits=20, decimal_places=4, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "exam stats"
+
+
+class ExamScoreBucket(models.Model):
+    """Histogram bucket of an exam's submission percentages"""
+    exam = models.ForeignKey(
+        Exam, on_delete=models.CASCADE, related_name="score_buckets"
+    )
+    # Bucket n holds percentages in [n * width, (n + 1) * width); the last
+    # bucket also holds 100%
+    bucket = models.PositiveSmallIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["exam", "bucket"], name="unique_exam_score_bucket"),
+        ]
+
+
+class QuestionStats(models.Model):
+    """Running totals of the marks awarded for a question"""
+    question = models.OneToOneField(
+        Question, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    answer_count = models.IntegerField(default=0)
+    marks_sum = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "question stats"
+
+
+class RegradeJob(models.Model):
+    """
+    Regrading of an exam's graded answers after its questions changed,
+    processed in chunks by grading.regrade. `last_answer_id` checkpoints the
+    last committed chunk so an interrupted job resumes where it stopped.
+    """
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("completed", "Completed"),
+        ("failed", "Failed"),
+    ]
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="regrade_jobs")
+    # Only regrade answers to these questions; empty means the whole exam
+    question_ids = models.JSONField(default=list, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued", db_index=True)
+    total_answers = models.IntegerField(default=0)
+    processed_answers = models.IntegerField(default=0)
+    last_answer_id = models.BigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="regrade_jobs"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
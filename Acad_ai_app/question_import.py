@@ -0,0 +1,106 @@
+"""
+Bulk question import from CSV or JSONL question banks.
+
+Rows are read lazily from the file, validated a chunk at a time with
+QuestionImportSerializer and inserted with one batched bulk_create per
+chunk, so memory stays bounded by the chunk size whatever the size of the
+upload. Invalid rows are reported by line number and skipped; valid rows
+of the same chunk are still imported.
+
+Files are read with utils.tabular; CSV files need a header row naming the
+QuestionImportSerializer fields.
+"""
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from django.db import transaction
+from rest_framework import serializers
+
+from utils import tabular
+from utils.tabular import Row
+from .exam_cache import forget_exams
+from .models import Exam, Question
+from .serializers import QuestionImportSerializer
+
+IMPORT_CHUNK_SIZE = 1000
+
+# Per-row errors kept in the report; the counts cover every row
+MAX_REPORTED_ERRORS = 500
+
+LIST_FIELDS = ("choices", "keywords")
+
+
+def iter_rows(fileobj, fmt: str) -> Iterator[Row]:
+    return tabular.iter_rows(fileobj, fmt, list_fields=LIST_FIELDS)
+
+
+def bulk_insert_questions(exam_id: int, questions: List[Question],
+                          batch_size: int = IMPORT_CHUNK_SIZE) -> int:
+    """
+    Insert questions with bulk_create and maintain the exam's totals and
+    cached paper (bulk_create skips the Question signals).
+    """
+    if not questions:
+        return 0
+    with transaction.atomic():
+        Question.objects.bulk_create(questions, batch_size=batch_size)
+        Exam.objects.filter(pk=exam_id).questions_added(
+            len(questions), sum(question.marks for question in questions)
+        )
+        forget_exams([exam_id])
+    return len(questions)
+
+
+def import_questions(exam_id: int, rows: Iterable[Row], chunk_size: Optional[int] = None,
+                     progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Validate and insert rows from iter_rows, one chunk per transaction.
+    Returns a report of row counts and per-row errors.
+    """
+    chunk_size = chunk_size or IMPORT_CHUNK_SIZE
+    report = {
+        "exam_id": exam_id,
+        "rows": 0,
+        "created": 0,
+        "failed": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _import_chunk(exam_id, chunk, report, chunk_size)
+            chunk = []
+            if progress:
+                progress(report)
+    if chunk:
+        _import_chunk(exam_id, chunk, report, chunk_size)
+        if progress:
+            progress(report)
+    return report
+
+
+def _import_chunk(exam_id: int, chunk: List[Row], report: Dict, batch_size: int):
+    # One serializer validates the whole chunk, as ListSerializer does for
+    # its child; building the fields per row would dominate the import
+    serializer = QuestionImportSerializer()
+    questions = []
+    for line_number, data, errors in chunk:
+        report["rows"] += 1
+        if errors is None:
+            try:
+                validated = serializer.run_validation(data)
+            except serializers.ValidationError as exc:
+                errors = exc.detail
+            else:
+                questions.append(Question(exam_id=exam_id, **validated))
+                continue
+
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_number, "errors": errors})
+        else:
+            report["errors_truncated"] = True
+
+    report["created"] += bulk_insert_questions(exam_id, questions, batch_size)
@@ -0,0 +1,144 @@
+"""
+Streaming export of an exam's graded results.
+
+One row per graded submission: the student, the submission totals and the
+awarded_marks of every question (one "q<question id>" column each).
+Submissions are read with their answers through one cursor (a LEFT JOIN
+ordered by submission id), so the export comes from a single snapshot even
+while grading is still writing, and output is produced in batches of rows,
+so memory does not grow with the number of submissions or answers.
+
+Formats:
+  csv       header row, then one line per submission
+  jsonl     one JSON object per submission
+  columnar  a header line {"columns": [...]}, then one line per batch of
+            rows holding each column's values as an array
+            ({"rows": n, "data": [[column 0 values], [column 1 values], ...]})
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from itertools import groupby, islice
+from typing import Iterable, Iterator, List, Optional
+
+from .models import Question, Submission, SubmissionAnswer
+
+EXPORT_FORMATS = {
+    # format: (content type, file extension)
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "columnar": ("application/x-ndjson", "columnar.jsonl"),
+}
+
+# Rows fetched per cursor round trip
+EXPORT_CHUNK_SIZE = 2000
+# Rows written per chunk of output
+EXPORT_BATCH_ROWS = 500
+
+SUBMISSION_COLUMNS = (
+    "submission_id",
+    "student_id",
+    "student_username",
+    "student_email",
+    "submitted_at",
+    "graded_at",
+    "total_score",
+    "percentage",
+    "passed",
+)
+
+
+def iter_result_rows(exam_id: int, question_ids: List[int],
+                     chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[list]:
+    """Submission columns followed by awarded_marks per question, in question_ids order"""
+    position = {question_id: index for index, question_id in enumerate(question_ids)}
+    # One row per answer (or one with NULL answer columns for a submission
+    # without answers), submission columns first
+    rows = (
+        Submission.objects.filter(exam_id=exam_id, status="graded")
+        .order_by("id")
+        .values_list(
+            "id", "student_id", "student__username", "student__email",
+            "submitted_at", "graded_at", "total_score", "percentage", "passed",
+            "answers__question_id", "answers__awarded_marks",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    for _, answers in groupby(rows, key=lambda row: row[0]):
+        marks = [None] * len(question_ids)
+        for row in answers:
+            index = position.get(row[-2])
+            if index is not None:
+                marks[index] = row[-1]
+        yield [*row[:-2], *marks]
+
+
+def _batches(rows: Iterable[list], size: int = EXPORT_BATCH_ROWS) -> Iterator[List[list]]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(columns: List[str], rows: Iterable[list]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in _batches(rows):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            for row in batch
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # No rows at all: still send the header
+        yield buffer.getvalue()
+
+
+def _jsonl_chunks(columns: List[str], rows: Iterable[list]) -> Iterator[str]:
+    for batch in _batches(rows):
+        yield "".join(
+            json.dumps(dict(zip(columns, map(_json_value, row)))) + "\n" for row in batch
+        )
+
+
+def _columnar_chunks(columns: List[str], rows: Iterable[list]) -> Iterator[str]:
+    yield json.dumps({"columns": columns}) + "\n"
+    for batch in _batches(rows):
+        data = [list(map(_json_value, column)) for column in zip(*batch)]
+        yield json.dumps({"rows": len(batch), "data": data}) + "\n"
+
+
+_WRITERS = {
+    "csv": _csv_chunks,
+    "jsonl": _jsonl_chunks,
+    "columnar": _columnar_chunks,
+}
+
+
+def stream_results(exam_id: int, fmt: str, chunk_size: Optional[int] = None) -> Iterator[str]:
+    """
+    Chunks of the exported results. The question columns are resolved now;
+    submissions are only read as the returned iterator is consumed.
+    """
+    question_ids = list(
+        Question.objects.filter(exam_id=exam_id).order_by("id").values_list("id", flat=True)
+    )
+    columns = [*SUBMISSION_COLUMNS, *(f"q{question_id}" for question_id in question_ids)]
+    rows = iter_result_rows(exam_id, question_ids, chunk_size or EXPORT_CHUNK_SIZE)
+    return _WRITERS[fmt](columns, rows)
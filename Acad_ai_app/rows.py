@@ -0,0 +1,61 @@
+"""
+Plain-dict rows for the read-heavy endpoints.
+
+Each column spec mirrors a serializer's output, as (output key, ORM lookup)
+pairs, so rows can be fetched with values()/values_list() and encoded with
+utils.fast_json without instantiating models or running serializer fields.
+The encoded JSON is the same as the serializer's; keep the specs in step
+with the serializers they mirror.
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+Columns = Sequence[Tuple[str, str]]
+
+# ExamListSerializer
+EXAM_LIST_COLUMNS = (
+    ("id", "id"),
+    ("title", "title"),
+    ("course", "course"),
+    ("duration_minutes", "duration_minutes"),
+    ("course_name", "course__name"),
+    ("course_code", "course__code"),
+)
+
+# SubmissionListSerializer
+SUBMISSION_LIST_COLUMNS = (
+    ("id", "id"),
+    ("exam_title", "exam__title"),
+    ("course_name", "exam__course__name"),
+    ("course_code", "exam__course__code"),
+    ("status", "status"),
+    ("submitted_at", "submitted_at"),
+    ("total_score", "total_score"),
+    ("percentage", "percentage"),
+    ("passed", "passed"),
+    ("graded_at", "graded_at"),
+    ("feedback", "feedback"),
+)
+
+# QuestionSerializer (the student-facing exam paper)
+QUESTION_COLUMNS = (
+    ("id", "id"),
+    ("text", "text"),
+    ("marks", "marks"),
+    ("question_type", "question_type"),
+    ("choices", "choices"),
+)
+
+
+def lookups(columns: Columns) -> List[str]:
+    return [lookup for _, lookup in columns]
+
+
+def fetch_rows(queryset, columns: Columns) -> List[Dict]:
+    """The queryset's rows as dicts keyed like the mirrored serializer"""
+    keys = [key for key, _ in columns]
+    return [dict(zip(keys, row)) for row in queryset.values_list(*lookups(columns))]
+
+
+def rename_rows(rows: Iterable[Dict], columns: Columns) -> List[Dict]:
+    """Re-key rows fetched with queryset.values(*lookups(columns))"""
+    return [{key: row[lookup] for key, lookup in columns} for row in rows]
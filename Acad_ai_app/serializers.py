@@ -1,7 +1,9 @@
-from .models import Exam, Question, Submission, SubmissionAnswer
+from .models import Exam, Question, RegradeJob, Submission, SubmissionAnswer
 from rest_framework import serializers
 from course_module.serializers import CourseDetailSerializer
 from course_module.models import Course
+from .exam_cache import get_open_exams
+from .submission_context import load_submission_context
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -112,36 +114,41 @@ class SubmissionCreateSerializer(serializers.Serializer):
     exam_id = serializers.IntegerField()
     answers = AnswerSubmitSerializer(many=True)
 
-    def validate_exam_id(self, value):
-        """Validate exam exists and is available"""
+    def validate(self, data):
+        """
+        Validate the exam is available and the answers belong to it.
+
+        Availability comes from the open exams snapshot (see exam_cache), so
+        exams that have not started or have ended are turned away without a
+        query. The exam and its questions are loaded once (see
+        submission_context) and handed on in validated_data["context"] for
+        the insert and grader.
+        """
         try:
-            exam = Exam.objects.only("id", "is_active", "start_time", "end_time").get(
-                id=value
-            )
-            # Add your is_available() check if needed
-            if not exam.is_active:
-                raise serializers.ValidationError(
-                    "This exam is not currently available."
-                )
-        except Exam.DoesNotExist:
-            raise serializers.ValidationError("Exam not found.")
-        return value
+            error = get_open_exams().availability_error(data["exam_id"])
+            in_snapshot = True
+        except KeyError:
+            # Inactive, already over or unknown; the exam row decides below
+            error, in_snapshot = None, False
+        if error:
+            raise serializers.ValidationError({"exam_id": error})
+
+        context = load_submission_context(data["exam_id"])
+        if context is None:
+            raise serializers.ValidationError({"exam_id": "Exam not found."})
+
+        if not in_snapshot:
+            error = context.availability_error()
+            if error:
+                raise serializers.ValidationError({"exam_id": error})
 
-    def validate(self, data):
-        """Validate answers belong to exam"""
-        exam = Exam.objects.only("id").get(id=data["exam_id"])
         question_ids = {ans["question_id"] for ans in data["answers"]}
-
-        # Efficient check using exists()
-        exam_question_ids = set(
-            exam.questions.filter(id__in=question_ids).values_list("id", flat=True)
-        )
-
-        if question_ids != exam_question_ids:
+        if not question_ids <= context.questions.keys():
             raise serializers.ValidationError(
                 "Some questions do not belong to this exam or are invalid."
             )
 
+        data["context"] = context
         return data
 
 class QuestionCreateSerializer(serializers.ModelSerializer):
@@ -161,6 +168,36 @@ class QuestionCreateSerializer(serializers.ModelSerializer):
         return value
 
 
+class QuestionImportSerializer(serializers.ModelSerializer):
+    """One row of a bulk question import (see Acad_ai_app.question_import)"""
+
+    choices = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_null=True
+    )
+    keywords = serializers.ListField(
+        child=serializers.CharField(), required=False, allow_null=True
+    )
+
+    class Meta:
+        model = Question
+        fields = [
+            "text",
+            "question_type",
+            "expected_answer",
+            "marks",
+            "choices",
+            "keywords",
+            "min_word_count",
+        ]
+
+    def validate(self, data):
+        if data.get("question_type") == "mcq" and not data.get("choices"):
+            raise serializers.ValidationError(
+                {"choices": "Choices are required for multiple choice questions"}
+            )
+        return data
+
+
 class ExamCreateSerializer(serializers.ModelSerializer):
     questions = QuestionCreateSerializer(many=True, required=False)
     course = serializers.SlugRelatedField(
@@ -193,6 +230,11 @@ class ExamCreateSerializer(serializers.ModelSerializer):
         if questions_data:
             question_objs = [Question(exam=exam, **q) for q in questions_data]
             Question.objects.bulk_create(question_objs)
+            # bulk_create skips signals, so maintain the exam totals here
+            Exam.objects.filter(pk=exam.pk).questions_added(
+                len(question_objs), sum(q.marks for q in question_objs)
+            )
+            exam.refresh_from_db(fields=["version", "question_count", "total_marks"])
 
         return exam
 
@@ -200,17 +242,41 @@ class BulkQuestionCreateSerializer(serializers.Serializer):
     """Serializer for bulk creating questions for an exam"""
 
     exam_id = serializers.IntegerField()
-    questions = QuestionCreateSerializer(many=True)
+    questions = QuestionImportSerializer(many=True, allow_empty=False)
 
     def validate_exam_id(self, value):
         try:
             exam = Exam.objects.get(id=value)
             # Check if user is the creator or staff
             request = self.context.get("request")
-            if exam.created_by != request.user and not request.user.is_superuser:
+            if exam.created_by_id != request.user.id and not request.user.is_superuser:
                 raise serializers.ValidationError(
                     "You can only add questions to exams you created"
                 )
         except Exam.DoesNotExist:
             raise serializers.ValidationError("Exam not found")
-        return value
\ No newline at end of file
+        return value
+
+class RegradeRequestSerializer(serializers.Serializer):
+    """Questions to regrade; omit to regrade the whole exam"""
+
+    question_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list
+    )
+
+
+class RegradeJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RegradeJob
+        fields = [
+            "id",
+            "exam",
+            "question_ids",
+            "status",
+            "total_answers",
+            "processed_answers",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
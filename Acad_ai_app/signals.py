@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from grading.reference import get_reference_model
+from .exam_cache import forget_exams
+from .analytics import rebuild_exam_analytics, record_answer_grades, record_exam_grading
+from .models import Exam, Question, Submission, SubmissionAnswer
+from .stats import rebuild_student_stats, record_deletion
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Question)
+def warm_reference_model(sender, instance, **kwargs):
+    """
+    Compile the essay similarity reference as soon as a question is saved.
+
+    The reference is keyed by a digest of expected_answer, so an edit simply
+    compiles a new artifact and the stale one is never looked up again.
+    """
+    if instance.question_type in ("essay", "short"):
+        get_reference_model(instance)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def update_exam_for_question(sender, instance, created=False, **kwargs):
+    """
+    Keep the exam's question_count/total_marks current and invalidate its
+    cached paper. Bulk paths call Exam.objects.questions_added themselves.
+    """
+    exams = Exam.objects.filter(pk=instance.exam_id)
+    if created:
+        exams.questions_added(1, instance.marks)
+    else:
+        exams.refresh_question_totals()
+    forget_exams([instance.exam_id])
+
+
+@receiver(post_save, sender=Exam)
+@receiver(post_delete, sender=Exam)
+def forget_exam(sender, instance, **kwargs):
+    """Exam.save() bumps the version itself; drop the cached pointer and count"""
+    forget_exams([instance.pk], active_count=True)
+
+
+def forget_submissions(submissions):
+    """
+    Take submissions that are about to be deleted out of their students'
+    statistics and their exams' analytics. Called by Submission.delete()
+    and SubmissionQuerySet.delete(); deleting a whole exam or user instead
+    rebuilds the affected rows once (receivers below), so those cascades
+    stay bulk DELETEs rather than running per-row receivers.
+    """
+    rows = list(submissions.values(
+        "id", "student_id", "exam_id", "graded_at", "total_score", "percentage", "passed",
+    ))
+    for row in rows:
+        record_deletion(row["student_id"], {
+            "graded_at": row["graded_at"],
+            "total_score": row["total_score"],
+            "percentage": row["percentage"],
+            "passed": row["passed"],
+        })
+        record_exam_grading(
+            row["exam_id"],
+            {"graded_at": row["graded_at"], "percentage": row["percentage"], "passed": row["passed"]},
+            None,
+            create=False,
+        )
+
+    marks = (
+        SubmissionAnswer.objects.filter(
+            submission_id__in=[row["id"] for row in rows], awarded_marks__isnull=False
+        )
+        .values("question_id")
+        .annotate(count=Count("id"), total=Sum("awarded_marks"))
+        .order_by()
+    )
+    record_answer_grades(
+        {row["question_id"]: (-row["count"], -row["total"]) for row in marks}, create=False
+    )
+
+
+@receiver(pre_delete, sender=Exam)
+def note_exam_students(sender, instance, **kwargs):
+    """The exam's analytics go with it; its students' statistics are rebuilt"""
+    instance._student_ids = list(
+        Submission.objects.filter(exam_id=instance.pk)
+        .order_by().values_list("student_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Exam)
+def rebuild_exam_students(sender, instance, **kwargs):
+    student_ids = instance.__dict__.pop("_student_ids", None)
+    if student_ids:
+        rebuild_student_stats(student_ids)
+
+
+@receiver(pre_delete, sender=User)
+def note_student_exams(sender, instance, **kwargs):
+    """The student's statistics go with them; their exams' analytics are rebuilt"""
+    instance._exam_ids = list(
+        Submission.objects.filter(student_id=instance.pk)
+        .order_by().values_list("exam_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def rebuild_student_exams(sender, instance, **kwargs):
+    exam_ids = instance.__dict__.pop("_exam_ids", None)
+    if exam_ids:
+        rebuild_exam_analytics(exam_ids)
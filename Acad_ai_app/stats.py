@@ -0,0 +1,132 @@
+"""
+Incrementally maintained per-student submission statistics.
+
+Every change is applied as an F() delta on the student's
+StudentSubmissionStats row inside the caller's transaction, so reading a
+student's statistics is a single primary-key lookup instead of an
+aggregate over their whole history. `rebuild_student_stats` recomputes the
+rows from the submissions table when they need repairing.
+"""
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import StudentSubmissionStats, Submission
+
+ZERO = Decimal("0.00")
+
+
+def _apply(student_id: int, create: bool = True, **deltas):
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    changes["updated_at"] = timezone.now()
+    updated = StudentSubmissionStats.objects.filter(student_id=student_id).update(**changes)
+    if not updated and create:
+        StudentSubmissionStats.objects.get_or_create(student_id=student_id)
+        StudentSubmissionStats.objects.filter(student_id=student_id).update(**changes)
+
+
+def _graded_values(graded_at, total_score, percentage, passed) -> Dict:
+    """A submission's contribution to the graded totals"""
+    if graded_at is None:
+        return {"graded_count": 0, "passed_count": 0, "score_sum": ZERO, "percentage_sum": ZERO}
+    return {
+        "graded_count": 1,
+        "passed_count": 1 if passed else 0,
+        "score_sum": total_score or ZERO,
+        "percentage_sum": percentage or ZERO,
+    }
+
+
+def record_submission(student_id: int):
+    """A new submission was created"""
+    _apply(student_id, total_submissions=1)
+
+
+def record_grading(student_id: int, previous: Optional[Dict], current: Dict):
+    """
+    A submission was (re)graded. `previous` and `current` hold its graded_at,
+    total_score, percentage and passed before and after; a regrade only
+    applies the difference.
+    """
+    before = _graded_values(**previous) if previous else _graded_values(None, None, None, None)
+    after = _graded_values(**current)
+    _apply(student_id, **{field: after[field] - before[field] for field in after})
+
+
+def record_deletion(student_id: int, submission: Dict):
+    """
+    A submission was deleted. Never creates a row: when the student is being
+    deleted too, their stats row may already be gone.
+    """
+    removed = _graded_values(**submission)
+    _apply(
+        student_id,
+        create=False,
+        total_submissions=-1,
+        **{field: -value for field, value in removed.items()},
+    )
+
+
+def get_student_stats(student_id: int) -> Dict:
+    """The statistics block served by the submissions statistics endpoint"""
+    stats = StudentSubmissionStats.objects.filter(student_id=student_id).first()
+    if stats is None:
+        stats = StudentSubmissionStats(student_id=student_id)
+
+    graded_count = stats.graded_count
+    return {
+        "total_submissions": stats.total_submissions,
+        "exam_grand_score": float(stats.score_sum),
+        "average_percentage": (
+            round(float(stats.percentage_sum) / graded_count, 2) if graded_count > 0 else 0.0
+        ),
+        "passed_count": stats.passed_count,
+        "graded_count": graded_count,
+        "pass_rate": (
+            round((stats.passed_count / graded_count) * 100, 2) if graded_count > 0 else 0.0
+        ),
+    }
+
+
+@transaction.atomic
+def rebuild_student_stats(student_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute stats rows from the submissions table, for all students or only
+    the given ones. Returns the number of rows written.
+    """
+    submissions = Submission.objects.all()
+    existing = StudentSubmissionStats.objects.all()
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        submissions = submissions.filter(student_id__in=student_ids)
+        existing = existing.filter(student_id__in=student_ids)
+
+    graded = Q(graded_at__isnull=False)
+    totals = submissions.values("student_id").annotate(
+        total_submissions=Count("id"),
+        graded_count=Count("id", filter=graded),
+        passed_count=Count("id", filter=graded & Q(passed=True)),
+        score_sum=Sum("total_score", filter=graded),
+        percentage_sum=Sum("percentage", filter=graded),
+    ).order_by()
+
+    rows = [
+        StudentSubmissionStats(
+            student_id=row["student_id"],
+            total_submissions=row["total_submissions"],
+            graded_count=row["graded_count"],
+            passed_count=row["passed_count"],
+            score_sum=row["score_sum"] or ZERO,
+            percentage_sum=row["percentage_sum"] or ZERO,
+        )
+        for row in totals
+    ]
+
+    existing.delete()
+    StudentSubmissionStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,53 @@
+"""
+Everything a submission needs to know about its exam, loaded once.
+
+The exam row (availability window, denormalized totals) comes joined onto
+its questions, so validating a submission, inserting its answers and
+grading them share a single round trip.
+"""
+from typing import Dict, Optional
+
+from django.utils import timezone
+
+from grading.pipeline import GRADING_QUESTION_FIELDS
+from .models import Exam, Question
+
+EXAM_FIELDS = (
+    "id", "title", "is_active", "start_time", "end_time", "question_count", "total_marks",
+)
+
+
+class SubmissionContext:
+    def __init__(self, exam: Exam, questions: Dict[int, Question]):
+        self.exam = exam
+        self.questions = questions
+
+    def availability_error(self) -> Optional[str]:
+        """Why the exam cannot be submitted right now, or None"""
+        if not self.exam.is_active:
+            return "This exam is not currently available."
+        now = timezone.now()
+        if self.exam.start_time and now < self.exam.start_time:
+            return "This exam has not started yet."
+        if self.exam.end_time and now > self.exam.end_time:
+            return "This exam has already ended."
+        return None
+
+
+def load_submission_context(exam_id: int) -> Optional[SubmissionContext]:
+    """The exam and its gradable questions in one query, or None if no such exam"""
+    questions = list(
+        Question.objects.filter(exam_id=exam_id)
+        .select_related("exam")
+        .only(*GRADING_QUESTION_FIELDS, "exam", *(f"exam__{field}" for field in EXAM_FIELDS))
+    )
+    if questions:
+        exam = questions[0].exam
+        # Share one Exam instance rather than one per row
+        for question in questions:
+            question.exam = exam
+        return SubmissionContext(exam, {question.id: question for question in questions})
+
+    # An exam without questions (rare) needs its own lookup
+    exam = Exam.objects.only(*EXAM_FIELDS).filter(pk=exam_id).first()
+    return SubmissionContext(exam, {}) if exam is not None else None
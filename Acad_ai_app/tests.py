@@ -1,3 +1,356 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from course_module.models import Course
+from grading.pipeline import grade_submission
+from grading.regrade import create_regrade_job, run_regrade_job
+from .analytics import get_exam_analytics, rebuild_exam_analytics
+from .models import Exam, Question, Submission, SubmissionAnswer
+from .results_export import SUBMISSION_COLUMNS, stream_results
+from .stats import get_student_stats, rebuild_student_stats, record_submission
+
+User = get_user_model()
+
+
+class GradedExamTestCase(TestCase):
+    """An exam with an MCQ, a true/false and a short answer question"""
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user("staff", "staff@example.com", user_type="staff")
+        course = Course.objects.create(name="Biology", code="BIO101")
+        # Exam saves drop the cached open exams snapshot on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exam = Exam.objects.create(
+                course=course, title="Photosynthesis", duration_minutes=30, created_by=self.staff
+            )
+        self.mcq = Question.objects.create(
+            exam=self.exam, text="Pigment?", question_type="mcq", expected_answer="Chlorophyll",
+            marks=4, choices=["Keratin", "Chlorophyll", "Melanin"],
+        )
+        self.true_false = Question.objects.create(
+            exam=self.exam, text="Plants need light?", question_type="true_false",
+            expected_answer="true", marks=2,
+        )
+        self.short = Question.objects.create(
+            exam=self.exam, text="What is produced?", question_type="short",
+            expected_answer="Glucose and oxygen", keywords=["glucose", "oxygen"], marks=4,
+        )
+
+    def submit(self, student, answers):
+        """Submit through the API (sync grading); answers map question -> text"""
+        client = APIClient()
+        client.force_authenticate(student)
+        response = client.post(
+            "/exam/submissions",
+            {
+                "exam_id": self.exam.id,
+                "answers": [
+                    {"question_id": question.id, "answer_text": text}
+                    for question, text in answers.items()
+                ],
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return Submission.objects.get(id=response.json()["data"]["submission_id"])
+
+    def submit_cohort(self):
+        self.alice = User.objects.create_user("alice", "alice@example.com")
+        self.bob = User.objects.create_user("bob", "bob@example.com")
+        self.carol = User.objects.create_user("carol", "carol@example.com")
+        self.submit(self.alice, {self.mcq: "b", self.true_false: "true", self.short: "glucose and oxygen"})
+        self.submit(self.bob, {self.mcq: "chlorophyll", self.true_false: "True", self.short: "oxygen"})
+        self.submit(self.carol, {self.mcq: "Melanin", self.true_false: "false", self.short: "sugar"})
+
+
+class StudentStatsTests(GradedExamTestCase):
+    """Incremental per-student statistics must equal a rebuild from the submissions"""
+
+    def assert_matches_rebuild(self):
+        students = (self.alice, self.bob, self.carol)
+        incremental = [get_student_stats(student.id) for student in students]
+        rebuild_student_stats()
+        self.assertEqual(incremental, [get_student_stats(student.id) for student in students])
+        return incremental
+
+    def test_grading(self):
+        self.submit_cohort()
+        alice, bob, carol = self.assert_matches_rebuild()
+        self.assertEqual((alice["total_submissions"], alice["graded_count"]), (1, 1))
+        self.assertEqual((alice["passed_count"], carol["passed_count"]), (1, 0))
+
+    def test_refinalizing_applies_only_the_difference(self):
+        self.submit_cohort()
+        submission = Submission.objects.get(student=self.carol)
+        before = get_student_stats(self.carol.id)
+
+        # Grading an already graded submission again must not count it twice
+        grade_submission(Submission.objects.get(id=submission.id))
+        self.assertEqual(get_student_stats(self.carol.id), before)
+
+        Question.objects.filter(id=self.short.id).update(expected_answer="Sugar")
+        grade_submission(Submission.objects.get(id=submission.id))
+        after = self.assert_matches_rebuild()[2]
+        self.assertEqual(after["graded_count"], before["graded_count"])
+        self.assertGreater(after["exam_grand_score"], before["exam_grand_score"])
+
+    def test_regrade(self):
+        self.submit_cohort()
+        before = [get_student_stats(student.id)["exam_grand_score"] for student in (self.alice, self.carol)]
+        self.mcq.expected_answer = "Melanin"
+        self.mcq.save()
+        run_regrade_job(create_regrade_job(self.exam.id, [self.mcq.id]))
+        alice, bob, carol = self.assert_matches_rebuild()
+        # Alice's MCQ answer is now wrong and Carol's right
+        self.assertAlmostEqual(alice["exam_grand_score"], before[0] - 4)
+        self.assertAlmostEqual(carol["exam_grand_score"], before[1] + 4)
+
+
+class ExamAnalyticsTests(GradedExamTestCase):
+    """Incremental exam analytics must equal a rebuild from the submissions"""
+
+    def assert_matches_rebuild(self):
+        incremental = get_exam_analytics(self.exam.id)
+        rebuild_exam_analytics([self.exam.id])
+        self.assertEqual(incremental, get_exam_analytics(self.exam.id))
+        return incremental
+
+    def test_grading(self):
+        self.submit_cohort()
+        analytics = self.assert_matches_rebuild()
+        self.assertEqual((analytics["graded_count"], analytics["passed_count"]), (3, 2))
+        self.assertEqual(sum(bucket["count"] for bucket in analytics["histogram"]), 3)
+        mcq = analytics["questions"][0]
+        self.assertEqual((mcq["answer_count"], mcq["mean_awarded_marks"]), (3, round(8 / 3, 2)))
+
+    def test_refinalizing_applies_only_the_difference(self):
+        self.submit_cohort()
+        submission = Submission.objects.get(student=self.carol)
+        before = get_exam_analytics(self.exam.id)
+
+        grade_submission(Submission.objects.get(id=submission.id))
+        self.assertEqual(get_exam_analytics(self.exam.id), before)
+
+        Question.objects.filter(id=self.short.id).update(expected_answer="Sugar")
+        grade_submission(Submission.objects.get(id=submission.id))
+        after = self.assert_matches_rebuild()
+        self.assertEqual(after["graded_count"], 3)
+        self.assertEqual(after["questions"][2]["answer_count"], 3)
+        self.assertGreater(after["mean_percentage"], before["mean_percentage"])
+
+    def test_first_grading_only_touches_the_new_bucket(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.submit_cohort()
+        bucket_updates = [
+            query["sql"] for query in queries.captured_queries
+            if query["sql"].startswith('UPDATE "Acad_ai_app_examscorebucket"')
+        ]
+        self.assertTrue(bucket_updates)
+        for sql in bucket_updates:
+            self.assertNotIn("IS NULL", sql)
+        self.assert_matches_rebuild()
+
+    def test_regrade(self):
+        self.submit_cohort()
+        self.mcq.expected_answer = "Melanin"
+        self.mcq.save()
+        run_regrade_job(create_regrade_job(self.exam.id, [self.mcq.id]))
+        analytics = self.assert_matches_rebuild()
+        self.assertEqual(analytics["questions"][0]["mean_awarded_marks"], round(4 / 3, 2))
+
+
+class ResultsExportTests(GradedExamTestCase):
+    def setUp(self):
+        super().setUp()
+        self.submit_cohort()
+        # An ungraded submission is not exported and its answers are not merged
+        self.dave = User.objects.create_user("dave", "dave@example.com")
+        pending = Submission.objects.create(student=self.dave, exam=self.exam, status="submitted")
+        pending.answers.create(question=self.mcq, answer_text="b")
+        self.question_columns = [f"q{question.id}" for question in (self.mcq, self.true_false, self.short)]
+
+    def expected_rows(self):
+        """(username, marks per question) of every graded submission, by submission id"""
+        return [
+            (
+                submission.student.username,
+                [
+                    float(submission.answers.get(question=question).awarded_marks)
+                    for question in (self.mcq, self.true_false, self.short)
+                ],
+            )
+            for submission in Submission.objects.filter(status="graded").order_by("id")
+        ]
+
+    def export(self, fmt, chunk_size=None):
+        return "".join(stream_results(self.exam.id, fmt, chunk_size))
+
+    def assert_rows(self, records):
+        self.assertEqual(
+            [
+                (record["student_username"], [float(record[column]) for column in self.question_columns])
+                for record in records
+            ],
+            self.expected_rows(),
+        )
+        self.assertEqual([record["student_username"] for record in records], ["alice", "bob", "carol"])
+
+    def test_csv(self):
+        reader = csv.DictReader(io.StringIO(self.export("csv")))
+        self.assertEqual(reader.fieldnames, [*SUBMISSION_COLUMNS, *self.question_columns])
+        self.assert_rows(list(reader))
+
+    def test_jsonl(self):
+        # A chunk size of one makes every answer a separate cursor fetch
+        for chunk_size in (None, 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assert_rows([json.loads(line) for line in self.export("jsonl", chunk_size).splitlines()])
+
+    def test_columnar(self):
+        header, *batches = [json.loads(line) for line in self.export("columnar").splitlines()]
+        columns = header["columns"]
+        self.assertEqual(columns, [*SUBMISSION_COLUMNS, *self.question_columns])
+        self.assertEqual([batch["rows"] for batch in batches], [3])
+        records = [dict(zip(columns, row)) for row in zip(*batches[0]["data"])]
+        self.assert_rows(records)
+
+    def test_unanswered_questions_are_empty(self):
+        SubmissionAnswer.objects.filter(question=self.short, submission__student=self.bob).delete()
+        records = [json.loads(line) for line in self.export("jsonl").splitlines()]
+        self.assertEqual([record[f"q{self.short.id}"] is None for record in records], [False, True, False])
+
+    def test_submissions_and_marks_come_from_one_query(self):
+        # Submission and answer cursors read at different times could pair a
+        # newly graded submission with no marks; one joined query cannot
+        erin = User.objects.create_user("erin", "erin@example.com")
+        Submission.objects.create(student=erin, exam=self.exam, status="graded")
+        chunks = stream_results(self.exam.id, "jsonl", chunk_size=2)
+        with self.assertNumQueries(1):
+            records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([record["student_username"] for record in records], ["alice", "bob", "carol", "erin"])
+        self.assertEqual([records[-1][column] for column in self.question_columns], [None, None, None])
+
+    def test_endpoint_streams_the_export(self):
+        client = APIClient()
+        client.force_authenticate(self.staff)
+        url = reverse("exam-results-export", args=[self.exam.id])
+        response = client.get(url, {"file_format": "jsonl"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assert_rows([json.loads(line) for line in b"".join(response.streaming_content).splitlines()])
+        self.assertEqual(client.get(url, {"file_format": "xml"}).status_code, 400)
+
+
+class ExamListTests(GradedExamTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            for title, fields in (
+                ("Upcoming", {"start_time": now + timedelta(days=1)}),
+                ("Ended", {"end_time": now - timedelta(days=1)}),
+                ("Inactive", {"is_active": False}),
+            ):
+                Exam.objects.create(
+                    course=self.exam.course, title=title, duration_minutes=30, created_by=self.staff, **fields
+                )
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def titles(self, **params):
+        response = self.client.get(reverse("exam-list"), params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()["data"]
+        self.assertEqual(data["count"], len(data["exams"]))
+        return sorted(exam["title"] for exam in data["exams"])
+
+    def test_lists_every_active_exam(self):
+        self.assertEqual(self.titles(), ["Ended", "Photosynthesis", "Upcoming"])
+
+    def test_open_lists_exams_open_now(self):
+        self.assertEqual(self.titles(open="true"), ["Photosynthesis"])
+        self.assertEqual(self.titles(open="false"), ["Ended", "Photosynthesis", "Upcoming"])
+
+
+class DeletionTests(GradedExamTestCase):
+    """Deletes keep statistics and analytics equal to a rebuild"""
+
+    def assert_matches_rebuild(self, exam_ids=(), students=()):
+        exam_ids, students = list(exam_ids), list(students)
+        incremental = (
+            [get_exam_analytics(exam_id) for exam_id in exam_ids],
+            [get_student_stats(student.id) for student in students],
+        )
+        rebuild_exam_analytics(exam_ids)
+        rebuild_student_stats([student.id for student in students])
+        self.assertEqual(incremental, (
+            [get_exam_analytics(exam_id) for exam_id in exam_ids],
+            [get_student_stats(student.id) for student in students],
+        ))
+
+    def graded_exam(self, students):
+        """An exam like self.exam with a graded submission per student, built without the API"""
+        exam = Exam.objects.create(
+            course=self.exam.course, title="Copy", duration_minutes=30, created_by=self.staff
+        )
+        questions = [
+            Question.objects.create(exam=exam, text="Q", question_type="true_false", expected_answer="true", marks=2)
+            for _ in range(3)
+        ]
+        for student in students:
+            submission = Submission.objects.create(student=student, exam=exam, status="submitted")
+            record_submission(student.id)
+            SubmissionAnswer.objects.bulk_create([
+                SubmissionAnswer(submission=submission, question=question, answer_text="true")
+                for question in questions
+            ])
+            grade_submission(submission)
+        return exam
+
+    def test_deleting_an_exam_takes_a_constant_number_of_queries(self):
+        counts = []
+        for size in (2, 8):
+            students = [
+                User.objects.create_user(f"s{size}-{i}", f"s{size}-{i}@example.com") for i in range(size)
+            ]
+            exam = self.graded_exam(students)
+            with CaptureQueriesContext(connection) as queries:
+                exam.delete()
+            counts.append(len(queries))
+            self.assert_matches_rebuild(students=students)
+            self.assertEqual(get_student_stats(students[0].id)["total_submissions"], 0)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_deleting_an_exam_keeps_other_exams_stats(self):
+        self.submit_cohort()
+        other = self.graded_exam([self.alice, self.bob])
+        other.delete()
+        self.assert_matches_rebuild([self.exam.id], [self.alice, self.bob, self.carol])
+        self.assertEqual(get_student_stats(self.alice.id)["total_submissions"], 1)
+
+    def test_deleting_a_student(self):
+        self.submit_cohort()
+        other = self.graded_exam([self.alice, self.bob])
+        self.alice.delete()
+        self.assert_matches_rebuild([self.exam.id, other.id], [self.bob, self.carol])
+        self.assertEqual(get_exam_analytics(self.exam.id)["graded_count"], 2)
 
-# Create your tests here.
+    def test_deleting_submissions(self):
+        self.submit_cohort()
+        Submission.objects.get(student=self.alice).delete()
+        Submission.objects.filter(student__in=[self.bob]).delete()
+        self.assert_matches_rebuild([self.exam.id], [self.alice, self.bob, self.carol])
+        analytics = get_exam_analytics(self.exam.id)
+        self.assertEqual((analytics["graded_count"], analytics["questions"][0]["answer_count"]), (1, 1))
@@ -6,11 +6,17 @@ from . import views
 urlpatterns = [
     #course
     path("<int:exam_id>", views.ExamView.as_view({"get" : "retrieve"}), name='exam-detail'),
+    path("<int:exam_id>/analytics", views.ExamView.as_view({"get": "analytics"}), name="exam-analytics"),
+    path("<int:exam_id>/results/export", views.ExamView.as_view({"get": "export_results"}), name="exam-results-export"),
+    path("<int:exam_id>/regrade", views.ExamView.as_view({"post": "regrade"}), name="exam-regrade"),
+    path("regrade/<int:job_id>", views.ExamView.as_view({"get": "regrade_status"}), name="regrade-status"),
     path("<int:exam_id>/questions", views.ExamView.as_view({"post": "create_questions"}), name="question"),
+    path("<int:exam_id>/questions/bulk", views.ExamView.as_view({"post": "bulk_create_questions"}), name="question-bulk"),
     # create exam
     path("create", views.ExamView.as_view({"post": "create"}), name="exam-create"),
     #create question for exam
     path("all", views.ExamView.as_view({"get": "list"}), name="exam-list"),
-    path("submissions", views.SubmissionViewSet.as_view({"get": "list"}), name="submission_view"),
+    path("submissions", views.SubmissionViewSet.as_view({"get": "list", "post": "post"}), name="submission_view"),
+    path("submissions/statistics", views.SubmissionViewSet.as_view({"get": "statistics"}), name="submission-statistics"),
     path("submissions/<int:submission_id>", views.SubmissionViewSet.as_view({"get": "retrieve_submission_answers"}), name="submission-detail"),
 ]
\ No newline at end of file
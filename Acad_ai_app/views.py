@@ -1,5 +1,11 @@
 from django.utils import timezone
-from .models import Exam, Question, Submission, SubmissionAnswer, Course
+from .models import Exam, Question, RegradeJob, Submission, SubmissionAnswer, Course
+from .analytics import get_exam_analytics
+from .exam_cache import active_exam_count, get_exam_payload, get_open_exams
+from .question_import import bulk_insert_questions, import_questions, iter_rows
+from .results_export import EXPORT_FORMATS, stream_results
+from .rows import EXAM_LIST_COLUMNS, SUBMISSION_LIST_COLUMNS, fetch_rows, lookups, rename_rows
+from .stats import get_student_stats, record_submission
 from .serializers import (
     QuestionSerializer,
     SubmissionListSerializer,
@@ -9,16 +15,25 @@ from .serializers import (
     ExamListSerializer,
     ExamCreateSerializer,
     QuestionCreateSerializer,
+    BulkQuestionCreateSerializer,
+    RegradeJobSerializer,
+    RegradeRequestSerializer,
     )
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
-from grading.keyword_grader import GradingService
+from grading.conf import grading_setting
+from grading.pipeline import GRADING_QUESTION_FIELDS, grade_submission
+from grading.regrade import create_regrade_job
 from django.db import transaction
-from utils.responses import custom_response
+from utils.pagination import KeysetPagination
+from utils.tabular import ImportFormatError, detect_format
+from utils.responses import custom_response, fast_response, prerendered_response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth.models import User
 from django.db.models import Prefetch
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import parse_etags
 from django.core.paginator import Paginator
 from django.db.models import Count, Sum, Avg, Q
 from rest_framework import viewsets
@@ -37,7 +52,10 @@ class ExamView(viewsets.ViewSet):
     """
 
     def get_permissions(self):
-        if self.action in ["create", "create_questions", "bulk_create_questions"]:
+        if self.action in [
+            "create", "create_questions", "bulk_create_questions", "analytics", "export_results",
+            "regrade", "regrade_status",
+        ]:
             permission_classes = [IsStaffUser]
         else:
             permission_classes = [IsAuthenticated]
@@ -81,11 +99,12 @@ class ExamView(viewsets.ViewSet):
 
         # Create the ONE question (you are sending only one)
         question = serializer.save(exam=exam)  # This does the job perfectly
+        exam.refresh_from_db(fields=["question_count"])
 
         response_data = {
             "exam_id": exam.id,
             "questions_created": 1,
-            "total_questions": exam.questions.count(),
+            "total_questions": exam.question_count,
             "question_id": question.id,  # nice bonus for you
             "question_text": question.text,
         }
@@ -96,53 +115,177 @@ class ExamView(viewsets.ViewSet):
             status_code=201,
         )
 
-    def list(self, request):
-        exams = (
-            self.get_queryset()
-            .only(
-                "id",
-                "title",
-                "duration_minutes",
-                "course_id",
-                "course__name",
-                "course__code",
+    def bulk_create_questions(self, request, exam_id):
+        """
+        Add many questions at once: either a JSON body {"questions": [...]},
+        validated as a whole, or a CSV/JSONL "file" upload streamed through
+        question_import, which imports the valid rows and reports the rest.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return self._bulk_create_from_body(request, exam_id)
+
+        exam = Exam.objects.only("id", "created_by_id").filter(id=exam_id).first()
+        if exam is None:
+            return custom_response(message="exam not found", success=False, status_code=404)
+        if exam.created_by_id != request.user.id and not request.user.is_superuser:
+            return custom_response(
+                message="You can only add questions to exams you created",
+                success=False,
+                status_code=403,
+            )
+
+        try:
+            fmt = detect_format(upload.name, request.query_params.get("file_format"))
+            report = import_questions(exam.id, iter_rows(upload, fmt))
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            return custom_response(message=str(e), success=False, status_code=400)
+
+        if report["created"] == 0:
+            return custom_response(
+                data=report,
+                message="No questions were imported",
+                success=False,
+                status_code=400,
+            )
+        return custom_response(
+            data=report,
+            message=f"Imported {report['created']} questions ({report['failed']} rows failed)",
+            status_code=201,
+        )
+
+    def _bulk_create_from_body(self, request, exam_id):
+        data = request.data.copy()
+        data["exam_id"] = exam_id
+        serializer = BulkQuestionCreateSerializer(data=data, context={"request": request})
+        if not serializer.is_valid():
+            return custom_response(
+                data=serializer.errors,
+                message="Validation failed",
+                success=False,
+                status_code=400,
             )
-            .select_related("course")
+
+        questions = [
+            Question(exam_id=exam_id, **question)
+            for question in serializer.validated_data["questions"]
+        ]
+        bulk_insert_questions(exam_id, questions)
+
+        return custom_response(
+            data={
+                "exam_id": exam_id,
+                "questions_created": len(questions),
+                "total_questions": Exam.objects.filter(id=exam_id)
+                .values_list("question_count", flat=True)
+                .first(),
+            },
+            message="Questions added successfully",
+            status_code=201,
         )
-        serializer = self.get_serializer_class()(exams, many=True)
+
+    def list(self, request):
+        # Plain rows straight into the envelope (see rows); same JSON as
+        # ExamListSerializer without building model instances. ?open=true
+        # narrows the list to the exams open right now, served from the
+        # in-memory snapshot (see exam_cache)
+        if request.query_params.get("open", "").lower() in ("1", "true"):
+            exams = get_open_exams().open_rows()
+        else:
+            exams = fetch_rows(self.get_queryset(), EXAM_LIST_COLUMNS)
         data = {
-            "exams": serializer.data,
-            "count": exams.count(),
+            "exams": exams,
+            "count": len(exams),
         }
-        return custom_response(data=data)
+        return fast_response(data=data)
 
     def retrieve(self, request, exam_id):
-        exam = (
-            self.get_queryset()
-            .only(
-                "id",
-                "title",
-                "duration_minutes",
-                "questions__id",
-                "questions__text",
-                "questions__marks",
-                "questions__question_type",
-                "questions__choices",
+        # The paper is pre-rendered per exam version (see exam_cache), so at
+        # exam start this is two cache lookups and a byte copy
+        cached = get_exam_payload(exam_id)
+        if cached is None:
+            return custom_response(message="exam not found", success=False, status_code=404)
+        version, payload = cached
+        count = active_exam_count()
+
+        etag = f'"{exam_id}-{version}-{count}"'
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == "*"):
+            return HttpResponseNotModified(headers={"ETag": etag})
+
+        data = b'{"exam":%s,"count":%d}' % (payload, count)
+        return prerendered_response(data, headers={"ETag": etag})
+
+    def analytics(self, request, exam_id):
+        """Score distribution and per-question rollups (see analytics)"""
+        data = get_exam_analytics(exam_id)
+        if data is None:
+            return custom_response(message="exam not found", success=False, status_code=404)
+        return custom_response(data=data, message="Exam analytics retrieved successfully")
+
+    def export_results(self, request, exam_id):
+        """
+        Stream every graded submission with its per-question marks as CSV,
+        JSONL or columnar batches (see results_export)
+        """
+        fmt = request.query_params.get("file_format", "csv").lower()
+        if fmt not in EXPORT_FORMATS:
+            return custom_response(
+                message=f"Unsupported format '{fmt}' (use {', '.join(EXPORT_FORMATS)})",
+                success=False,
+                status_code=400,
             )
-            .get(pk=exam_id)
+        if not Exam.objects.filter(id=exam_id).exists():
+            return custom_response(message="exam not found", success=False, status_code=404)
+
+        content_type, extension = EXPORT_FORMATS[fmt]
+        response = StreamingHttpResponse(stream_results(exam_id, fmt), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="exam-{exam_id}-results.{extension}"'
+        return response
+
+    def regrade(self, request, exam_id):
+        """
+        Queue a regrade of the exam's graded answers (e.g. after fixing an
+        expected_answer). Jobs run in `manage.py regrade --pending`.
+        """
+        serializer = RegradeRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return custom_response(
+                data=serializer.errors,
+                message="Validation failed",
+                success=False,
+                status_code=400,
+            )
+
+        if not Exam.objects.filter(id=exam_id).exists():
+            return custom_response(message="exam not found", success=False, status_code=404)
+
+        question_ids = set(serializer.validated_data["question_ids"])
+        unknown = question_ids - set(
+            Question.objects.filter(exam_id=exam_id, id__in=question_ids).values_list("id", flat=True)
+        )
+        if unknown:
+            return custom_response(
+                message=f"Questions {sorted(unknown)} are not part of this exam",
+                success=False,
+                status_code=400,
+            )
+
+        job = create_regrade_job(exam_id, question_ids, created_by_id=request.user.id)
+        return custom_response(
+            data=RegradeJobSerializer(job).data,
+            message="Regrade queued",
+            status_code=202,
+        )
+
+    def regrade_status(self, request, job_id):
+        job = RegradeJob.objects.filter(id=job_id).first()
+        if job is None:
+            return custom_response(message="regrade job not found", success=False, status_code=404)
+        return custom_response(
+            data=RegradeJobSerializer(job).data,
+            message="Regrade job retrieved successfully",
         )
-        if not exam:
-            return custom_response(message="exam not found", status_code=404)
-        data = {
-            "exam": {
-                "id": exam.id,
-                "title": exam.title,
-                "duration_minutes": exam.duration_minutes,
-                "questions": QuestionSerializer(exam.questions.all(), many=True).data,
-            },
-            "count": self.get_queryset().count(),
-        }
-        return custom_response(data=data)
 
     @transaction.atomic
     def create(self, request):
@@ -158,12 +301,12 @@ class ExamView(viewsets.ViewSet):
                 )
 
             # Set the creator to current user
-            exam = serializer.save(created_by=request.user)
+            exam = serializer.save(created_by_id=request.user.id)
 
             response_data = {
                 "exam_id": exam.id,
                 "title": exam.title,
-                "questions_created": exam.questions.count(),
+                "questions_created": exam.question_count,
             }
 
             return custom_response(
@@ -186,10 +329,11 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     """
 
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     http_method_names = ["get", "post", "head", "options"]
 
     def get_queryset(self):
-        return Submission.objects.filter(student=self.request.user)
+        return Submission.objects.filter(student_id=self.request.user.id)
 
     def get_serializer_class(self):
         if self.action == "retrieve":
@@ -208,25 +352,12 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status_code=400,
             )
 
-        exam_id = serializer.validated_data["exam_id"]
         answers_data = serializer.validated_data["answers"]
+        # Exam and question map loaded once during validation
+        context = serializer.validated_data["context"]
+        exam, questions = context.exam, context.questions
 
-        try:
-            # Use select_related and only() for efficiency
-            exam = (
-                Exam.objects.select_related("course")
-                .only(
-                    "id", "title", "is_active", "start_time", "end_time", "course__name"
-                )
-                .get(id=exam_id)
-            )
-
-        except Exam.DoesNotExist:
-            return custom_response(
-                message="Exam not found", success=False, status_code=404
-            )
-
-        exam_question_count = exam.questions.count()
+        exam_question_count = exam.question_count
 
         if len(answers_data) != exam_question_count:
             return custom_response(
@@ -238,7 +369,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         # Check if student already submitted (with select_for_update to prevent race)
         existing = (
             Submission.objects.select_for_update()
-            .filter(student=request.user, exam=exam)
+            .filter(student_id=request.user.id, exam=exam)
             .exists()
         )
 
@@ -251,41 +382,43 @@ class SubmissionViewSet(viewsets.ModelViewSet):
 
         # Create submission
         submission = Submission.objects.create(
-            student=request.user,
+            student_id=request.user.id,
             exam=exam,
             status="submitted",
             # submitted_at is auto-set by auto_now_add
         )
-
-        # Bulk fetch questions for validation and grading
-        question_ids = [ans["question_id"] for ans in answers_data]
-        print(">>> Question IDs:", question_ids)
-        questions = {
-            q.id: q
-            for q in Question.objects.filter(id__in=question_ids, exam=exam).only(
-                "id", "question_type", "marks", "expected_answer", "text"
-            )
-        }
+        record_submission(request.user.id)
 
         # Prepare bulk answer creation
-        answers_to_create = []
-        for answer_data in answers_data:
-            question_id = answer_data["question_id"]
-            if question_id in questions:
-                answers_to_create.append(
-                    SubmissionAnswer(
-                        submission=submission,
-                        question=questions[question_id],
-                        answer_text=answer_data["answer_text"],
-                    )
-                )
+        answers_to_create = [
+            SubmissionAnswer(
+                submission=submission,
+                question=questions[answer_data["question_id"]],
+                answer_text=answer_data["answer_text"],
+            )
+            for answer_data in answers_data
+        ]
 
         # Bulk create answers
         SubmissionAnswer.objects.bulk_create(answers_to_create)
 
+        if grading_setting("MODE") == "queued":
+            # Leave the submission as "submitted"; a grading_worker picks it up
+            # once this transaction commits
+            return custom_response(
+                data={
+                    "submission_id": submission.id,
+                    "exam_title": exam.title,
+                    "status": submission.status,
+                    "submitted_at": submission.submitted_at,
+                },
+                message="Exam submitted and queued for grading",
+                status_code=202,
+            )
+
         # Grade submission
         try:
-            self._grade_submission(submission, questions)
+            self._grade_submission(submission, questions, exam.total_marks, answers_to_create)
         except Exception as e:
             logger.error(f"Grading error for submission {submission.id}: {str(e)}")
             submission.status = "submitted"
@@ -297,13 +430,10 @@ class SubmissionViewSet(viewsets.ModelViewSet):
                 status_code=500,
             )
 
-        # Refresh and return graded submission
-        submission.refresh_from_db()
-
-        # Prepare response data
+        # Grading updated the submission in place; no need to reload it
         response_data = {
             "submission_id": submission.id,
-            "exam_title": submission.exam.title,
+            "exam_title": exam.title,
             "total_score": float(submission.total_score or 0),
             "percentage": float(submission.percentage or 0),
             "passed": submission.passed,
@@ -318,149 +448,36 @@ class SubmissionViewSet(viewsets.ModelViewSet):
             status_code=201,
         )
 
-    def _grade_submission(self, submission: Submission, questions: dict):
-        """
-        OPTIMIZED: Grade a submission using the grading service
-
-        Key optimizations:
-        1. Bulk update instead of individual saves
-        2. Single aggregation query for totals
-        3. Efficient question prefetching
-        """
-        submission.status = "grading"
-        submission.save(update_fields=["status"])
-
-        # Initialize grader
-        grader = GradingService()
-
-        # Fetch answers with related questions efficiently
-        answers = list(
-            submission.answers.select_related("question").only(
-                "id",
-                "answer_text",
-                "question__id",
-                "question__text",
-                "question__expected_answer",
-                "question__marks",
-                "question__question_type",
-            )
-        )
-
-        # Grade all answers
-        answers_to_update = []
-        for answer in answers:
-            try:
-                # Use your KeywordGrader
-                # use the id of the question related to this answer to retrieve the question
-                question_id = answer.question.id
-                question = questions[question_id]
-
-                awarded_marks, feedback, metadata = grader.grade_answer(
-                    question, answer.answer_text
-                )
-    
-                answer.awarded_marks = Decimal(str(awarded_marks))
-                answers_to_update.append(answer)
-
-            except Exception as e:
-                logger.error(f"Error grading answer {answer.id}: {str(e)}")
-                answer.awarded_marks = Decimal("0.00")
-                answers_to_update.append(answer)
-
-        # Bulk update answers
-        SubmissionAnswer.objects.bulk_update(answers_to_update, ["awarded_marks"])
-
-        # Calculate final results using aggregation (OPTIMIZED)
-        result = submission.answers.aggregate(total=Sum("awarded_marks"))
-        submission.total_score = result["total"] or Decimal("0.00")
-
-        # Calculate percentage
-        exam_total = (
-            submission.exam.questions.aggregate(total=Sum("marks"))["total"] or 0
-        )
-    
-        submission.percentage = (
-            (submission.total_score / exam_total * 100)
-            if exam_total > 0
-            else Decimal("0.00")
-        )
-
-        # Determine if passed (assuming 50% is passing)
-        submission.passed = submission.percentage >= 50
-
-        # Update status and timestamps
-        submission.status = "graded"
-        submission.graded_at = timezone.now()
-
-        submission.save(
-            update_fields=["total_score", "percentage", "passed", "status", "graded_at"]
-        )
+    def _grade_submission(self, submission: Submission, questions: dict, exam_total: int,
+                          answers: list):
+        """Grade a submission in-request (see grading.pipeline.grade_submission)"""
+        grade_submission(submission, questions, exam_total, answers)
 
     def list(self, request):
-        queryset = (
-            self.get_queryset()
-            .select_related("exam", "exam__course")
-            .only(
-                "id",
-                "status",
-                "submitted_at",
-                "total_score",
-                "percentage",
-                "passed",
-                "graded_at",
-                "feedback",
-                "student_id",
-                "exam_id",
-                "exam__id",
-                "exam__title",
-                "exam__course_id",
-                "exam__course__id",
-                "exam__course__name",
-                "exam__course__code",
-            )
-            .order_by("-submitted_at")
-        )
-
-        stats = queryset.aggregate(
-            total_submissions=Count("id"),
-            grand_total_score=Sum("total_score"),
-            average_percentage=Avg("percentage"),
-            passed_count=Count("id", filter=Q(passed=True)),
-            graded_count=Count("id", filter=Q(status="graded")),
-        )
-
-        serializer = self.get_serializer(queryset, many=True)
-
-        # Safe stats calculations
-        graded_count = stats["graded_count"] or 0
+        """
+        One page of the student's submissions, newest first. Pages are keyset
+        paginated on (submitted_at, id); follow `next_cursor` for older ones.
+        Statistics are served by the `statistics` action.
+        """
+        queryset = self.get_queryset().values(*lookups(SUBMISSION_LIST_COLUMNS))
 
-        pass_rate = (
-            round((stats["passed_count"] / graded_count) * 100, 2)
-            if graded_count > 0
-            else 0.0
-        )
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, request, view=self)
 
-        # Return with your custom response format
-        return custom_response(
-            data={
-                "submissions": serializer.data,  # ← Now uses SubmissionListSerializer
-                "statistics": {
-                    "total_submissions": stats["total_submissions"] or 0,
-                    "exam_grand_score": float(stats["grand_total_score"] or 0),
-                    "average_percentage": round(
-                        float(stats["average_percentage"] or 0), 2
-                    ),
-                    "passed_count": stats["passed_count"] or 0,
-                    "graded_count": graded_count,
-                    "pass_rate": pass_rate,
-                },
-            },
+        return fast_response(
+            data=paginator.get_paginated_data(rename_rows(page, SUBMISSION_LIST_COLUMNS)),
             message=(
                 "User submissions retrieved successfully"
-                if queryset.exists()
+                if page or request.query_params.get(paginator.cursor_query_param)
                 else "No submissions found yet"
             ),
-            status_code=200,
+        )
+
+    def statistics(self, request):
+        """Running totals kept up to date by the grading pipeline (see stats)"""
+        return custom_response(
+            data=get_student_stats(request.user.id),
+            message="Submission statistics retrieved successfully",
         )
     
     def retrieve_submission_answers(self, request, submission_id):
@@ -471,7 +488,7 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         try:
             submission = (
                 Submission.objects
-                .filter(student=request.user)  # Security: only own submissions
+                .filter(student_id=request.user.id)  # Security: only own submissions
                 .select_related('exam', 'exam__course')
                 .prefetch_related(
                     Prefetch(
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AuthConfig(AppConfig):
     name = 'auth_app'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
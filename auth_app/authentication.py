@@ -0,0 +1,139 @@
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from grading.cache import LRUCache
+
+# Full user rows, for the rare request that needs more than the claims
+USER_CACHE_TIMEOUT = 30
+_users = LRUCache(1024)
+
+# When a user's claims last changed; tokens issued before then are refused
+REVOKED_KEY = "auth:revoked:{user_id}"
+
+# Cache backends private to one process: a revocation stored there would not
+# reach the other workers
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def get_cached_user(user_id):
+    """
+    The user row, cached per process for USER_CACHE_TIMEOUT seconds. Each
+    caller gets its own copy, so changes to it are not shared.
+    """
+    entry = _users.get(user_id)
+    now = time.monotonic()
+    if entry is None or entry[0] < now:
+        user = get_user_model().objects.get(pk=user_id)
+        entry = (now + USER_CACHE_TIMEOUT, user)
+        _users.set(user_id, entry)
+    return copy.copy(entry[1])
+
+
+def revocation_is_shared() -> bool:
+    """Whether revoke_tokens reaches every process (see auth_app.checks)"""
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+def revoke_tokens(user_id):
+    """
+    Refuse the user's access tokens issued so far (their claims are stale).
+    Called when a claim changes (see auth_app.signals); queryset updates
+    that change claims must call it themselves. The marker only has to
+    outlive the tokens it refuses. Tokens issued within the same second are
+    refused too, since "iat" has one-second resolution.
+    """
+    cache.set(
+        REVOKED_KEY.format(user_id=user_id),
+        time.time(),
+        timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()) + 1,
+    )
+
+
+class TokenPrincipal(TokenUser):
+    """
+    request.user built from the access token's claims (see
+    auth_app.tokens.USER_CLAIMS). Anything the token does not carry is read
+    from the cached user row, so code written against the User model keeps
+    working; filter and assign by request.user.id rather than the object.
+    """
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the user id claim as a string
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def is_active(self):
+        return self.token.get("is_active", True)
+
+    @cached_property
+    def user_type(self):
+        return self.token.get("user_type")
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+    def is_staff_user(self):
+        return self.user_type == "staff"
+
+    def is_student_user(self):
+        return self.user_type == "student"
+
+    @cached_property
+    def _user(self):
+        return get_cached_user(self.id)
+
+    def get_user(self):
+        """The cached user row, loaded once per principal"""
+        return self._user
+
+    def __getattr__(self, attr):
+        if attr in self.token:
+            return self.token[attr]
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self.get_user(), attr)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the user claims in the (signed) access
+    token instead of loading the user row on every request. Tokens issued
+    before the user's claims last changed are refused (revoke_tokens), at
+    the cost of one cache read.
+
+    Revocations need a cache shared by every process. With a process-local
+    one (the default LocMemCache) claims are not trusted and every request
+    loads the user row, like tokens issued before the claims existed.
+    """
+
+    def get_user(self, validated_token):
+        if "user_type" not in validated_token or not revocation_is_shared():
+            return super().get_user(validated_token)
+
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken("Token contained no recognizable user identification")
+        if api_settings.CHECK_USER_IS_ACTIVE and not validated_token.get("is_active", True):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        revoked_at = cache.get(REVOKED_KEY.format(user_id=validated_token[api_settings.USER_ID_CLAIM]))
+        if revoked_at is not None and validated_token.get("iat", 0) < revoked_at:
+            raise AuthenticationFailed("Token has been revoked", code="token_revoked")
+        return TokenPrincipal(validated_token)
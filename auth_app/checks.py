@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .authentication import revocation_is_shared
+
+CLAIMS_AUTHENTICATION = "auth_app.authentication.ClaimsJWTAuthentication"
+
+
+@register(Tags.security)
+def check_claims_revocation(app_configs, **kwargs):
+    """Claims authentication needs a shared cache to see token revocations"""
+    classes = getattr(settings, "REST_FRAMEWORK", {}).get("DEFAULT_AUTHENTICATION_CLASSES", ())
+    if CLAIMS_AUTHENTICATION not in classes or revocation_is_shared():
+        return []
+    return [
+        Warning(
+            "ClaimsJWTAuthentication is loading the user row on every request: "
+            "the default cache is local to each process, so a token revocation "
+            "would not reach the other workers.",
+            hint="Configure a shared CACHES['default'] backend (e.g. Redis) to "
+                 "authenticate from the token claims.",
+            id="auth_app.W001",
+        )
+    ]
@@ -0,0 +1,20 @@
+from django.conf import settings
+
+
+DEFAULTS = {
+    # Threads verifying login passwords, per process; defaults to the
+    # number of CPUs
+    "HASH_WORKERS": None,
+    # Logins allowed to wait for a free hashing thread; beyond that new
+    # logins are turned away with 503 straight away
+    "HASH_QUEUE": 32,
+    # Seconds a login waits for its password check before giving up (503)
+    "HASH_TIMEOUT": 5.0,
+    # Retry-After (seconds) sent with those 503 responses
+    "RETRY_AFTER": 2,
+}
+
+
+def login_setting(name):
+    """Read a LOGIN setting, falling back to the default"""
+    return getattr(settings, "LOGIN", {}).get(name, DEFAULTS[name])
@@ -0,0 +1,90 @@
+"""
+Password verification for logins on a bounded thread pool.
+
+At exam start thousands of students log in within a minute and each login
+costs a deliberately slow password hash. Running those checks on a fixed
+number of threads (hashlib releases the GIL while hashing, so they run in
+parallel) with a bounded number of waiting logins keeps hashing from
+starving every worker: once the pool is full, further logins fail fast with
+HashingPoolBusy and the client is told to retry.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher
+
+from utils.metrics import registry
+from .conf import login_setting
+
+
+class HashingPoolBusy(Exception):
+    """The login was not verified because the hashing pool is saturated"""
+
+
+class PasswordCheckPool:
+    def __init__(self, workers=None, queue_size=32, timeout=5.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        # Checks running plus checks waiting for a thread
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="password-check"
+        )
+
+    def check(self, raw_password, encoded) -> bool:
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolBusy("Too many logins in progress")
+        try:
+            future = self._executor.submit(check_password, raw_password, encoded)
+        except BaseException:
+            self._slots.release()
+            raise
+        # The slot is freed when the check finishes, even if the request
+        # stopped waiting for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashingPoolBusy("Password check timed out")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PasswordCheckPool:
+    # Created on first use, i.e. after gunicorn has forked its workers
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordCheckPool(
+                    workers=login_setting("HASH_WORKERS"),
+                    queue_size=login_setting("HASH_QUEUE"),
+                    timeout=login_setting("HASH_TIMEOUT"),
+                )
+    return _pool
+
+
+def _needs_rehash(encoded) -> bool:
+    preferred = get_hasher("default")
+    return identify_hasher(encoded).algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify_password(user, raw_password) -> bool:
+    """
+    user.check_password() on the pool. Raises HashingPoolBusy when the pool
+    is saturated. Like check_password(), upgrades outdated hashes on success.
+    """
+    started = time.perf_counter()
+    try:
+        valid = get_pool().check(raw_password, user.password)
+    finally:
+        registry.observe("login.password_check_ms", (time.perf_counter() - started) * 1000)
+
+    if valid and _needs_rehash(user.password):
+        user.set_password(raw_password)
+        user.save(update_fields=["password"])
+    return valid
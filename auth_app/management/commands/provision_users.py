@@ -0,0 +1,57 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app.provisioning import init_hashing_worker, provision_users
+from utils.tabular import IMPORT_FORMATS, ImportFormatError, detect_format, iter_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Create accounts from a CSV or JSONL roster (username, email, password, "
+        "optional user_type), hashing passwords in parallel"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL roster")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, default=None,
+                            help="File format (default: from the file extension)")
+        parser.add_argument("--executor", choices=("process", "thread"), default="process",
+                            help="Where passwords are hashed")
+        parser.add_argument("--workers", type=int, default=None,
+                            help="Hashing workers (default: number of CPUs)")
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        workers = options["workers"] or os.cpu_count() or 1
+        if options["executor"] == "process":
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=init_hashing_worker)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="provisioning")
+
+        try:
+            fmt = detect_format(options["path"], options["format"])
+            with executor, open(options["path"], "rb") as fileobj:
+                report = provision_users(
+                    iter_rows(fileobj, fmt),
+                    executor=executor,
+                    chunk_size=options["chunk_size"],
+                    allow_staff=True,
+                    progress=self._progress,
+                )
+        except (ImportFormatError, OSError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        for error in report["errors"]:
+            self.stderr.write(f"  line {error['line']}: {error['errors']}")
+        if report["errors_truncated"]:
+            self.stderr.write("  (further errors not shown)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} of {report['rows']} accounts "
+            f"({report['duplicates']} duplicates, {report['failed']} failed in total)"
+        ))
+
+    def _progress(self, report):
+        self.stdout.write(f"  {report['rows']} rows read, {report['created']} accounts created")
@@ -1,6 +1,7 @@
 # models.py
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Upper
 
 
 class CustomUserManager(BaseUserManager):
@@ -71,6 +72,8 @@ class User(AbstractUser):
         ordering = ['-date_joined']
         indexes = [
             models.Index(fields=['user_type', 'is_active']),
+            # Case-insensitive login lookups (email__iexact)
+            models.Index(Upper('email'), name='auth_user_email_upper_idx'),
         ]
     
     def __str__(self):
@@ -0,0 +1,188 @@
+"""
+Bulk account provisioning from CSV or JSONL rosters.
+
+Rows (username, email, password, optional user_type) are read with
+utils.tabular and handled a chunk at a time: validated, checked for
+usernames and emails already taken (in the database or earlier in the
+roster), hashed in parallel and inserted with bulk_create. Each account is
+hashed once and written once. The API only takes rosters of up to
+MAX_API_ROWS rows.
+
+Password hashing dominates the cost (it is deliberately slow), so it is
+spread over an executor: the management command uses a process pool, the
+API a thread pool (PBKDF2, Argon2 and bcrypt release the GIL while
+hashing, and a web worker should not fork).
+"""
+import os
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+from rest_framework import serializers
+
+from utils.tabular import Row
+
+User = get_user_model()
+
+PROVISION_CHUNK_SIZE = 1000
+
+# Largest roster the API provisions within a request; hashing takes a
+# fraction of a second per account, so bigger rosters go through the
+# provision_users command
+MAX_API_ROWS = 100
+
+# Per-row errors kept in the report; the counts cover every row
+MAX_REPORTED_ERRORS = 500
+
+USERNAME_TAKEN = "A user with this username already exists."
+EMAIL_TAKEN = "A user with this email already exists."
+
+
+class RosterRowSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField()
+    password = serializers.CharField(trim_whitespace=False)
+    user_type = serializers.ChoiceField(choices=["student", "staff"], default="student")
+
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+    def validate_user_type(self, value):
+        if value == "staff" and not self.context.get("allow_staff"):
+            raise serializers.ValidationError("Only superusers can provision staff accounts.")
+        return value
+
+
+def init_hashing_worker():
+    """Process pool initializer: configure Django (needed with spawn)"""
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AcadAI_Project.settings")
+        django.setup()
+
+
+def hash_passwords(passwords: List[str], executor: Optional[Executor]) -> List[str]:
+    if executor is None or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    # A few tasks per CPU keeps every worker busy without per-password IPC
+    chunksize = max(1, len(passwords) // ((os.cpu_count() or 1) * 4))
+    return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+def provision_users(rows: Iterable[Row], executor: Optional[Executor] = None,
+                    chunk_size: Optional[int] = None, allow_staff: bool = False,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Create accounts for the roster rows. Returns a report of row counts and
+    per-row errors; rows with errors (including duplicates) are skipped.
+    """
+    chunk_size = chunk_size or PROVISION_CHUNK_SIZE
+    report = {
+        "rows": 0,
+        "created": 0,
+        "failed": 0,
+        "duplicates": 0,
+        "errors": [],
+        "errors_truncated": False,
+    }
+    # Usernames (as typed) and lower-cased emails seen earlier in the roster
+    seen = {"username": set(), "email": set()}
+    serializer = RosterRowSerializer(context={"allow_staff": allow_staff})
+
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            _provision_chunk(chunk, report, seen, serializer, executor, chunk_size)
+            chunk = []
+            if progress:
+                progress(report)
+    if chunk:
+        _provision_chunk(chunk, report, seen, serializer, executor, chunk_size)
+        if progress:
+            progress(report)
+    return report
+
+
+def _record_error(report: Dict, line_number: int, errors, duplicate: bool = False):
+    report["failed"] += 1
+    if duplicate:
+        report["duplicates"] += 1
+    if len(report["errors"]) < MAX_REPORTED_ERRORS:
+        report["errors"].append({"line": line_number, "errors": errors})
+    else:
+        report["errors_truncated"] = True
+
+
+def _provision_chunk(chunk: List[Row], report: Dict, seen: Dict, serializer,
+                     executor: Optional[Executor], batch_size: int):
+    valid = []
+    for line_number, data, errors in chunk:
+        report["rows"] += 1
+        if errors is None:
+            try:
+                valid.append((line_number, serializer.run_validation(data)))
+                continue
+            except serializers.ValidationError as exc:
+                errors = exc.detail
+        _record_error(report, line_number, errors)
+
+    # Usernames are unique as typed; emails are compared case-insensitively
+    taken_usernames = set(
+        User.objects.filter(username__in=[data["username"] for _, data in valid])
+        .values_list("username", flat=True)
+    )
+    taken_emails = set(
+        User.objects.annotate(email_upper=Upper("email"))
+        .filter(email_upper__in=[data["email"].upper() for _, data in valid])
+        .values_list("email_upper", flat=True)
+    )
+
+    accepted = []
+    for line_number, data in valid:
+        username, email = data["username"], data["email"].lower()
+        errors = {}
+        if username in taken_usernames or username in seen["username"]:
+            errors["username"] = [USERNAME_TAKEN]
+        if data["email"].upper() in taken_emails or email in seen["email"]:
+            errors["email"] = [EMAIL_TAKEN]
+        if errors:
+            _record_error(report, line_number, errors, duplicate=True)
+            continue
+        seen["username"].add(username)
+        seen["email"].add(email)
+        accepted.append((line_number, data))
+
+    if not accepted:
+        return
+
+    hashes = hash_passwords([data["password"] for _, data in accepted], executor)
+    users = [
+        User(
+            username=data["username"],
+            email=data["email"],
+            user_type=data["user_type"],
+            password=password_hash,
+        )
+        for (_, data), password_hash in zip(accepted, hashes)
+    ]
+    try:
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=batch_size)
+        report["created"] += len(users)
+    except IntegrityError:
+        # Someone registered one of these names since the check; insert one
+        # by one so only the conflicting rows fail
+        for (line_number, data), user in zip(accepted, users):
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                report["created"] += 1
+            except IntegrityError:
+                _record_error(report, line_number, {"username": [USERNAME_TAKEN]}, duplicate=True)
@@ -1,11 +1,19 @@
 # exams/serializers.py  (or create accounts/serializers.py if separate app)
 
+import time
+
 from rest_framework import serializers
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 
+from utils.metrics import registry
+from .hashing import verify_password
+from .tokens import USER_CLAIMS, ClaimsRefreshToken
+
 User = get_user_model()
 
+# What a login reads from the user row: the password hash and token claims
+LOGIN_USER_FIELDS = ("id", "password", *USER_CLAIMS)
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, style={'input_type': 'password'})
@@ -29,14 +37,13 @@ class RegisterSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         print("Validated Data:", validated_data)
         validated_data.pop('password2')
+        # create_user hashes the password and inserts the row in one go
         user = User.objects.create_user(
             username=validated_data['username'],
             email=validated_data.get('email', ''),
+            password=validated_data["password"],
             user_type= validated_data["user_type"]  # default user type as student
         )
-    
-        user.set_password(validated_data["password"])
-        user.save()
         return user
 
     # Override to return JWT tokens immediately after registration
@@ -56,15 +63,11 @@ class GetUserSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', "user_type")
 
     def get_user(self, obj):
-        user = User.objects.get(id=obj.id)
-        if user.is_anonymous:
+        # obj is request.user (a User or a token principal); no need to
+        # fetch the row again
+        if obj.is_anonymous:
             raise serializers.ValidationError({"you are not signed in"})
-        return {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            "user_type": user.user_type,
-        }
+        return self.to_representation(obj)
 
 
     def to_representation(self, instance):
@@ -83,17 +86,23 @@ class LoginUserSerializer(serializers.ModelSerializer):
         read_only_fields = ['password']
 
     def validate_user(self, data):
-        try:
-            user = User.objects.get(email = data["email"])
-        except User.DoesNotExist:
+        started = time.perf_counter()
+        # Case-insensitive match, served by the Upper(email) index
+        user = (
+            User.objects.filter(email__iexact=(data.get("email") or "").strip())
+            .only(*LOGIN_USER_FIELDS)
+            .order_by("id")
+            .first()
+        )
+        registry.observe("login.lookup_ms", (time.perf_counter() - started) * 1000)
+        if user is None:
             raise serializers.ValidationError({"User with this email does not exist"})
-        if not user:
-            raise serializers.ValidationError({"Invalid email or password"})
         password = data.get("password")
-        if not user.check_password(password):
+        # Runs on the bounded hashing pool; raises HashingPoolBusy when full
+        if not verify_password(user, password) or not user.is_active:
             raise serializers.ValidationError({"Invalid email or password"})
-        refresh = RefreshToken.for_user(user)
-        return {
+        refresh = ClaimsRefreshToken.for_user(user)
+        response = {
             "user": {
              'id': user.id,
             'username': user.username,
@@ -103,4 +112,6 @@ class LoginUserSerializer(serializers.ModelSerializer):
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
             }
-        }
\ No newline at end of file
+        }
+        registry.observe("login.total_ms", (time.perf_counter() - started) * 1000)
+        return response
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .authentication import revoke_tokens
+from .tokens import USER_CLAIMS
+
+User = get_user_model()
+
+
+@receiver(pre_save, sender=User)
+def note_claim_changes(sender, instance, update_fields=None, **kwargs):
+    """Compare the claims carried by tokens with the row about to be overwritten"""
+    if instance._state.adding:
+        return
+    if update_fields is not None and not set(update_fields) & set(USER_CLAIMS):
+        return
+    previous = sender.objects.filter(pk=instance.pk).values(*USER_CLAIMS).first()
+    instance._claims_changed = previous is not None and any(
+        previous[claim] != getattr(instance, claim) for claim in USER_CLAIMS
+    )
+
+
+@receiver(post_save, sender=User)
+def revoke_stale_tokens(sender, instance, created, **kwargs):
+    if instance.__dict__.pop("_claims_changed", False):
+        transaction.on_commit(lambda: revoke_tokens(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    # delete() clears instance.pk
+    user_id = instance.pk
+    transaction.on_commit(lambda: revoke_tokens(user_id))
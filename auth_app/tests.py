@@ -1,3 +1,220 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .authentication import REVOKED_KEY, TokenPrincipal
+from .checks import check_claims_revocation
+from .provisioning import EMAIL_TAKEN, MAX_API_ROWS, USERNAME_TAKEN, provision_users
+from .tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+
+def roster(*users):
+    """Roster rows as utils.tabular yields them, numbered from line 1"""
+    return [(line, data, None) for line, data in enumerate(users, start=1)]
+
+
+def account(username, email=None, password="s3cret-pass", **fields):
+    return {"username": username, "email": email or f"{username}@example.com", "password": password, **fields}
+
+
+# Hashing is deliberately slow; these tests are about the bookkeeping
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionUsersTests(TestCase):
+    def setUp(self):
+        User.objects.create_user("taken", "Taken@Example.com", "s3cret-pass")
+
+    def test_duplicates_are_reported_and_skipped(self):
+        rows = roster(
+            account("ada"),
+            account("taken", "other@example.com"),          # existing username
+            account("alan", "TAKEN@example.com"),           # existing email, other case
+            account("ada", "ada2@example.com"),             # username earlier in the roster
+            account("grace", "ADA@example.com"),            # email earlier in the roster
+            account("taken", "ada@example.com"),            # both
+            account("linus"),
+        )
+        # Chunks of two, so roster duplicates span chunks
+        report = provision_users(rows, chunk_size=2)
+
+        self.assertEqual(
+            {key: report[key] for key in ("rows", "created", "failed", "duplicates")},
+            {"rows": 7, "created": 2, "failed": 5, "duplicates": 5},
+        )
+        self.assertEqual(report["errors"], [
+            {"line": 2, "errors": {"username": [USERNAME_TAKEN]}},
+            {"line": 3, "errors": {"email": [EMAIL_TAKEN]}},
+            {"line": 4, "errors": {"username": [USERNAME_TAKEN]}},
+            {"line": 5, "errors": {"email": [EMAIL_TAKEN]}},
+            {"line": 6, "errors": {"username": [USERNAME_TAKEN], "email": [EMAIL_TAKEN]}},
+        ])
+        self.assertEqual(
+            set(User.objects.values_list("username", flat=True)), {"taken", "ada", "linus"}
+        )
+        self.assertTrue(User.objects.get(username="ada").check_password("s3cret-pass"))
+
+    def test_invalid_rows_are_not_duplicates(self):
+        rows = roster(account("ada", "not-an-email"), account("boss", user_type="staff"))
+        rows.append((3, None, {"non_field_errors": ["Expected a JSON object"]}))
+        report = provision_users(rows)
+        self.assertEqual((report["created"], report["failed"], report["duplicates"]), (0, 3, 0))
+        self.assertEqual([error["line"] for error in report["errors"]], [1, 2, 3])
+
+    def test_staff_rows_with_allow_staff(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            report = provision_users(
+                roster(account("boss", user_type="staff"), account("ada")),
+                executor=executor, allow_staff=True,
+            )
+        self.assertEqual(report["created"], 2)
+        self.assertEqual(User.objects.get(username="boss").user_type, "staff")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ProvisionUsersViewTests(TestCase):
+    url = reverse("provision_users_view")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            User.objects.create_user("staff", "staff@example.com", "s3cret-pass", user_type="staff")
+        )
+
+    def test_json_roster(self):
+        response = self.client.post(
+            self.url, {"users": [account("ada"), account("staff"), "ada"]}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.json()["data"]
+        self.assertEqual((data["created"], data["failed"], data["duplicates"]), (1, 2, 1))
+
+    def test_csv_upload(self):
+        upload = SimpleUploadedFile(
+            "roster.csv", b"username,email,password\nada,ada@example.com,s3cret-pass\n"
+        )
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.filter(username="ada").exists())
+
+    def test_only_duplicates_is_a_bad_request(self):
+        response = self.client.post(self.url, {"users": [account("staff")]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["data"]["duplicates"], 1)
+
+    def test_large_rosters_are_refused(self):
+        users = [account(f"student{i}") for i in range(MAX_API_ROWS + 1)]
+        response = self.client.post(self.url, {"users": users}, format="json")
+        self.assertEqual(response.status_code, 413)
+        self.assertIn("provision_users", response.json()["message"])
+        self.assertEqual(User.objects.count(), 1)
+
+        response = self.client.post(self.url, {"users": users[:MAX_API_ROWS]}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_students_cannot_provision(self):
+        self.client.force_authenticate(User.objects.create_user("ada", "ada@example.com", "s3cret-pass"))
+        response = self.client.post(self.url, {"users": [account("alan")]}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+
+# Shared between processes, unlike the default LocMemCache
+SHARED_CACHE = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "acadai-auth-tests"),
+    }
+}
+
+
+@override_settings(CACHES=SHARED_CACHE)
+class TokenRevocationTests(TestCase):
+    url = reverse("get_user_view")
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username):
+        """A new user and a client holding an access token for them"""
+        user = User.objects.create_user(username, f"{username}@example.com", "s3cret-pass")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(user).access_token}")
+        self.assertEqual(client.get(self.url).status_code, 200)
+        return user, client
+
+    def save(self, user, **fields):
+        for field, value in fields.items():
+            setattr(user, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_changed_claims_revoke_tokens(self):
+        for field, value in (("is_active", False), ("user_type", "staff"), ("email", "other@example.org")):
+            with self.subTest(field=field):
+                user, client = self.login(field)
+                self.save(user, **{field: value})
+                self.assertEqual(client.get(self.url).status_code, 401)
+
+    def test_tokens_issued_after_the_change_are_accepted(self):
+        user, client = self.login("ada")
+        self.save(user, user_type="staff")
+        # As if the new token was issued a few seconds later
+        cache.set(REVOKED_KEY.format(user_id=user.id), time.time() - 5)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(user).access_token}")
+        response = client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["user_type"], "staff")
+
+    def test_other_fields_keep_tokens(self):
+        user, client = self.login("ada")
+        # Logins update last_login; that must not even look at the old row
+        with self.assertNumQueries(1):
+            user.last_login = user.date_joined
+            user.save(update_fields=["last_login"])
+        self.save(user, first_name="Ada", password="changed")
+        self.assertEqual(client.get(self.url).status_code, 200)
+
+    def test_deleting_the_user_revokes_tokens(self):
+        user, client = self.login("ada")
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertEqual(client.get(self.url).status_code, 401)
+
+    def test_principal_loads_the_user_once(self):
+        user = User.objects.create_user("ada", "ada@example.com", "s3cret-pass")
+        principal = TokenPrincipal(ClaimsRefreshToken.for_user(user).access_token)
+        with mock.patch("auth_app.authentication.get_cached_user", return_value=user) as get_cached_user:
+            self.assertEqual((principal.first_name, principal.last_name, principal.date_joined),
+                             (user.first_name, user.last_name, user.date_joined))
+            self.assertIs(principal.get_user(), principal.get_user())
+        get_cached_user.assert_called_once_with(user.id)
+
+
+class ProcessLocalCacheTests(TestCase):
+    """Without a shared cache, claims are not trusted (revocations could not propagate)"""
+
+    def test_user_row_is_read_on_every_request(self):
+        user = User.objects.create_user("ada", "ada@example.com", "s3cret-pass")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(user).access_token}")
+        # Changed in another process: no revocation reaches this one
+        User.objects.filter(pk=user.pk).update(user_type="staff")
+        response = client.get(reverse("get_user_view"))
+        self.assertEqual(response.json()["data"]["user_type"], "staff")
+
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        self.assertEqual(client.get(reverse("get_user_view")).status_code, 401)
+
+    def test_system_check_warns(self):
+        self.assertEqual([warning.id for warning in check_claims_revocation(None)], ["auth_app.W001"])
+        with override_settings(CACHES=SHARED_CACHE):
+            self.assertEqual(check_claims_revocation(None), [])
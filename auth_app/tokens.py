@@ -0,0 +1,20 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Copied from the user into every token, so ClaimsJWTAuthentication can
+# build request.user without reading the user row
+USER_CLAIMS = ("username", "email", "user_type", "is_active", "is_staff", "is_superuser")
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose claims (and those of the access tokens derived from
+    it) describe the user. Saving a change to any of these claims revokes
+    the user's outstanding tokens (see authentication.revoke_tokens).
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
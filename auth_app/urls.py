@@ -4,5 +4,6 @@ from . import views
 urlpatterns = [
     path("register", views.RegisterView.as_view(), name="register_view"),
     path("login", views.LoginUserView.as_view(), name= "login_user_view"),
+    path("provision", views.ProvisionUsersView.as_view(), name="provision_users_view"),
     path("", views.GetUserView.as_view(), name="get_user_view")
 ]
\ No newline at end of file
@@ -3,7 +3,15 @@ from rest_framework import status
 from  .serializers import RegisterSerializer, GetUserSerializer, LoginUserSerializer
 from rest_framework.views import APIView
 from utils.responses import custom_response
+from .conf import login_setting
+from .hashing import HashingPoolBusy
 from rest_framework.permissions import IsAuthenticated
+from concurrent.futures import ThreadPoolExecutor
+import os
+from itertools import islice
+from Acad_ai_app.permissions import IsStaffUser
+from utils.tabular import ImportFormatError, detect_format, iter_rows
+from .provisioning import MAX_API_ROWS, provision_users
 
 # Create your views here.
 class RegisterView(APIView):
@@ -47,7 +55,17 @@ class LoginUserView(APIView):
     def post(self, request):
         serializer = LoginUserSerializer(data= request.data)
         if serializer.is_valid():
-            valid_user = serializer.validate_user(request.data)
+            try:
+                valid_user = serializer.validate_user(request.data)
+            except HashingPoolBusy:
+                # Shed the login storm instead of queueing behind the CPU
+                response = custom_response(
+                    message="Too many logins right now, please try again shortly",
+                    success=False,
+                    status_code=503,
+                )
+                response["Retry-After"] = str(login_setting("RETRY_AFTER"))
+                return response
             return custom_response(data=valid_user, message="User Login Successful")
         raise APIException("something went wrong")
 
@@ -57,6 +75,69 @@ class GetUserView(APIView):
         if request.user is NotAuthenticated:
             return NotAuthenticated("Please Login to perform this action")
         serializer = GetUserSerializer(request.user)
-        user = serializer.get_user(request.user)
         return custom_response(data=serializer.data, status_code=status.HTTP_200_OK, message="User fetched successfully")
-    
\ No newline at end of file
+    
+
+class ProvisionUsersView(APIView):
+    """
+    Create accounts in bulk from a CSV/JSONL roster upload ("file") or a
+    JSON body {"users": [...]} of at most MAX_API_ROWS rows. Only
+    superusers may provision staff.
+    """
+    permission_classes = [IsStaffUser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        try:
+            if upload is not None:
+                fmt = detect_format(upload.name, request.query_params.get("file_format"))
+                rows = iter_rows(upload, fmt)
+            else:
+                users = request.data.get("users")
+                if not isinstance(users, list) or not users:
+                    return custom_response(
+                        message="Upload a roster file or send a non-empty users list",
+                        success=False,
+                        status_code=400,
+                    )
+                rows = (
+                    (line, row, None) if isinstance(row, dict)
+                    else (line, None, {"non_field_errors": ["Expected a JSON object"]})
+                    for line, row in enumerate(users, start=1)
+                )
+
+            # Hashing runs in the request, so larger rosters are refused
+            # before any work is done
+            rows = list(islice(rows, MAX_API_ROWS + 1))
+            if len(rows) > MAX_API_ROWS:
+                return custom_response(
+                    message=(
+                        f"Rosters over {MAX_API_ROWS} rows must be provisioned with "
+                        "`manage.py provision_users`"
+                    ),
+                    success=False,
+                    status_code=413,
+                )
+
+            # Threads, not processes: hashing releases the GIL and a web
+            # worker should not fork
+            with ThreadPoolExecutor(max_workers=os.cpu_count() or 1,
+                                    thread_name_prefix="provisioning") as executor:
+                report = provision_users(
+                    rows, executor=executor, allow_staff=request.user.is_superuser
+                )
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            return custom_response(message=str(e), success=False, status_code=400)
+
+        if report["created"] == 0:
+            return custom_response(
+                data=report,
+                message="No accounts were created",
+                success=False,
+                status_code=400,
+            )
+        return custom_response(
+            data=report,
+            message=f"Created {report['created']} accounts ({report['failed']} rows failed)",
+            status_code=201,
+        )
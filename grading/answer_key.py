@@ -0,0 +1,118 @@
+"""
+Compiled answer keys for objective (MCQ and true/false) questions.
+
+An AnswerKey is built once from an exam's questions. Each question gets a
+lookup from normalized answer text to a choice code plus the code of the
+correct choice, so grading an answer is one dict lookup and a whole
+submission's (or cohort's) objective answers are marked with a single
+array comparison.
+
+Answers and expected answers are resolved against Question.choices the
+same way: by choice text first, then by option letter ("b" is the second
+choice). An expected answer that matches no choice keeps its own code, so
+answering it verbatim is still correct.
+"""
+import string
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from grading.cache import normalize_answer
+
+OBJECTIVE_TYPES = ("mcq", "true_false")
+
+CORRECT_FEEDBACK = "Correct!"
+INCORRECT_FEEDBACK = "Incorrect. The correct answer is: {answer}"
+
+# Code of answers that match neither a choice nor the expected answer
+NO_MATCH = -1
+
+
+def _question_key(question):
+    return question.id if question.id is not None else id(question)
+
+
+def compile_question(question) -> Tuple[Dict[str, int], int, str]:
+    """
+    (lookup, correct code, correct answer as shown in feedback) for one
+    objective question
+    """
+    choices = [str(choice) for choice in question.choices or []]
+    lookup: Dict[str, int] = {}
+    for code, choice in enumerate(choices):
+        lookup.setdefault(normalize_answer(choice), code)
+    # Option letters, unless a choice is literally that letter
+    for code, letter in zip(range(len(choices)), string.ascii_lowercase):
+        lookup.setdefault(letter, code)
+
+    expected = normalize_answer(question.expected_answer or "")
+    correct = lookup.get(expected)
+    if correct is None:
+        correct = len(choices)
+        lookup[expected] = correct
+        display = question.expected_answer
+    else:
+        display = choices[correct]
+    return lookup, correct, display
+
+
+class AnswerKey:
+    """Correct choices and marks of a set of objective questions"""
+
+    def __init__(self, questions: Iterable):
+        self._rows: Dict[object, int] = {}
+        self._lookups: List[Dict[str, int]] = []
+        correct, marks = [], []
+        self._feedback: List[str] = []
+
+        for question in questions:
+            if question.question_type not in OBJECTIVE_TYPES:
+                continue
+            lookup, code, display = compile_question(question)
+            self._rows[_question_key(question)] = len(self._lookups)
+            self._lookups.append(lookup)
+            correct.append(code)
+            marks.append(float(question.marks))
+            self._feedback.append(INCORRECT_FEEDBACK.format(answer=display))
+
+        self.correct = np.array(correct, dtype=np.int64)
+        self.marks = np.array(marks, dtype=float)
+
+    def __contains__(self, question) -> bool:
+        return _question_key(question) in self._rows
+
+    def __len__(self):
+        return len(self._lookups)
+
+    def grade(self, pairs: Sequence[Tuple[object, str]]) -> List[Tuple[float, str, Dict]]:
+        """
+        Mark (question, answer_text) pairs of questions in the key, returning
+        (awarded_marks, feedback, metadata) in input order
+        """
+        count = len(pairs)
+        rows = np.fromiter(
+            (self._rows[_question_key(question)] for question, _ in pairs),
+            dtype=np.intp, count=count,
+        )
+        codes = np.fromiter(
+            (
+                self._lookups[row].get(normalize_answer(answer_text), NO_MATCH)
+                for row, (_, answer_text) in zip(rows, pairs)
+            ),
+            dtype=np.int64, count=count,
+        )
+        is_correct = codes == self.correct[rows]
+        awarded = np.where(is_correct, self.marks[rows], 0.0)
+
+        return [
+            (
+                float(marks),
+                CORRECT_FEEDBACK if correct else self._feedback[row],
+                {
+                    'grading_type': 'exact_match',
+                    'is_correct': bool(correct),
+                    'algorithm': 'answer_key',
+                },
+            )
+            for row, correct, marks in zip(rows.tolist(), is_correct.tolist(), awarded.tolist())
+        ]
@@ -0,0 +1,321 @@
+"""
+Synthetic grading benchmarks (see the benchmark_grading command).
+
+Each cohort runs in its own freshly spawned process, so the reported peak
+RSS (the largest of that process and its grading pool workers) belongs to
+that cohort alone rather than being the high-water mark of every cohort
+run before it. Answers are generated lazily and graded in batches, so the
+synthetic data does not inflate the peak either.
+"""
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import django
+from django.utils import timezone
+
+from Acad_ai_app.models import Question
+from grading.executor import GradingExecutor
+from grading.keyword_grader import GradingService
+
+QUESTION_TYPES = ("mcq", "true_false", "short", "essay")
+
+# Default synthetic exam: mostly objective questions plus a few written ones
+DEFAULT_EXAM_MIX = {"mcq": 6, "true_false": 2, "short": 2, "essay": 2}
+
+# Answer length ranges in words, roughly what students actually write
+ANSWER_WORDS = {"short": (5, 60), "essay": (150, 1500)}
+
+# Per-answer latency is sampled so large cohorts stay quick to benchmark
+LATENCY_SAMPLE = 500
+
+# Answers generated and handed to the executor at a time
+ANSWER_BATCH = 1000
+
+# Answers per pool worker and question type graded before timing starts
+WARM_UP_ANSWERS = 20
+
+# Run settings a baseline is only comparable under
+COMPARABLE_META = ("executor", "executor_workers", "cpu_count", "seed", "exam_mix")
+
+TOPIC_WORDS = (
+    "photosynthesis chlorophyll light energy glucose oxygen carbon dioxide "
+    "cell membrane nucleus mitochondria respiration enzyme protein water "
+    "plant leaf root stomata transport diffusion osmosis energy conversion "
+    "algorithm variable function loop recursion complexity memory database "
+    "network protocol encryption python compiler interpreter object class"
+).split()
+
+FILLER_WORDS = (
+    "the a an and of to in is are was that this it for on with as by from "
+    "because however therefore also which when where these those very more"
+).split()
+
+
+def _sentence(rng: random.Random, words: int, topic_share: float) -> str:
+    return " ".join(
+        rng.choice(TOPIC_WORDS) if rng.random() < topic_share else rng.choice(FILLER_WORDS)
+        for _ in range(words)
+    )
+
+
+def build_exam(mix: Optional[Dict[str, int]] = None, seed: int = 0) -> List[Question]:
+    """Unsaved Question objects covering the requested type mix"""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_EXAM_MIX
+    questions = []
+    next_id = 1
+
+    for question_type in QUESTION_TYPES:
+        for _ in range(mix.get(question_type, 0)):
+            question = Question(id=next_id, text=f"Synthetic {question_type} {next_id}",
+                                question_type=question_type, marks=rng.randint(1, 10))
+            if question_type == "mcq":
+                question.choices = ["A", "B", "C", "D"]
+                question.expected_answer = rng.choice(question.choices)
+            elif question_type == "true_false":
+                question.expected_answer = rng.choice(["true", "false"])
+            else:
+                low, high = ANSWER_WORDS[question_type]
+                question.expected_answer = _sentence(rng, max(low, high // 10), 0.8)
+                question.keywords = rng.sample(TOPIC_WORDS, rng.randint(3, 12))
+                question.min_word_count = low * 2
+            questions.append(question)
+            next_id += 1
+
+    return questions
+
+
+def iter_answers(question: Question, count: int, seed: int = 0) -> Iterator[str]:
+    """Synthetic answers of realistic length for one question, generated lazily"""
+    rng = random.Random(f"{seed}:{question.id}")
+    for _ in range(count):
+        if question.question_type == "mcq":
+            yield rng.choice(question.choices)
+        elif question.question_type == "true_false":
+            yield rng.choice(["true", "false", "True "])
+        else:
+            low, high = ANSWER_WORDS[question.question_type]
+            yield _sentence(rng, rng.randint(low, high), rng.uniform(0.2, 0.7))
+
+
+def _percentile(sorted_values: Sequence[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak RSS of this process or of its largest finished child (process pool
+    workers). Process-wide high-water marks, hence one process per cohort.
+    """
+    usage = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    return round(usage / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def warm_up(questions: List[Question], executor: GradingExecutor, seed: int = 0):
+    """
+    Grade a few answers of every question type, one chunk per pool worker,
+    so pool start-up and first-call costs are not charged to whichever
+    question type happens to be timed first.
+    """
+    samples = {}
+    for question in questions:
+        samples.setdefault(question.question_type, question)
+    pairs = [
+        (question, answer)
+        for question in samples.values()
+        for answer in iter_answers(question, WARM_UP_ANSWERS * executor.workers, seed - 1)
+    ]
+
+    chunk_size, executor.chunk_size = executor.chunk_size, WARM_UP_ANSWERS
+    try:
+        executor.grade(pairs)
+    finally:
+        executor.chunk_size = chunk_size
+    # Latencies are sampled in this process, whatever the executor mode
+    for question in samples.values():
+        GradingService.grade_batch(question, list(iter_answers(question, 1, seed - 1)))
+    executor.reset_stats()
+
+
+def run_cohort(questions: List[Question], cohort: int, executor: GradingExecutor,
+               seed: int = 0) -> Dict:
+    """
+    Grade one synthetic cohort and return throughput and latency per
+    question type. The result cache is bypassed so every answer is graded.
+    The executor is warmed up first, outside the timings.
+    """
+    warm_up(questions, executor, seed)
+
+    answers_by_type = defaultdict(int)
+    seconds_by_type = defaultdict(float)
+    latencies_by_type = defaultdict(list)
+
+    started = time.perf_counter()
+    for question in questions:
+        answers = iter_answers(question, cohort, seed)
+        sample = []
+        while True:
+            batch = list(islice(answers, ANSWER_BATCH))
+            if not batch:
+                break
+            batch_started = time.perf_counter()
+            executor.grade([(question, answer) for answer in batch])
+            seconds_by_type[question.question_type] += time.perf_counter() - batch_started
+            answers_by_type[question.question_type] += len(batch)
+            if len(sample) < LATENCY_SAMPLE:
+                sample.extend(batch[:LATENCY_SAMPLE - len(sample)])
+
+        for answer in sample:
+            answer_started = time.perf_counter()
+            GradingService.grade_batch(question, [answer])
+            latencies_by_type[question.question_type].append(
+                (time.perf_counter() - answer_started) * 1000
+            )
+    elapsed = time.perf_counter() - started
+
+    types = {}
+    for question_type, answers in answers_by_type.items():
+        latencies = sorted(latencies_by_type[question_type])
+        seconds = seconds_by_type[question_type]
+        types[question_type] = {
+            "answers": answers,
+            "answers_per_second": round(answers / seconds, 1) if seconds else 0.0,
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+        }
+
+    total_answers = sum(answers_by_type.values())
+    return {
+        "submissions": cohort,
+        "answers": total_answers,
+        "seconds": round(elapsed, 3),
+        "answers_per_second": round(total_answers / sum(seconds_by_type.values()), 1),
+        "types": types,
+    }
+
+
+def _run_cohort_process(cohort: int, mode: str, workers: int, seed: int,
+                        mix: Optional[Dict[str, int]]) -> Dict:
+    """run_cohort plus peak RSS; runs in a spawned process of its own"""
+    executor = GradingExecutor(mode=mode, workers=workers)
+    try:
+        results = run_cohort(build_exam(mix, seed), cohort, executor, seed)
+    finally:
+        # Wait for pool workers so RUSAGE_CHILDREN includes them
+        executor.shutdown()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def run_benchmark(cohorts: Sequence[int], mode: Optional[str] = None, workers: Optional[int] = None,
+                  seed: int = 0, mix: Optional[Dict[str, int]] = None) -> Dict:
+    """
+    Benchmark each cohort size with an executor of the given mode and
+    workers, one spawned process per cohort
+    """
+    # Resolves the defaults from GRADING settings; no pool is started here
+    executor = GradingExecutor(mode=mode, workers=workers)
+    results = {
+        "meta": {
+            "created_at": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "executor": executor.mode,
+            "executor_workers": executor.workers,
+            "seed": seed,
+            "exam_mix": mix or DEFAULT_EXAM_MIX,
+        },
+        "cohorts": {},
+    }
+    for cohort in cohorts:
+        # Spawn, not fork: a forked child inherits this process's RSS
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=django.setup) as pool:
+            results["cohorts"][str(cohort)] = pool.submit(
+                _run_cohort_process, cohort, executor.mode, executor.workers, seed, mix
+            ).result()
+    return results
+
+
+def meta_mismatches(results: Dict, baseline: Dict) -> List[str]:
+    """Run settings in which results differ from the baseline's"""
+    before = baseline.get("meta", {})
+    return [
+        f"{key}: {results['meta'].get(key)} (baseline {before.get(key)})"
+        for key in COMPARABLE_META
+        if results["meta"].get(key) != before.get(key)
+    ]
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Regressions of results against a stored baseline: lower throughput,
+    higher p95 latency or higher peak RSS than `tolerance` allows.
+
+    Raises ValueError when the baseline was recorded with other run
+    settings (executor, workers, CPUs, seed or exam mix), since its
+    numbers would not be comparable.
+    """
+    mismatches = meta_mismatches(results, baseline)
+    if mismatches:
+        raise ValueError("Baseline recorded with different settings: " + "; ".join(mismatches))
+
+    regressions = []
+    for cohort, current in results["cohorts"].items():
+        previous = baseline.get("cohorts", {}).get(cohort)
+        if not previous:
+            continue
+
+        for question_type, metrics in current["types"].items():
+            before = previous["types"].get(question_type)
+            if not before:
+                continue
+            label = f"cohort {cohort} {question_type}"
+            if metrics["answers_per_second"] < before["answers_per_second"] * (1 - tolerance):
+                regressions.append(
+                    f"{label}: {metrics['answers_per_second']} answers/s "
+                    f"(baseline {before['answers_per_second']})"
+                )
+            if metrics["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{label}: p95 {metrics['p95_ms']}ms (baseline {before['p95_ms']}ms)"
+                )
+
+        if current["peak_rss_mb"] > previous["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"cohort {cohort}: peak RSS {current['peak_rss_mb']}MB "
+                f"(baseline {previous['peak_rss_mb']}MB)"
+            )
+    return regressions
+
+
+def load_baseline(path) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+
+from grading.conf import grading_setting
+
+RESULT_CACHE_PREFIX = "grading:result"
+
+
+class LRUCache:
+    """Thread-safe bounded per-process LRU that counts its evictions"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def question_version(question) -> str:
+    """
+    Digest of everything that affects how a question grades.
+
+    Editing the expected answer, keywords, marks, type, word count or choices
+    produces a new version, so cached results for the old content are never
+    served again. Keyword matching options are included for the same reason.
+    """
+    from grading.keywords import keyword_options
+
+    content = json.dumps(
+        [
+            keyword_options(),
+            question.question_type,
+            question.expected_answer,
+            question.keywords,
+            question.marks,
+            question.min_word_count,
+            question.choices,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def normalize_answer(answer_text: str) -> str:
+    """Graders ignore case and surrounding whitespace, so the cache does too"""
+    return answer_text.strip().lower()
+
+
+def result_key(version: str, answer_text: str) -> str:
+    digest = hashlib.sha256(normalize_answer(answer_text).encode("utf-8")).hexdigest()
+    return f"{RESULT_CACHE_PREFIX}:{version}:{digest}"
+
+
+class GradingCache:
+    """
+    Content-addressed cache of grading results.
+
+    Keys combine the question version with a digest of the full normalized
+    answer, so they are stable across processes and never collide on shared
+    prefixes. A per-process LRU sits in front of the Django cache, and whole
+    submissions are read and written with one get_many/set_many round trip.
+    """
+
+    def __init__(self, timeout: Optional[int] = None, local_size: Optional[int] = None):
+        self.timeout = timeout or grading_setting("RESULT_CACHE_TIMEOUT")
+        self.local = LRUCache(local_size or grading_setting("RESULT_CACHE_LOCAL_SIZE"))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, hits: int = 0, misses: int = 0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def _keys(self, pairs: Sequence[Tuple[object, str]]) -> List[str]:
+        versions: Dict[int, str] = {}
+        keys = []
+        for question, answer_text in pairs:
+            version = versions.get(id(question))
+            if version is None:
+                version = versions[id(question)] = question_version(question)
+            keys.append(result_key(version, answer_text))
+        return keys
+
+    def get(self, question, answer_text: str):
+        return self.get_many([(question, answer_text)]).get(0)
+
+    def set(self, question, answer_text: str, result):
+        self.set_many([(question, answer_text)], [result])
+
+    def get_many(self, pairs: Sequence[Tuple[object, str]]) -> Dict[int, tuple]:
+        """Return {position: result} for every cached (question, answer) pair"""
+        keys = self._keys(pairs)
+        found: Dict[int, tuple] = {}
+        remote = {}
+
+        for position, key in enumerate(keys):
+            result = self.local.get(key)
+            if result is not None:
+                found[position] = result
+            else:
+                remote.setdefault(key, []).append(position)
+
+        if remote:
+            for key, result in cache.get_many(list(remote)).items():
+                self.local.set(key, result)
+                for position in remote[key]:
+                    found[position] = result
+
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def set_many(self, pairs: Sequence[Tuple[object, str]], results: Sequence[tuple]):
+        """Store results for (question, answer) pairs in one round trip"""
+        entries = {}
+        for key, result in zip(self._keys(pairs), results):
+            # Never cache failures; the next attempt should really grade
+            if result is None or result[2].get('grading_type') == 'error':
+                continue
+            entries[key] = result
+            self.local.set(key, result)
+
+        if entries:
+            cache.set_many(entries, timeout=self.timeout)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.local.evictions,
+                "local_entries": len(self.local),
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.local.evictions = 0
+
+
+_grading_cache: Optional[GradingCache] = None
+_grading_cache_lock = threading.Lock()
+
+
+def get_grading_cache() -> GradingCache:
+    """Return the process-wide grading result cache"""
+    global _grading_cache
+    with _grading_cache_lock:
+        if _grading_cache is None:
+            _grading_cache = GradingCache()
+        return _grading_cache
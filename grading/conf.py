@@ -0,0 +1,34 @@
+from django.conf import settings
+
+
+DEFAULTS = {
+    # "sync" grades inside the submission request, "queued" hands
+    # submissions to the grading_worker processes
+    "MODE": "sync",
+    "WORKER_PROCESSES": 2,
+    "QUEUE_BATCH_SIZE": 20,
+    "QUEUE_POLL_INTERVAL": 1.0,
+    # Submissions stuck in "grading" longer than this (seconds) are requeued
+    "QUEUE_STALE_AFTER": 300,
+    "QUEUE_MAX_ATTEMPTS": 3,
+    # Where answers are scored: "inline", "thread" or "process" pool
+    "EXECUTOR": "inline",
+    # Pool size, defaults to the number of CPUs
+    "EXECUTOR_WORKERS": None,
+    # Answers to the same question graded per pool task
+    "EXECUTOR_CHUNK_SIZE": 256,
+    # Grading result cache (seconds) and per-process LRU size
+    "RESULT_CACHE_TIMEOUT": 3600,
+    "RESULT_CACHE_LOCAL_SIZE": 10000,
+    # Keyword coverage: match whole words only, and optionally match
+    # inflected forms through light suffix stemming
+    "KEYWORD_WORD_BOUNDARY": True,
+    "KEYWORD_STEMMING": False,
+    # Answers regraded per transaction by a regrade job
+    "REGRADE_CHUNK_SIZE": 1000,
+}
+
+
+def grading_setting(name):
+    """Read a GRADING setting, falling back to the package default"""
+    return getattr(settings, "GRADING", {}).get(name, DEFAULTS[name])
@@ -0,0 +1,196 @@
+import atexit
+import logging
+import os
+import signal
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from grading.conf import grading_setting
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+def _worker_id() -> str:
+    return f"{os.getpid()}:{threading.current_thread().name}"
+
+
+def _warm_worker():
+    """
+    Process pool initializer: make sure Django is configured and pay the
+    sklearn/TF-IDF import cost once per worker instead of on the first task.
+
+    Pool processes ignore SIGINT/SIGTERM: a signal sent to the whole process
+    group would otherwise kill them mid-chunk. The owning process stops
+    them through shutdown() (see run_worker).
+    """
+    import django
+    from django.apps import apps
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    if not apps.ready:
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "AcadAI_Project.settings")
+        django.setup()
+
+    import grading.keyword_grader  # noqa: F401
+    import grading.reference  # noqa: F401
+
+
+def _grade_chunk(question, answers: List[str]):
+    """Grade one question's chunk of answers; runs inside a pool worker"""
+    from grading.keyword_grader import GradingService
+
+    started = time.perf_counter()
+    results = GradingService.grade_batch(question, answers)
+    return _worker_id(), results, time.perf_counter() - started
+
+
+class GradingExecutor:
+    """
+    Fans grading work out across an inline, thread or process pool.
+
+    Answers are grouped per question and split into chunks so a large cohort
+    spreads over every worker while each chunk still benefits from
+    GradingService.grade_batch vectorization. Pools are created lazily and
+    kept warm between calls.
+    """
+
+    def __init__(self, mode: Optional[str] = None, workers: Optional[int] = None,
+                 chunk_size: Optional[int] = None):
+        self.mode = mode or grading_setting("EXECUTOR")
+        if self.mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown grading executor mode: {self.mode}")
+        self.workers = workers or grading_setting("EXECUTOR_WORKERS") or os.cpu_count() or 1
+        self.chunk_size = chunk_size or grading_setting("EXECUTOR_CHUNK_SIZE")
+        self._pool = None
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"tasks": 0, "answers": 0, "busy_seconds": 0.0}
+        )
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.mode == "process":
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, initializer=_warm_worker
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="grading"
+                    )
+            return self._pool
+
+    def _chunks(self, pairs: Sequence[Tuple[object, str]]):
+        groups: Dict[int, List[int]] = defaultdict(list)
+        questions = {}
+        for position, (question, _) in enumerate(pairs):
+            key = question.id if question.id is not None else id(question)
+            groups[key].append(position)
+            questions[key] = question
+
+        for key, positions in groups.items():
+            for start in range(0, len(positions), self.chunk_size):
+                chunk = positions[start:start + self.chunk_size]
+                yield questions[key], chunk
+
+    def _record(self, worker: str, answers: int, elapsed: float):
+        with self._lock:
+            stats = self._stats[worker]
+            stats["tasks"] += 1
+            stats["answers"] += answers
+            stats["busy_seconds"] += elapsed
+
+    def grade(self, pairs: Sequence[Tuple[object, str]]) -> List[Tuple[float, str, Dict]]:
+        """
+        Grade (question, answer_text) pairs and return results in input order.
+        A chunk that fails scores 0 for its answers, like grade_answers does.
+        """
+        pairs = list(pairs)
+        results: List[Tuple[float, str, Dict]] = [None] * len(pairs)
+        chunks = list(self._chunks(pairs))
+
+        if self.mode == "inline":
+            outcomes = []
+            for question, positions in chunks:
+                try:
+                    outcomes.append(_grade_chunk(question, [pairs[p][1] for p in positions]))
+                except Exception as e:
+                    outcomes.append(e)
+        else:
+            pool = self._get_pool()
+            futures = [
+                pool.submit(_grade_chunk, question, [pairs[p][1] for p in positions])
+                for question, positions in chunks
+            ]
+            outcomes = []
+            for future in futures:
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    outcomes.append(e)
+
+        for (question, positions), outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch grading failed for question {question.id}: {str(outcome)}")
+                graded = [(0.0, "Grading failed", {'grading_type': 'error'}) for _ in positions]
+            else:
+                worker, graded, elapsed = outcome
+                self._record(worker, len(positions), elapsed)
+
+            for position, result in zip(positions, graded):
+                results[position] = result
+
+        return results
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-worker task count, answers graded, busy time and answers/sec"""
+        with self._lock:
+            return {
+                worker: {
+                    **values,
+                    "answers_per_second": (
+                        round(values["answers"] / values["busy_seconds"], 2)
+                        if values["busy_seconds"] else 0.0
+                    ),
+                }
+                for worker, values in self._stats.items()
+            }
+
+    def report(self) -> List[str]:
+        """Human readable throughput lines, one per worker"""
+        return [
+            f"{worker}: {int(values['answers'])} answers in {int(values['tasks'])} tasks, "
+            f"{values['busy_seconds']:.3f}s busy, {values['answers_per_second']} answers/s"
+            for worker, values in sorted(self.stats().items())
+        ]
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_executor: Optional[GradingExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> GradingExecutor:
+    """Return the process-wide executor configured by GRADING['EXECUTOR']"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = GradingExecutor()
+            atexit.register(_executor.shutdown)
+        return _executor
@@ -1,11 +1,17 @@
+import logging
 import re
-from typing import Dict, Tuple
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from collections import defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
 import numpy as np
-from django.core.cache import cache
 
 from Acad_ai_app.models import Question
+from grading.answer_key import AnswerKey
+from grading.cache import get_grading_cache
+from grading.keywords import get_keyword_matcher
+from grading.reference import get_reference_model
+
+logger = logging.getLogger(__name__)
 
 
 class GradingService:
@@ -17,9 +23,9 @@ class GradingService:
         Grade an answer based on question type and criteria
         Returns: (awarded_marks, feedback, metadata)
         """
-        # Cache key for similar answer patterns (optional optimization)
-        cache_key = f'grade_{question.id}_{hash(answer_text[:100])}'
-        cached_result = cache.get(cache_key)
+        # Content-addressed cache: full normalized answer + question version
+        grading_cache = get_grading_cache()
+        cached_result = grading_cache.get(question, answer_text)
         
         if cached_result:
             return cached_result
@@ -33,166 +39,203 @@ class GradingService:
         else:
             result = (0, "Unknown question type", {})
         
-        # Cache for 1 hour
-        cache.set(cache_key, result, timeout=3600)
+        grading_cache.set(question, answer_text, result)
         return result
     
     @staticmethod
     def _grade_mcq(question: Question, answer_text: str) -> Tuple[float, str, Dict]:
         """Grade multiple choice questions"""
-        answer_text = answer_text.strip().lower()
-        correct_answer = question.expected_answer.strip().lower()
-        
-        is_correct = answer_text == correct_answer
-        marks = float(question.marks) if is_correct else 0.0
-        feedback = "Correct!" if is_correct else f"Incorrect. The correct answer is: {question.correct_answer}"
-        
-        metadata = {
-            'grading_type': 'exact_match',
-            'is_correct': is_correct,
-            'algorithm': 'string_comparison'
-        }
-
-        print("MCQ Grading:", marks, feedback, metadata)
-        
-        return marks, feedback, metadata
+        return GradingService._grade_mcq_batch(question, [answer_text])[0]
     
-    @staticmethod
     @staticmethod
     def _grade_essay(question: Question, answer_text: str) -> Tuple[float, str, Dict]:
         """Grade essay using advanced criteria"""
-        if not answer_text.strip():
-            return 0.0, "No answer provided", {'grading_type': 'empty'}
-        
-        word_count = len(answer_text.split())
-        print("Essay Word Count:", word_count)
-        
+        return GradingService._grade_essay_batch(question, [answer_text])[0]
+
+    @staticmethod
+    def _grade_short_answer(question: Question, answer_text: str) -> Tuple[float, str, Dict]:
+        """Grade short answers with the same criteria as essays"""
+        return GradingService._grade_essay_batch(question, [answer_text])[0]
+
+    @staticmethod
+    def grade_batch(question: Question, answers: Sequence[str]) -> List[Tuple[float, str, Dict]]:
+        """
+        Grade many answers to the same question in one pass
+        Returns: [(awarded_marks, feedback, metadata), ...] in the order given
+        """
+        answers = list(answers)
+        if not answers:
+            return []
+
+        if question.question_type == 'mcq' or question.question_type == 'true_false':
+            return GradingService._grade_mcq_batch(question, answers)
+        elif question.question_type in ('short', 'essay'):
+            return GradingService._grade_essay_batch(question, answers)
+        return [(0, "Unknown question type", {}) for _ in answers]
+
+    @staticmethod
+    def grade_answers(pairs: Iterable[Tuple[Question, str]]) -> List[Tuple[float, str, Dict]]:
+        """
+        Grade (question, answer_text) pairs, batching answers per question
+        Results come back in input order; a failing question scores 0
+        """
+        pairs = list(pairs)
+        results: List[Tuple[float, str, Dict]] = [None] * len(pairs)
+
+        groups: Dict[int, List[int]] = defaultdict(list)
+        questions: Dict[int, Question] = {}
+        for position, (question, _) in enumerate(pairs):
+            key = question.id if question.id is not None else id(question)
+            groups[key].append(position)
+            questions[key] = question
+
+        for key, positions in groups.items():
+            question = questions[key]
+            try:
+                graded = GradingService.grade_batch(
+                    question, [pairs[position][1] for position in positions]
+                )
+            except Exception as e:
+                logger.error(f"Batch grading failed for question {question.id}: {str(e)}")
+                graded = [(0.0, "Grading failed", {'grading_type': 'error'}) for _ in positions]
+
+            for position, result in zip(positions, graded):
+                results[position] = result
+
+        return results
+
+    @staticmethod
+    def _grade_mcq_batch(question: Question, answers: List[str]) -> List[Tuple[float, str, Dict]]:
+        """Grade a cohort of objective answers against the compiled answer key"""
+        return AnswerKey([question]).grade([(question, answer) for answer in answers])
+
+    @staticmethod
+    def _grade_essay_batch(question: Question, answers: List[str]) -> List[Tuple[float, str, Dict]]:
+        """
+        Score essays as arrays: word counts, keyword coverage and TF-IDF
+        similarity are computed for every answer before any feedback is built
+        """
+        count = len(answers)
+        is_empty = np.array([not answer.strip() for answer in answers], dtype=bool)
+        word_counts = np.array([len(answer.split()) for answer in answers], dtype=float)
+
         # Word count penalty
-        word_count_score = 1.0
-        word_count_feedback = ""
-        if question.min_word_count and word_count < question.min_word_count:
-            word_count_score = max(0.5, word_count / question.min_word_count)
-            word_count_feedback = f"Answer is below minimum word count ({word_count}/{question.min_word_count})"
-        
+        word_count_scores = np.ones(count)
+        if question.min_word_count:
+            below_minimum = word_counts < question.min_word_count
+            word_count_scores = np.where(
+                below_minimum,
+                np.maximum(0.5, word_counts / question.min_word_count),
+                1.0,
+            )
+        else:
+            below_minimum = np.zeros(count, dtype=bool)
+
         # Keyword coverage
-        keyword_score = 0.0
-        keywords_found = []
-        has_keywords = question.keywords and isinstance(question.keywords, list) and len(question.keywords) > 0
-        
+        keyword_scores = np.zeros(count)
+        keywords_found = [[] for _ in range(count)]
+        has_keywords = bool(question.keywords and isinstance(question.keywords, list) and len(question.keywords) > 0)
+
         if has_keywords:
-            keyword_score, keywords_found = GradingService._calculate_keyword_score(
-                answer_text, 
-                question.keywords
-            )
-        
+            # Rubric compiled once per keyword list, one scan per answer
+            matcher = get_keyword_matcher(question.keywords)
+            for row, answer in enumerate(answers):
+                keyword_scores[row], keywords_found[row] = matcher.score(answer)
+
         # Content similarity
-        similarity_score = 0.0
-        has_expected_answer = question.expected_answer and question.expected_answer.strip()
-        
+        similarity_scores = np.zeros(count)
+        has_expected_answer = bool(question.expected_answer and question.expected_answer.strip())
+
         if has_expected_answer:
-            similarity_score = GradingService._calculate_similarity(
-                answer_text, 
-                question.expected_answer
-            )
-        
+            similarity_scores = get_reference_model(question).similarity_many(answers)
+
         # ✅ DYNAMIC WEIGHTS: Adjust based on what's available
         if has_keywords and has_expected_answer:
             # All criteria available: 40% keywords, 40% similarity, 20% word count
-            combined_score = (
-                keyword_score * 0.4 + 
-                similarity_score * 0.4 + 
-                word_count_score * 0.2
+            combined_scores = (
+                keyword_scores * 0.4 +
+                similarity_scores * 0.4 +
+                word_count_scores * 0.2
             )
         elif has_keywords and not has_expected_answer:
             # Only keywords: 70% keywords, 30% word count
-            combined_score = (
-                keyword_score * 0.7 + 
-                word_count_score * 0.3
+            combined_scores = (
+                keyword_scores * 0.7 +
+                word_count_scores * 0.3
             )
         elif not has_keywords and has_expected_answer:
             # Only similarity: 80% similarity, 20% word count
-            combined_score = (
-                similarity_score * 0.8 + 
-                word_count_score * 0.2
+            combined_scores = (
+                similarity_scores * 0.8 +
+                word_count_scores * 0.2
             )
         else:
             # Only word count (fallback)
-            combined_score = word_count_score
-        
-        awarded_marks = round(float(question.marks) * combined_score, 2)
-        
-        # Generate detailed feedback
-        feedback_parts = []
-        if word_count_feedback:
-            feedback_parts.append(word_count_feedback)
-        
-        if has_keywords and keyword_score < 0.5:
-            missing_count = len(question.keywords) - len(keywords_found)
-            feedback_parts.append(f"Consider including {missing_count} more key concepts")
-        
-        if has_expected_answer:
-            if similarity_score > 0.7:
-                feedback_parts.append("Excellent coverage of expected content")
-            elif similarity_score > 0.4:
-                feedback_parts.append("Good partial coverage of expected content")
-            else:
-                feedback_parts.append("Answer could be more aligned with expected response")
-        
-        feedback = ". ".join(feedback_parts) if feedback_parts else "Good answer"
-        
-        metadata = {
-            'grading_type': 'essay',
-            'word_count': word_count,
-            'word_count_score': round(word_count_score, 3),
-            'keyword_score': round(keyword_score, 3),
-            'similarity_score': round(similarity_score, 3),
-            'combined_score': round(combined_score, 3),
-            'keywords_found': keywords_found,
-            'has_keywords': has_keywords,
-            'has_expected_answer': has_expected_answer,
-            'algorithm': 'multi_factor_analysis_adaptive'
-        }
-        
-        print("Essay Grading:", awarded_marks, feedback, metadata)
-        
-        return awarded_marks, feedback, metadata
-        
-    
+            combined_scores = word_count_scores
+
+        marks = float(question.marks)
+        results = []
+        for row in range(count):
+            if is_empty[row]:
+                results.append((0.0, "No answer provided", {'grading_type': 'empty'}))
+                continue
+
+            word_count = int(word_counts[row])
+            word_count_score = float(word_count_scores[row])
+            keyword_score = float(keyword_scores[row])
+            similarity_score = float(similarity_scores[row])
+            combined_score = float(combined_scores[row])
+
+            # Generate detailed feedback
+            feedback_parts = []
+            if below_minimum[row]:
+                feedback_parts.append(
+                    f"Answer is below minimum word count ({word_count}/{question.min_word_count})"
+                )
+
+            if has_keywords and keyword_score < 0.5:
+                missing_count = len(question.keywords) - len(keywords_found[row])
+                feedback_parts.append(f"Consider including {missing_count} more key concepts")
+
+            if has_expected_answer:
+                if similarity_score > 0.7:
+                    feedback_parts.append("Excellent coverage of expected content")
+                elif similarity_score > 0.4:
+                    feedback_parts.append("Good partial coverage of expected content")
+                else:
+                    feedback_parts.append("Answer could be more aligned with expected response")
+
+            feedback = ". ".join(feedback_parts) if feedback_parts else "Good answer"
+
+            metadata = {
+                'grading_type': 'essay',
+                'word_count': word_count,
+                'word_count_score': round(word_count_score, 3),
+                'keyword_score': round(keyword_score, 3),
+                'similarity_score': round(similarity_score, 3),
+                'combined_score': round(combined_score, 3),
+                'keywords_found': keywords_found[row],
+                'has_keywords': has_keywords,
+                'has_expected_answer': has_expected_answer,
+                'algorithm': 'multi_factor_analysis_adaptive'
+            }
+
+            results.append((round(marks * combined_score, 2), feedback, metadata))
+
+        return results
+
     @staticmethod
     def _calculate_keyword_score(answer_text: str, keywords: list) -> Tuple[float, list]:
-        """Calculate score based on keyword density - returns score and found keywords"""
+        """Calculate score based on keyword coverage - returns score and found keywords"""
         if not keywords:
             return 0.5, []
         
-        answer_lower = answer_text.lower()
-        found_keywords = [kw for kw in keywords if kw.lower() in answer_lower]
-        score = len(found_keywords) / len(keywords)
-        return score, found_keywords
+        return get_keyword_matcher(keywords).score(answer_text)
     
     @staticmethod
-    def _calculate_similarity(text1: str, text2: str) -> float:
-        """Calculate cosine similarity between two texts using TF-IDF"""
-        if not text1.strip() or not text2.strip():
-            return 0.0
-        
-        try:
-            vectorizer = TfidfVectorizer(
-                stop_words='english',
-                max_features=1000,
-                ngram_range=(1, 2)
-            )
-            tfidf_matrix = vectorizer.fit_transform([text1, text2])
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-            return float(similarity)
-        except Exception as e:
-            # Fallback to simple word overlap
-            words1 = set(text1.lower().split())
-            words2 = set(text2.lower().split())
-            if not words1 or not words2:
-                return 0.0
-            intersection = words1.intersection(words2)
-            union = words1.union(words2)
-            return len(intersection) / len(union) if union else 0.0
+    def _calculate_similarity(answer_text: str, question: Question) -> float:
+        """Calculate TF-IDF cosine similarity against the question's compiled reference"""
+        return get_reference_model(question).similarity(answer_text)
     
     @staticmethod
     def _generate_feedback(combined_score: float, keyword_score: float, 
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from grading.cache import LRUCache
+from grading.conf import grading_setting
+
+MATCHER_CACHE_SIZE = 1024
+
+# Words, or single punctuation characters so keywords like "C++" still match
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Light suffix stripping for the optional stemming mode. Stems must keep at
+# least three characters so short keywords are left alone.
+STEM_SUFFIXES = (
+    "ations", "ation", "ments", "ment", "ings", "ing", "ies", "ied",
+    "ers", "er", "es", "ed", "ly", "s", "y", "e",
+)
+MIN_STEM_LENGTH = 3
+
+_END = object()
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Strip common suffixes until none apply (studying -> study -> stud)"""
+    while True:
+        for suffix in STEM_SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+                word = word[:-len(suffix)]
+                break
+        else:
+            break
+    # running -> runn -> run
+    if len(word) > MIN_STEM_LENGTH and word[-1] == word[-2] and word[-1] not in "aeiouslz":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def keyword_options() -> Dict[str, bool]:
+    """Matcher options from settings; also part of the grading cache version"""
+    return {
+        "word_boundary": grading_setting("KEYWORD_WORD_BOUNDARY"),
+        "stemming": grading_setting("KEYWORD_STEMMING"),
+    }
+
+
+class KeywordMatcher:
+    """
+    A question's keyword rubric compiled into a token trie.
+
+    With word boundaries on (the default) the answer is tokenized once and the
+    trie is walked from every token, Aho-Corasick style, so every keyword and
+    multi-word phrase is found in a single pass and "cell" no longer matches
+    inside "excellent". Stemming compares light-stemmed tokens so "cells"
+    matches "cell". With word boundaries off, the legacy case-insensitive
+    substring check is used.
+    """
+
+    def __init__(self, keywords: Sequence, word_boundary: bool = True, stemming: bool = False):
+        self.keywords = list(keywords)
+        self.word_boundary = word_boundary
+        self.stemming = stemming
+
+        # Identical keywords (after normalization) share one phrase
+        self._phrases: List[Tuple[str, ...]] = []
+        self._phrase_keywords: List[List[int]] = []
+        seen: Dict[Tuple[str, ...], int] = {}
+        for index, keyword in enumerate(self.keywords):
+            phrase = self._tokens(str(keyword))
+            if not phrase:
+                continue
+            if phrase not in seen:
+                seen[phrase] = len(self._phrases)
+                self._phrases.append(phrase)
+                self._phrase_keywords.append([])
+            self._phrase_keywords[seen[phrase]].append(index)
+
+        self._trie: Dict = {}
+        for phrase_index, phrase in enumerate(self._phrases):
+            node = self._trie
+            for token in phrase:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append(phrase_index)
+
+    def _tokens(self, text: str) -> Tuple[str, ...]:
+        tokens = tokenize(text)
+        if self.stemming:
+            tokens = [stem(token) for token in tokens]
+        return tuple(tokens)
+
+    def _match_phrases(self, text: str) -> set:
+        if not self.word_boundary:
+            text_lower = text.lower()
+            return {
+                phrase_index
+                for phrase_index, indexes in enumerate(self._phrase_keywords)
+                if str(self.keywords[indexes[0]]).lower() in text_lower
+            }
+
+        tokens = self._tokens(text)
+        trie = self._trie
+        remaining = len(self._phrases)
+        matched = set()
+
+        for start in range(len(tokens)):
+            node = trie.get(tokens[start])
+            position = start
+            while node is not None:
+                ends = node.get(_END)
+                if ends:
+                    for phrase_index in ends:
+                        if phrase_index not in matched:
+                            matched.add(phrase_index)
+                            remaining -= 1
+                    if not remaining:
+                        return matched
+                position += 1
+                if position == len(tokens):
+                    break
+                node = node.get(tokens[position])
+        return matched
+
+    def find(self, text: str) -> List:
+        """Keywords present in text, in rubric order, as originally written"""
+        if not self._phrases or not text:
+            return []
+
+        found_indexes = sorted(
+            index
+            for phrase_index in self._match_phrases(text)
+            for index in self._phrase_keywords[phrase_index]
+        )
+        return [self.keywords[index] for index in found_indexes]
+
+    def score(self, text: str) -> Tuple[float, List]:
+        """Share of keywords present and the keywords found"""
+        if not self.keywords:
+            return 0.5, []
+        found = self.find(text)
+        return len(found) / len(self.keywords), found
+
+
+_matchers = LRUCache(MATCHER_CACHE_SIZE)
+
+
+def get_keyword_matcher(keywords: Sequence, word_boundary: Optional[bool] = None,
+                        stemming: Optional[bool] = None) -> KeywordMatcher:
+    """Compiled matcher for a keyword list, cached per rubric and options"""
+    options = keyword_options()
+    if word_boundary is not None:
+        options["word_boundary"] = word_boundary
+    if stemming is not None:
+        options["stemming"] = stemming
+
+    content = json.dumps([list(keywords), options], sort_keys=True, default=str)
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = KeywordMatcher(keywords, **options)
+        _matchers.set(key, matcher)
+    return matcher
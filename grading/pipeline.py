@@ -0,0 +1,469 @@
+import logging
+import signal
+import threading
+import time
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, List, Optional
+
+from django.db import close_old_connections, transaction
+from django.db.models import (
+    Case, Count, ExpressionWrapper, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value,
+    When,
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from Acad_ai_app.models import Exam, Question, Submission, SubmissionAnswer
+from Acad_ai_app.analytics import answer_grade_deltas, record_answer_grades, record_exam_grading
+from Acad_ai_app.stats import rebuild_student_stats, record_grading
+from grading.answer_key import AnswerKey
+from grading.cache import get_grading_cache
+from grading.conf import grading_setting
+from grading.executor import get_executor
+
+logger = logging.getLogger(__name__)
+
+# Seconds between executor throughput reports from a running worker
+STATS_REPORT_INTERVAL = 60
+
+# Submission fields that feed the per-student statistics
+GRADED_FIELDS = ("graded_at", "total_score", "percentage", "passed")
+
+GRADING_QUESTION_FIELDS = (
+    "id", "question_type", "marks", "expected_answer", "text",
+    "keywords", "min_word_count", "choices",
+)
+
+
+def load_questions(exam_id: int) -> Dict[int, Question]:
+    """Fetch every gradable field of an exam's questions in one query"""
+    return load_questions_for_exams([exam_id])
+
+
+def load_questions_for_exams(exam_ids) -> Dict[int, Question]:
+    return {
+        q.id: q
+        for q in Question.objects.filter(exam_id__in=exam_ids).only(*GRADING_QUESTION_FIELDS)
+    }
+
+
+def grade_submission(submission: Submission, questions: Optional[Dict[int, Question]] = None,
+                     exam_total: Optional[int] = None,
+                     answers: Optional[List[SubmissionAnswer]] = None):
+    """
+    Grade a submission using the grading service
+
+    Key optimizations:
+    1. Bulk update instead of individual saves
+    2. Single aggregation query for totals
+    3. Efficient question prefetching
+    4. Answers graded per question through the configured GradingExecutor
+    """
+    if submission.status != "grading":
+        submission.status = "grading"
+        submission.save(update_fields=["status"])
+
+    if questions is None:
+        questions = load_questions(submission.exam_id)
+
+    # Answers just inserted by the caller can be graded as they are, as long
+    # as the backend returned their primary keys
+    if answers is None or any(answer.pk is None for answer in answers):
+        answers = list(submission.answers.only("id", "answer_text", "question_id", "awarded_marks"))
+    _grade_answers(answers, questions)
+
+    _finalize_submission(submission, exam_total)
+
+
+def _grade_answers(answers: List[SubmissionAnswer], questions: Dict[int, Question]):
+    """
+    Score answers and write awarded_marks back in bulk.
+
+    Objective answers are marked in one comparison against the compiled
+    answer key, which is cheaper than a cache lookup. Written answers go
+    through the executor: cached results are fetched for the whole batch in
+    one round trip and only the misses are graded.
+    """
+    pairs = [(questions[answer.question_id], answer.answer_text) for answer in answers]
+    graded = [None] * len(pairs)
+
+    answer_key = AnswerKey(questions.values())
+    objective = [position for position, (question, _) in enumerate(pairs) if question in answer_key]
+    if objective:
+        marked = answer_key.grade([pairs[position] for position in objective])
+        for position, result in zip(objective, marked):
+            graded[position] = result
+
+    written = [position for position, result in enumerate(graded) if result is None]
+    grading_cache = get_grading_cache()
+    cached = grading_cache.get_many([pairs[position] for position in written])
+    for index, result in cached.items():
+        graded[written[index]] = result
+
+    missing = [position for position, result in enumerate(graded) if result is None]
+    if missing:
+        missing_pairs = [pairs[position] for position in missing]
+        fresh = get_executor().grade(missing_pairs)
+        for position, result in zip(missing, fresh):
+            graded[position] = result
+        grading_cache.set_many(missing_pairs, fresh)
+
+    # Marks from an earlier grading, so question analytics apply only the change
+    previous_marks = [answer.awarded_marks for answer in answers]
+
+    answers_to_update = []
+    for answer, (awarded_marks, feedback, metadata) in zip(answers, graded):
+        answer.awarded_marks = Decimal(str(awarded_marks))
+        answers_to_update.append(answer)
+
+    # Bulk update answers
+    SubmissionAnswer.objects.bulk_update(answers_to_update, ["awarded_marks"])
+    record_answer_grades(answer_grade_deltas(previous_marks, answers_to_update))
+
+
+def _exam_fields(graded: Dict) -> Dict:
+    return {field: graded[field] for field in ("graded_at", "percentage", "passed")}
+
+
+def _as_stored(field_name: str, value) -> Decimal:
+    """
+    `value` rounded half up to the Submission decimal field's places, the
+    same rule finalize_submissions applies in SQL
+    """
+    field = Submission._meta.get_field(field_name)
+    return field.to_python(value).quantize(
+        Decimal(1).scaleb(-field.decimal_places), rounding=ROUND_HALF_UP
+    )
+
+
+def exam_max_marks(exam_ids) -> Dict[int, int]:
+    """Total available marks of each exam (maintained on Exam.total_marks)"""
+    return dict(Exam.objects.filter(id__in=exam_ids).values_list("id", "total_marks"))
+
+
+@transaction.atomic
+def _finalize_submission(submission: Submission, exam_total: Optional[int] = None):
+    """
+    Roll graded answers up into the submission's score fields and apply the
+    change to the student's statistics and the exam's analytics in the same
+    transaction. Batch callers pass `exam_total` so it is computed once per
+    exam rather than once per submission.
+    """
+    # Lock the row and read what it contributed to the stats before (a
+    # regrade replaces an earlier result rather than adding a new one)
+    previous = (
+        Submission.objects.select_for_update()
+        .filter(pk=submission.pk)
+        .values("student_id", "exam_id", *GRADED_FIELDS)
+        .get()
+    )
+    student_id = previous.pop("student_id")
+    exam_id = previous.pop("exam_id")
+
+    # Calculate final results using aggregation
+    result = submission.answers.aggregate(total=Sum("awarded_marks"))
+    submission.total_score = _as_stored("total_score", result["total"] or Decimal("0.00"))
+
+    # Calculate percentage
+    if exam_total is None:
+        exam_total = exam_max_marks([submission.exam_id]).get(submission.exam_id) or 0
+
+    submission.percentage = _as_stored("percentage", (
+        (submission.total_score / exam_total * 100)
+        if exam_total > 0
+        else Decimal("0.00")
+    ))
+
+    # Determine if passed (assuming 50% is passing)
+    submission.passed = submission.percentage >= 50
+
+    # Update status and timestamps
+    submission.status = "graded"
+    submission.graded_at = timezone.now()
+
+    submission.save(
+        update_fields=["total_score", "percentage", "passed", "status", "graded_at"]
+    )
+
+    current = {field: getattr(submission, field) for field in GRADED_FIELDS}
+    record_grading(student_id, previous, current)
+    record_exam_grading(exam_id, _exam_fields(previous), _exam_fields(current))
+
+
+def finalize_submissions(submissions) -> int:
+    """
+    Set-based counterpart of _finalize_submission for bulk workflows
+    (regrade, imports, backfills).
+
+    Recomputes total_score, percentage and passed for every submission in
+    the `submissions` queryset and marks them graded, with two UPDATE
+    statements per exam: totals come from a correlated Sum() subquery over
+    the answers, and the exam's max marks are computed once per exam.
+    Student statistics and exam analytics are not touched; see
+    recompute_submission_totals.
+    """
+    exam_ids = set(submissions.order_by().values_list("exam_id", flat=True).distinct())
+    if not exam_ids:
+        return 0
+    exam_totals = exam_max_marks(exam_ids)
+
+    answer_total = Subquery(
+        SubmissionAnswer.objects.filter(submission_id=OuterRef("pk"))
+        .order_by()
+        .values("submission_id")
+        .annotate(total=Sum("awarded_marks"))
+        .values("total")
+    )
+    score_field = Submission._meta.get_field("total_score")
+    percentage_field = Submission._meta.get_field("percentage")
+
+    now = timezone.now()
+    updated = 0
+    for exam_id in exam_ids:
+        exam_total = exam_totals.get(exam_id) or 0
+        rows = submissions.filter(exam_id=exam_id)
+
+        rows.update(total_score=Round(
+            Coalesce(answer_total, Value(0.0)), score_field.decimal_places, output_field=score_field
+        ))
+
+        # Second statement, so percentage is derived from the stored (rounded)
+        # total like _finalize_submission does
+        if exam_total > 0:
+            # Rounded half up in exact integer arithmetic, matching
+            # _as_stored: floating point division would turn some half-way
+            # ratios (1.01 / 8 = 12.625%) into 12.62 or 12.63 depending on
+            # representation error
+            scale = 10 ** percentage_field.decimal_places
+            total_units = Cast(
+                Round(F("total_score") * (10 ** score_field.decimal_places)), output_field=IntegerField()
+            )
+            # percentage * scale = total_units * 100 * scale / (exam_total * 10^places)
+            numerator = total_units * (100 * scale)
+            denominator = exam_total * 10 ** score_field.decimal_places
+            # Both operands are integers, so / truncates (SQLite, PostgreSQL)
+            scaled = ExpressionWrapper(
+                (numerator * 2 + denominator) / (denominator * 2), output_field=IntegerField()
+            )
+            percentage = Round(
+                Cast(
+                    ExpressionWrapper(scaled / float(scale), output_field=FloatField()),
+                    output_field=percentage_field,
+                ),
+                percentage_field.decimal_places,
+            )
+        else:
+            percentage = Value(Decimal("0.00"), output_field=percentage_field)
+        updated += rows.update(
+            percentage=percentage,
+            passed=GreaterThanOrEqual(percentage, 50),
+            status="graded",
+            graded_at=now,
+        )
+    return updated
+
+
+def recompute_submission_totals(submission_ids) -> int:
+    """
+    Refresh the score fields of already graded submissions from their
+    answers' awarded_marks and rebuild the affected students' statistics.
+    Exam analytics are left to the caller (see rebuild_exam_analytics).
+    Returns the number of submissions updated.
+    """
+    submissions = Submission.objects.filter(id__in=submission_ids, status="graded")
+    student_ids = set(submissions.order_by().values_list("student_id", flat=True).distinct())
+    updated = finalize_submissions(submissions)
+    rebuild_student_stats(student_ids)
+    return updated
+
+
+# Queue states reported by queue_stats()
+QUEUE_STATUSES = ("submitted", "grading", "failed")
+
+# Longest grading_error stored; tracebacks are in the logs
+MAX_ERROR_LENGTH = 2000
+
+
+def _after_failure(error: str) -> Dict:
+    """
+    Update of a submission whose grading attempt failed: back to the queue,
+    or "failed" for good once it has used up QUEUE_MAX_ATTEMPTS
+    """
+    return {
+        "status": Case(
+            When(grading_attempts__gte=grading_setting("QUEUE_MAX_ATTEMPTS"), then=Value("failed")),
+            default=Value("submitted"),
+        ),
+        "grading_error": error[:MAX_ERROR_LENGTH],
+    }
+
+
+def requeue_stale_submissions() -> int:
+    """
+    Hand submissions abandoned by a crashed worker back to the queue, or fail
+    them if that was their last attempt. Returns how many were handled.
+    """
+    cutoff = timezone.now() - timedelta(seconds=grading_setting("QUEUE_STALE_AFTER"))
+    # Queued but out of attempts (e.g. from before the cap failed them); they
+    # can never be claimed again
+    Submission.objects.filter(
+        status="submitted", grading_attempts__gte=grading_setting("QUEUE_MAX_ATTEMPTS")
+    ).update(status="failed")
+    return Submission.objects.filter(
+        status="grading", grading_started_at__lt=cutoff
+    ).update(**_after_failure("Grading worker stopped before finishing the submission"))
+
+
+def queue_stats() -> Dict[str, int]:
+    """Submissions per queue state, including those that failed for good"""
+    counts = dict(
+        Submission.objects.filter(status__in=QUEUE_STATUSES)
+        .values_list("status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    return {status: counts.get(status, 0) for status in QUEUE_STATUSES}
+
+
+def claim_submissions(limit: int) -> List[int]:
+    """
+    Move up to `limit` queued submissions to "grading" and return their ids.
+
+    Candidates are read with SKIP LOCKED where the database supports it, and
+    each claim is a conditional update so two workers never grade the same
+    submission even on backends without row locks.
+    """
+    with transaction.atomic():
+        candidates = list(
+            Submission.objects.select_for_update(skip_locked=True)
+            .filter(
+                status="submitted",
+                grading_attempts__lt=grading_setting("QUEUE_MAX_ATTEMPTS"),
+            )
+            .order_by("submitted_at")
+            .values_list("id", flat=True)[:limit]
+        )
+
+        now = timezone.now()
+        claimed = []
+        for submission_id in candidates:
+            updated = Submission.objects.filter(id=submission_id, status="submitted").update(
+                status="grading",
+                grading_started_at=now,
+                grading_attempts=F("grading_attempts") + 1,
+            )
+            if updated:
+                claimed.append(submission_id)
+        return claimed
+
+
+def process_submission(submission_id: int) -> bool:
+    """Grade one claimed submission; failures go back to the queue"""
+    try:
+        with transaction.atomic():
+            submission = Submission.objects.only(
+                "id", "exam_id", "status", "student_id"
+            ).get(id=submission_id)
+            grade_submission(submission)
+        return True
+    except Exception as e:
+        logger.error(f"Grading error for submission {submission_id}: {str(e)}")
+        Submission.objects.filter(id=submission_id, status="grading").update(
+            **_after_failure(f"{type(e).__name__}: {e}")
+        )
+        return False
+
+
+def process_submissions(submission_ids: List[int]) -> int:
+    """
+    Grade a batch of claimed submissions together.
+
+    All of their answers go through the executor in one fan-out, so answers
+    to the same question across the batch are vectorized together. If the
+    batch fails as a whole, each submission is retried on its own.
+    """
+    if not submission_ids:
+        return 0
+
+    try:
+        with transaction.atomic():
+            submissions = list(
+                Submission.objects.filter(id__in=submission_ids).only(
+                    "id", "exam_id", "status", "student_id"
+                )
+            )
+            questions = load_questions_for_exams({s.exam_id for s in submissions})
+            answers = list(
+                SubmissionAnswer.objects.filter(submission_id__in=submission_ids).only(
+                    "id", "answer_text", "question_id", "submission_id", "awarded_marks"
+                )
+            )
+            _grade_answers(answers, questions)
+            exam_totals = exam_max_marks({s.exam_id for s in submissions})
+            for submission in submissions:
+                _finalize_submission(submission, exam_totals.get(submission.exam_id) or 0)
+        return len(submissions)
+    except Exception as e:
+        logger.error(f"Batch grading error for submissions {submission_ids}: {str(e)}")
+        return sum(process_submission(submission_id) for submission_id in submission_ids)
+
+
+def run_worker(once: bool = False, batch_size: Optional[int] = None, poll_interval: Optional[float] = None):
+    """
+    Pull submissions from the database queue until stopped.
+
+    With once=True the worker drains what is currently queued and returns,
+    which is handy for cron jobs and local runs.
+
+    SIGTERM/SIGINT stop the loop once the batch in hand is graded; the
+    grading executor's pool is then shut down, so a stopped worker leaves
+    neither claimed submissions nor pool processes behind.
+    """
+    batch_size = batch_size or grading_setting("QUEUE_BATCH_SIZE")
+    poll_interval = poll_interval or grading_setting("QUEUE_POLL_INTERVAL")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    previous_handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signum] = signal.signal(signum, stop)
+
+    graded = 0
+    next_report = time.monotonic() + STATS_REPORT_INTERVAL
+    try:
+        while not stopping:
+            close_old_connections()
+            requeue_stale_submissions()
+            claimed = claim_submissions(batch_size)
+
+            graded += process_submissions(claimed)
+
+            if claimed and time.monotonic() >= next_report:
+                _log_executor_report()
+                next_report = time.monotonic() + STATS_REPORT_INTERVAL
+
+            if not claimed:
+                if once:
+                    break
+                time.sleep(poll_interval)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        _log_executor_report()
+        # Worker processes exit without running atexit, so the pool would
+        # otherwise outlive them
+        get_executor().shutdown()
+    return graded
+
+
+def _log_executor_report():
+    for line in get_executor().report():
+        logger.info(f"Grading throughput {line}")
+    logger.info(f"Grading cache {get_grading_cache().stats()}")
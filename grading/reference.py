@@ -0,0 +1,222 @@
+import hashlib
+import math
+from collections import Counter
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from django.core.cache import cache
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from grading.cache import LRUCache
+
+
+# Same analyzer settings the grader has always used for essay similarity
+VECTORIZER_OPTIONS = {
+    "stop_words": "english",
+    "ngram_range": (1, 2),
+}
+
+# The per-answer vectorizer kept only this many terms (max_features) of the
+# combined answer + expected answer vocabulary; long essays still do
+MAX_FEATURES = 1000
+
+# Smoothed IDF of a term that only appears in one of the two documents
+# (answer, expected answer): ln((1 + 2) / (1 + 1)) + 1
+UNSHARED_IDF = math.log(1.5) + 1.0
+
+CACHE_PREFIX = "grading:reference:v2"
+CACHE_TIMEOUT = 60 * 60 * 24
+LOCAL_CACHE_SIZE = 512
+
+_analyzer = TfidfVectorizer(**VECTORIZER_OPTIONS).build_analyzer()
+
+
+def analyze(text: str) -> list:
+    """Tokenize text exactly like the similarity vectorizer does"""
+    return _analyzer(text)
+
+
+def jaccard_similarity(text1: str, text2: str) -> float:
+    """Word overlap fallback used when neither text has any usable terms"""
+    words1 = set(text1.lower().split())
+    words2 = set(text2.lower().split())
+    if not words1 or not words2:
+        return 0.0
+    union = words1 | words2
+    return len(words1 & words2) / len(union) if union else 0.0
+
+
+class ReferenceModel:
+    """
+    Compiled TF-IDF reference for a question's expected answer.
+
+    Holds the fitted vocabulary, IDF weights and the L2-normalized expected
+    answer vector, so grading an answer only needs one transform and one dot
+    product instead of fitting a new vectorizer per answer. A whole cohort of
+    answers is scored with a single sparse matrix-vector product.
+
+    Scores match the previous per-answer fit on [answer, expected_answer]
+    with max_features=MAX_FEATURES: terms present in both texts weigh 1,
+    terms present in only one weigh UNSHARED_IDF, and both vectors are
+    L2-normalized. Answers whose combined vocabulary exceeds the cap are
+    scored one by one over the same capped vocabulary the vectorizer kept.
+    """
+
+    def __init__(self, expected_answer: str):
+        self.expected_answer = expected_answer
+        self.digest = reference_digest(expected_answer)
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0)
+        self.vector = np.zeros(0)
+        self.vector_sq = np.zeros(0)
+        self.expected_counts: Counter = Counter()
+
+        if not expected_answer or not expected_answer.strip():
+            return
+
+        vectorizer = TfidfVectorizer(**VECTORIZER_OPTIONS)
+        try:
+            matrix = vectorizer.fit_transform([expected_answer])
+        except ValueError:
+            # Only stop words - nothing to compare against
+            return
+
+        self.vocabulary = dict(vectorizer.vocabulary_)
+        self.expected_counts = Counter(analyze(expected_answer))
+        self.idf = vectorizer.idf_
+        self.vector = matrix.toarray()[0]
+        self.vector_sq = self.vector ** 2
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.vocabulary
+
+    def transform(self, answer_texts: Sequence[str]):
+        """
+        Project answers onto the reference vocabulary in one pass.
+
+        Returns a sparse (answers x vocabulary) term-count matrix, the squared
+        norm of each answer's full term counts (including terms outside the
+        vocabulary), a mask of answers that produced any terms at all and the
+        size of each answer's combined vocabulary with the expected answer.
+        """
+        rows, cols, data = [], [], []
+        answer_sq = np.zeros(len(answer_texts))
+        has_terms = np.zeros(len(answer_texts), dtype=bool)
+        combined_terms = np.full(len(answer_texts), len(self.vocabulary))
+
+        for row, text in enumerate(answer_texts):
+            counts = Counter(analyze(text)) if text.strip() else None
+            if not counts:
+                continue
+            has_terms[row] = True
+            answer_sq[row] = sum(count * count for count in counts.values())
+            for term, count in counts.items():
+                index = self.vocabulary.get(term)
+                if index is not None:
+                    rows.append(row)
+                    cols.append(index)
+                    data.append(count)
+                else:
+                    combined_terms[row] += 1
+
+        matrix = sparse.csr_matrix(
+            (data, (rows, cols)),
+            shape=(len(answer_texts), len(self.vocabulary)),
+            dtype=float,
+        )
+        return matrix, answer_sq, has_terms, combined_terms
+
+    def similarity(self, answer_text: str) -> float:
+        """Cosine similarity between an answer and the expected answer"""
+        return float(self.similarity_many([answer_text])[0])
+
+    def similarity_many(self, answer_texts: Sequence[str]) -> np.ndarray:
+        """Cosine similarity of every answer against the expected answer"""
+        scores = np.zeros(len(answer_texts))
+        if not answer_texts or not self.expected_answer.strip():
+            return scores
+
+        matrix, answer_sq, has_terms, combined_terms = self.transform(answer_texts)
+
+        if self.is_empty:
+            # Neither side has usable terms: fall back to raw word overlap
+            for row, text in enumerate(answer_texts):
+                if text.strip() and not has_terms[row]:
+                    scores[row] = jaccard_similarity(text, self.expected_answer)
+            return scores
+
+        dot = matrix @ self.vector
+        shared_answer_sq = np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel()
+        shared_expected_sq = matrix.sign() @ self.vector_sq
+
+        weight_sq = UNSHARED_IDF ** 2
+        answer_norm = np.sqrt(np.maximum(weight_sq * answer_sq - (weight_sq - 1) * shared_answer_sq, 0))
+        expected_norm = np.sqrt(np.maximum(weight_sq - (weight_sq - 1) * shared_expected_sq, 0))
+
+        valid = has_terms & (answer_norm > 0) & (expected_norm > 0)
+        scores[valid] = np.minimum(1.0, dot[valid] / (answer_norm[valid] * expected_norm[valid]))
+
+        for row in np.flatnonzero(has_terms & (combined_terms > MAX_FEATURES)):
+            scores[row] = self.capped_similarity(Counter(analyze(answer_texts[row])))
+        return scores
+
+    def capped_similarity(self, counts: Counter) -> float:
+        """
+        Similarity over the MAX_FEATURES most frequent terms of the answer and
+        expected answer together, picked exactly like CountVectorizer does
+        (argsort of the negated totals over the alphabetically sorted terms)
+        """
+        terms = sorted(counts.keys() | self.expected_counts.keys())
+        answer = np.array([counts[term] for term in terms], dtype=np.int64)
+        expected = np.array([self.expected_counts[term] for term in terms], dtype=np.int64)
+        kept = (-(answer + expected)).argsort()[:MAX_FEATURES]
+        answer, expected = answer[kept].astype(float), expected[kept].astype(float)
+
+        weight = np.where((answer > 0) & (expected > 0), 1.0, UNSHARED_IDF)
+        answer_norm = np.linalg.norm(weight * answer)
+        expected_norm = np.linalg.norm(weight * expected)
+        if not answer_norm or not expected_norm:
+            return 0.0
+        return float(min(1.0, (answer @ expected) / (answer_norm * expected_norm)))
+
+
+def reference_digest(expected_answer: str) -> str:
+    return hashlib.sha256((expected_answer or "").encode("utf-8")).hexdigest()
+
+
+_local_cache = LRUCache(LOCAL_CACHE_SIZE)
+
+
+def _cache_key(digest: str) -> str:
+    return f"{CACHE_PREFIX}:{digest}"
+
+
+def compile_reference_model(question) -> ReferenceModel:
+    """Build the reference model for a question and store it in both caches"""
+    model = ReferenceModel(question.expected_answer or "")
+    key = _cache_key(model.digest)
+    _local_cache.set(key, model)
+    cache.set(key, model, timeout=CACHE_TIMEOUT)
+    return model
+
+
+def get_reference_model(question) -> ReferenceModel:
+    """
+    Return the compiled reference model for a question.
+
+    Models are keyed by a digest of the expected answer, so editing
+    expected_answer automatically invalidates the previous artifact.
+    """
+    key = _cache_key(reference_digest(question.expected_answer))
+    model: Optional[ReferenceModel] = _local_cache.get(key)
+    if model is not None:
+        return model
+
+    model = cache.get(key)
+    if model is not None:
+        _local_cache.set(key, model)
+        return model
+
+    return compile_reference_model(question)
@@ -0,0 +1,129 @@
+"""
+Bulk regrading of graded answers after a question's expected_answer or
+keywords change.
+
+A RegradeJob streams the affected answers in primary-key order with
+iterator(), grades each chunk through the batched pipeline path, writes
+awarded_marks back with bulk_update and recomputes the touched submissions'
+totals set-wise, all in one transaction per chunk. The job's checkpoint
+(last_answer_id) is committed with the chunk, so an interrupted job resumes
+after the last completed chunk and memory stays bounded by the chunk size.
+"""
+import logging
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from Acad_ai_app.analytics import rebuild_exam_analytics
+from Acad_ai_app.models import Question, RegradeJob, SubmissionAnswer
+from grading.conf import grading_setting
+from grading.pipeline import GRADING_QUESTION_FIELDS, _grade_answers, recompute_submission_totals
+
+logger = logging.getLogger(__name__)
+
+
+def create_regrade_job(exam_id: int, question_ids: Optional[Iterable[int]] = None,
+                       created_by_id: Optional[int] = None) -> RegradeJob:
+    return RegradeJob.objects.create(
+        exam_id=exam_id,
+        question_ids=sorted(set(question_ids or [])),
+        created_by_id=created_by_id,
+    )
+
+
+def _questions(job: RegradeJob) -> Dict[int, Question]:
+    questions = Question.objects.filter(exam_id=job.exam_id)
+    if job.question_ids:
+        questions = questions.filter(id__in=job.question_ids)
+    return {q.id: q for q in questions.only(*GRADING_QUESTION_FIELDS)}
+
+
+def _remaining_answers(job: RegradeJob, question_ids: List[int]):
+    return (
+        SubmissionAnswer.objects.filter(
+            question_id__in=question_ids,
+            submission__status="graded",
+            id__gt=job.last_answer_id,
+        )
+        .only("id", "answer_text", "question_id", "submission_id", "awarded_marks")
+        .order_by("id")
+    )
+
+
+def _regrade_chunk(job: RegradeJob, answers: List[SubmissionAnswer], questions: Dict[int, Question]):
+    with transaction.atomic():
+        _grade_answers(answers, questions)
+        recompute_submission_totals({answer.submission_id for answer in answers})
+
+        job.last_answer_id = answers[-1].id
+        job.processed_answers += len(answers)
+        job.save(update_fields=["last_answer_id", "processed_answers"])
+
+
+def run_regrade_job(job: RegradeJob, chunk_size: Optional[int] = None,
+                    progress: Optional[Callable[[RegradeJob], None]] = None) -> RegradeJob:
+    """
+    Run (or resume) a regrade job to completion. `progress` is called with
+    the job after every committed chunk.
+    """
+    chunk_size = chunk_size or grading_setting("REGRADE_CHUNK_SIZE")
+    questions = _questions(job)
+    answers = _remaining_answers(job, list(questions))
+
+    job.status = "running"
+    job.started_at = job.started_at or timezone.now()
+    job.total_answers = job.processed_answers + answers.count()
+    job.error = ""
+    job.save(update_fields=["status", "started_at", "total_answers", "error"])
+
+    try:
+        chunk = []
+        for answer in answers.iterator(chunk_size=chunk_size):
+            chunk.append(answer)
+            if len(chunk) >= chunk_size:
+                _regrade_chunk(job, chunk, questions)
+                chunk = []
+                if progress:
+                    progress(job)
+        if chunk:
+            _regrade_chunk(job, chunk, questions)
+            if progress:
+                progress(job)
+
+        rebuild_exam_analytics([job.exam_id])
+    except Exception as e:
+        logger.error(f"Regrade job {job.id} failed after {job.processed_answers} answers: {str(e)}")
+        job.status = "failed"
+        job.error = str(e)
+        job.save(update_fields=["status", "error"])
+        return job
+
+    job.status = "completed"
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    return job
+
+
+def claim_regrade_job() -> Optional[RegradeJob]:
+    """Take the oldest queued job, making sure no other runner gets it too"""
+    for job_id in (
+        RegradeJob.objects.filter(status="queued").order_by("created_at").values_list("id", flat=True)[:10]
+    ):
+        if RegradeJob.objects.filter(id=job_id, status="queued").update(
+            status="running", started_at=timezone.now()
+        ):
+            return RegradeJob.objects.get(id=job_id)
+    return None
+
+
+def run_pending_regrades(chunk_size: Optional[int] = None,
+                         progress: Optional[Callable[[RegradeJob], None]] = None) -> int:
+    """Run queued regrade jobs until none are left; returns how many ran"""
+    ran = 0
+    while True:
+        job = claim_regrade_job()
+        if job is None:
+            return ran
+        run_regrade_job(job, chunk_size=chunk_size, progress=progress)
+        ran += 1
@@ -0,0 +1,434 @@
+import random
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from Acad_ai_app.models import Exam, Question, Submission, SubmissionAnswer
+from Acad_ai_app.stats import get_student_stats, rebuild_student_stats
+from course_module.models import Course
+from grading.answer_key import CORRECT_FEEDBACK, AnswerKey
+from grading.benchmark import build_exam, compare_to_baseline, run_cohort
+from grading.cache import GradingCache, question_version
+from grading.executor import GradingExecutor
+from grading.keywords import KeywordMatcher
+from grading.pipeline import (
+    _finalize_submission,
+    claim_submissions,
+    finalize_submissions,
+    grade_submission,
+    process_submission,
+    queue_stats,
+    recompute_submission_totals,
+    requeue_stale_submissions,
+)
+from grading.reference import MAX_FEATURES, ReferenceModel
+
+
+def create_exam(questions=()):
+    """An exam with the given (question_type, expected_answer, marks, extra) questions"""
+    staff = get_user_model().objects.create_user(
+        f"staff{Exam.objects.count()}", f"staff{Exam.objects.count()}@example.com", user_type="staff"
+    )
+    course, _ = Course.objects.get_or_create(code="T100", defaults={"name": "Testing"})
+    exam = Exam.objects.create(course=course, title="Exam", duration_minutes=30, created_by=staff)
+    for question_type, expected_answer, marks, extra in questions:
+        Question.objects.create(
+            exam=exam, text="Question", question_type=question_type,
+            expected_answer=expected_answer, marks=marks, **extra,
+        )
+    return exam
+
+
+def create_submission(exam, student, answers=(), **fields):
+    """A submission with answers given as (question, answer_text) pairs"""
+    submission = Submission.objects.create(student=student, exam=exam, **fields)
+    SubmissionAnswer.objects.bulk_create([
+        SubmissionAnswer(submission=submission, question=question, answer_text=answer_text)
+        for question, answer_text in answers
+    ])
+    return submission
+
+
+def _essay(rng: random.Random, words: int) -> str:
+    vocabulary = [f"term{i}" for i in range(4000)] + ["photosynthesis", "chlorophyll", "glucose"]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+class ReferenceModelTests(SimpleTestCase):
+    """Similarity must match the per-answer vectorizer it replaced"""
+
+    @staticmethod
+    def fitted_similarity(answer_text: str, expected_answer: str) -> float:
+        vectorizer = TfidfVectorizer(stop_words="english", max_features=MAX_FEATURES, ngram_range=(1, 2))
+        matrix = vectorizer.fit_transform([answer_text, expected_answer])
+        return float(cosine_similarity(matrix[0:1], matrix[1:2])[0][0])
+
+    def assert_matches_fit(self, expected_answer, answers):
+        scores = ReferenceModel(expected_answer).similarity_many(answers)
+        for answer_text, score in zip(answers, scores):
+            self.assertAlmostEqual(score, self.fitted_similarity(answer_text, expected_answer), places=10)
+
+    def test_short_answers(self):
+        self.assert_matches_fit(
+            "Photosynthesis converts light energy into chemical energy stored in glucose",
+            [
+                "Plants use light energy to make glucose",
+                "photosynthesis converts light energy into chemical energy stored in glucose",
+                "Mitochondria are the powerhouse of the cell",
+            ],
+        )
+
+    def test_long_essays_use_capped_vocabulary(self):
+        rng = random.Random(7)
+        expected_answer = _essay(rng, 1200)
+        answers = [_essay(rng, 1500), _essay(rng, 2500), expected_answer, _essay(rng, 40)]
+        self.assert_matches_fit(expected_answer, answers)
+
+    def test_long_expected_answer(self):
+        rng = random.Random(11)
+        self.assert_matches_fit(_essay(rng, 3000), [_essay(rng, 30), _essay(rng, 300)])
+
+
+@override_settings(GRADING={"QUEUE_MAX_ATTEMPTS": 2, "QUEUE_STALE_AFTER": 60})
+class GradingQueueTests(TestCase):
+    def setUp(self):
+        self.exam = create_exam([("true_false", "true", 1, {})])
+        self.question = self.exam.questions.get()
+        self.student = get_user_model().objects.create_user("student", "student@example.com")
+
+    def queue(self, count=1, **fields):
+        return [
+            create_submission(self.exam, self.student, [(self.question, "true")], status="submitted", **fields)
+            for _ in range(count)
+        ]
+
+    def test_claims_oldest_first_and_never_twice(self):
+        submissions = self.queue(3)
+        first = claim_submissions(2)
+        second = claim_submissions(2)
+
+        self.assertEqual(first, [submissions[0].id, submissions[1].id])
+        self.assertEqual(second, [submissions[2].id])
+        self.assertEqual(claim_submissions(2), [])
+        claimed = Submission.objects.get(id=submissions[0].id)
+        self.assertEqual((claimed.status, claimed.grading_attempts), ("grading", 1))
+
+    def test_skips_rows_claimed_by_another_worker(self):
+        taken, free = self.queue(2)
+        real_filter = Submission.objects.filter
+
+        def other_worker_first(*args, **kwargs):
+            # Another worker claims the row between the candidate read and our update
+            if kwargs.get("id") == taken.id:
+                real_filter(id=taken.id).update(status="grading")
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(Submission.objects, "filter", side_effect=other_worker_first):
+            self.assertEqual(claim_submissions(10), [free.id])
+
+    @skipUnlessDBFeature("has_select_for_update_skip_locked")
+    def test_candidates_are_read_with_skip_locked(self):
+        self.queue()
+        with CaptureQueriesContext(connection) as queries:
+            claim_submissions(1)
+        self.assertTrue(any("SKIP LOCKED" in query["sql"] for query in queries.captured_queries))
+
+    def test_submissions_out_of_attempts_are_not_claimed(self):
+        self.queue(grading_attempts=2)
+        self.assertEqual(claim_submissions(10), [])
+
+    def test_failing_submission_is_retried_then_failed(self):
+        (submission,) = self.queue()
+        with mock.patch("grading.pipeline.grade_submission", side_effect=ValueError("boom")):
+            for attempt, status in ((1, "submitted"), (2, "failed")):
+                self.assertEqual(claim_submissions(1), [submission.id])
+                with self.assertLogs("grading.pipeline", "ERROR"):
+                    self.assertFalse(process_submission(submission.id))
+                submission.refresh_from_db()
+                self.assertEqual((submission.grading_attempts, submission.status), (attempt, status))
+
+        self.assertEqual(submission.grading_error, "ValueError: boom")
+        self.assertEqual(claim_submissions(1), [])
+        self.assertEqual(queue_stats(), {"submitted": 0, "grading": 0, "failed": 1})
+
+    def test_stale_claims_are_requeued_or_failed(self):
+        long_ago = timezone.now() - timedelta(minutes=5)
+        retry, exhausted = self.queue(2)
+        Submission.objects.filter(id=retry.id).update(
+            status="grading", grading_started_at=long_ago, grading_attempts=1
+        )
+        Submission.objects.filter(id=exhausted.id).update(
+            status="grading", grading_started_at=long_ago, grading_attempts=2
+        )
+        stuck = self.queue(grading_attempts=2)[0]
+
+        self.assertEqual(requeue_stale_submissions(), 2)
+        statuses = dict(Submission.objects.values_list("id", "status"))
+        self.assertEqual(statuses, {retry.id: "submitted", exhausted.id: "failed", stuck.id: "failed"})
+
+    def test_processing_grades_the_claimed_submission(self):
+        (submission,) = self.queue()
+        claim_submissions(1)
+        self.assertTrue(process_submission(submission.id))
+        submission.refresh_from_db()
+        self.assertEqual((submission.status, submission.total_score), ("graded", 1))
+
+
+class FinalizeSubmissionsTests(TestCase):
+    """The set-based totals must agree with grading one submission at a time"""
+
+    def setUp(self):
+        self.exam = create_exam([
+            ("true_false", "true", 1, {}),
+            ("mcq", "Chlorophyll", 2, {"choices": ["Keratin", "Chlorophyll"]}),
+        ])
+        self.questions = list(self.exam.questions.order_by("id"))
+        self.students = [
+            get_user_model().objects.create_user(f"student{i}", f"student{i}@example.com")
+            for i in range(3)
+        ]
+        self.submissions = []
+        for student, answers in zip(self.students, (("true", "b"), ("false", "b"), ("false", "a"))):
+            submission = create_submission(self.exam, student, zip(self.questions, answers))
+            grade_submission(submission)
+            self.submissions.append(submission)
+
+    def scores(self):
+        return list(
+            Submission.objects.filter(id__in=[s.id for s in self.submissions])
+            .order_by("id")
+            .values_list("total_score", "percentage", "passed", "status")
+        )
+
+    def test_matches_per_submission_finalize(self):
+        graded = self.scores()
+        self.assertEqual(finalize_submissions(Submission.objects.filter(exam=self.exam)), 3)
+        self.assertEqual(self.scores(), graded)
+        self.assertEqual(
+            [(float(total), float(percentage), passed) for total, percentage, passed, _ in graded],
+            [(3.0, 100.0, True), (2.0, 66.67, True), (0.0, 0.0, False)],
+        )
+
+    def test_recompute_after_marks_change(self):
+        SubmissionAnswer.objects.filter(question=self.questions[1]).update(awarded_marks=0)
+        SubmissionAnswer.objects.filter(
+            submission=self.submissions[2], question=self.questions[0]
+        ).update(awarded_marks=1)
+        before = [get_student_stats(student.id) for student in self.students]
+
+        self.assertEqual(recompute_submission_totals([s.id for s in self.submissions]), 3)
+        self.assertEqual(
+            [(float(total), float(percentage), passed) for total, percentage, passed, _ in self.scores()],
+            [(1.0, 33.33, False), (0.0, 0.0, False), (1.0, 33.33, False)],
+        )
+        after = [get_student_stats(student.id) for student in self.students]
+        self.assertNotEqual(after, before)
+        rebuild_student_stats()
+        self.assertEqual(after, [get_student_stats(student.id) for student in self.students])
+
+    def test_half_cent_percentages_round_the_same_way(self):
+        exam = create_exam([("short", "Glucose", 8, {})])
+        question = exam.questions.get()
+        submissions = []
+        for index, marks in enumerate(("1.01", "3.17", "0.05", "7.99")):
+            student = get_user_model().objects.create_user(f"half{index}", f"half{index}@example.com")
+            submission = create_submission(exam, student, [(question, "answer")])
+            SubmissionAnswer.objects.filter(submission=submission).update(awarded_marks=marks)
+            _finalize_submission(submission, 8)
+            submissions.append(submission)
+        rows = Submission.objects.filter(exam=exam).order_by("id")
+        one_at_a_time = list(rows.values_list("total_score", "percentage"))
+
+        finalize_submissions(rows)
+        self.assertEqual(list(rows.values_list("total_score", "percentage")), one_at_a_time)
+        # 12.625%, 39.625%, 0.625% and 99.875% round half up
+        self.assertEqual(
+            [float(percentage) for _, percentage in one_at_a_time], [12.63, 39.63, 0.63, 99.88]
+        )
+
+    def test_submissions_without_answers_score_zero(self):
+        student = get_user_model().objects.create_user("empty", "empty@example.com")
+        submission = create_submission(self.exam, student, status="submitted")
+        self.assertEqual(finalize_submissions(Submission.objects.filter(id=submission.id)), 1)
+        submission.refresh_from_db()
+        self.assertEqual(
+            (float(submission.total_score), float(submission.percentage), submission.passed, submission.status),
+            (0.0, 0.0, False, "graded"),
+        )
+
+    def test_only_graded_submissions_are_recomputed(self):
+        Submission.objects.filter(id=self.submissions[0].id).update(status="failed")
+        self.assertEqual(recompute_submission_totals([s.id for s in self.submissions]), 2)
+
+
+class GradingCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.question = Question(
+            id=1, question_type="short", expected_answer="Light energy", marks=5,
+            keywords=["light"], min_word_count=None, choices=None,
+        )
+        self.result = (4.0, "Good", {"grading_type": "essay"})
+
+    def test_hit_ignores_case_and_surrounding_whitespace(self):
+        GradingCache().set(self.question, "Plants use light", self.result)
+        self.assertEqual(GradingCache().get(self.question, "  plants USE light "), self.result)
+        self.assertIsNone(GradingCache().get(self.question, "plants use light energy"))
+
+    def test_editing_the_question_invalidates_results(self):
+        grading_cache = GradingCache()
+        grading_cache.set(self.question, "Plants use light", self.result)
+        version = question_version(self.question)
+
+        for field, value in (
+            ("expected_answer", "Chemical energy"),
+            ("keywords", ["light", "glucose"]),
+            ("marks", 10),
+            ("question_type", "essay"),
+            ("min_word_count", 50),
+        ):
+            edited = Question(**{
+                name: getattr(self.question, name)
+                for name in ("id", "question_type", "expected_answer", "marks", "keywords",
+                             "min_word_count", "choices")
+            })
+            setattr(edited, field, value)
+            with self.subTest(field=field):
+                self.assertNotEqual(question_version(edited), version)
+                self.assertIsNone(grading_cache.get(edited, "Plants use light"))
+
+        self.assertEqual(grading_cache.get(self.question, "Plants use light"), self.result)
+
+    def test_keyword_options_are_part_of_the_version(self):
+        version = question_version(self.question)
+        with override_settings(GRADING={"KEYWORD_STEMMING": True}):
+            self.assertNotEqual(question_version(self.question), version)
+
+    def test_failures_are_not_cached(self):
+        grading_cache = GradingCache()
+        grading_cache.set(self.question, "answer", (0.0, "Grading failed", {"grading_type": "error"}))
+        self.assertIsNone(grading_cache.get(self.question, "answer"))
+        self.assertEqual(grading_cache.stats()["misses"], 1)
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    def test_whole_words_only(self):
+        matcher = KeywordMatcher(["cell", "light"])
+        self.assertEqual(matcher.find("An excellent answer about sunlight"), [])
+        self.assertEqual(matcher.find("Each Cell absorbs light."), ["cell", "light"])
+
+    def test_substring_mode_keeps_legacy_behaviour(self):
+        matcher = KeywordMatcher(["cell"], word_boundary=False)
+        self.assertEqual(matcher.find("An excellent answer"), ["cell"])
+
+    def test_phrases_and_punctuation(self):
+        matcher = KeywordMatcher(["light energy", "C++", "carbon dioxide"])
+        self.assertEqual(
+            matcher.find("Written in C++, it turns light energy into light"),
+            ["light energy", "C++"],
+        )
+        self.assertEqual(matcher.find("energy light"), [])
+
+    def test_overlapping_phrases_are_all_found(self):
+        matcher = KeywordMatcher(["light", "light energy", "energy"])
+        self.assertEqual(matcher.find("light energy"), ["light", "light energy", "energy"])
+
+    def test_stemming_matches_inflected_forms(self):
+        matcher = KeywordMatcher(["cell", "study", "run"], stemming=True)
+        self.assertEqual(matcher.find("Cells were studying while running"), ["cell", "study", "run"])
+        self.assertEqual(KeywordMatcher(["cell"]).find("cells"), [])
+
+    def test_stemming_leaves_short_words_alone(self):
+        matcher = KeywordMatcher(["use"], stemming=True)
+        self.assertEqual(matcher.find("us"), [])
+
+    def test_duplicate_keywords_count_separately(self):
+        matcher = KeywordMatcher(["Light", "light", "glucose"])
+        self.assertEqual(matcher.score("light"), (2 / 3, ["Light", "light"]))
+        self.assertEqual(KeywordMatcher([]).score("anything"), (0.5, []))
+
+
+class AnswerKeyTests(SimpleTestCase):
+    def setUp(self):
+        self.mcq = Question(
+            id=1, question_type="mcq", expected_answer="Chlorophyll", marks=4,
+            choices=["Keratin", "Chlorophyll", "Melanin"],
+        )
+        self.true_false = Question(id=2, question_type="true_false", expected_answer="True", marks=1)
+        self.short = Question(id=3, question_type="short", expected_answer="Glucose", marks=5)
+        self.key = AnswerKey([self.mcq, self.true_false, self.short])
+
+    def marks(self, question, *answers):
+        return [awarded for awarded, _, _ in self.key.grade([(question, answer) for answer in answers])]
+
+    def test_choice_text_or_letter(self):
+        self.assertEqual(
+            self.marks(self.mcq, "Chlorophyll", "  chlorophyll ", "b", "B", "a", "Melanin", "d", ""),
+            [4, 4, 4, 4, 0, 0, 0, 0],
+        )
+
+    def test_expected_answer_given_as_letter(self):
+        question = Question(id=1, question_type="mcq", expected_answer="c", marks=1,
+                            choices=["Keratin", "Chlorophyll", "Melanin"])
+        key = AnswerKey([question])
+        self.assertEqual([grade[0] for grade in key.grade([(question, "Melanin"), (question, "c")])], [1, 1])
+        self.assertEqual(key.grade([(question, "a")])[0][1], "Incorrect. The correct answer is: Melanin")
+
+    def test_choices_that_are_letters_win_over_positions(self):
+        question = Question(id=1, question_type="mcq", expected_answer="b", marks=1, choices=["b", "a"])
+        key = AnswerKey([question])
+        self.assertEqual([grade[0] for grade in key.grade([(question, "b"), (question, "a")])], [1, 0])
+
+    def test_expected_answer_outside_the_choices(self):
+        question = Question(id=1, question_type="mcq", expected_answer="Carotene", marks=2,
+                            choices=["Keratin", "Chlorophyll"])
+        key = AnswerKey([question])
+        self.assertEqual(
+            [grade[0] for grade in key.grade([(question, "carotene"), (question, "c"), (question, "a")])],
+            [2, 0, 0],
+        )
+
+    def test_true_false_without_choices(self):
+        self.assertEqual(self.marks(self.true_false, "true", "TRUE", "false", "a"), [1, 1, 0, 0])
+
+    def test_only_objective_questions_are_keyed(self):
+        self.assertIn(self.mcq, self.key)
+        self.assertNotIn(self.short, self.key)
+        self.assertEqual(len(self.key), 2)
+
+    def test_feedback_and_metadata_keep_input_order(self):
+        grades = self.key.grade([(self.true_false, "false"), (self.mcq, "b")])
+        self.assertEqual(grades[0][1], "Incorrect. The correct answer is: True")
+        self.assertEqual(grades[1], (4.0, CORRECT_FEEDBACK, {
+            "grading_type": "exact_match", "is_correct": True, "algorithm": "answer_key",
+        }))
+
+
+class GradingBenchmarkTests(SimpleTestCase):
+    def results(self, **meta):
+        cohort = {"types": {"mcq": {"answers_per_second": 100.0, "p95_ms": 1.0}}, "peak_rss_mb": 100.0}
+        return {
+            "meta": {"executor": "inline", "executor_workers": 1, "cpu_count": 1, "seed": 0,
+                     "exam_mix": {"mcq": 1}, **meta},
+            "cohorts": {"10": cohort},
+        }
+
+    def test_baselines_from_other_settings_are_refused(self):
+        baseline = self.results()
+        self.assertEqual(compare_to_baseline(self.results(created_at="later"), baseline, 0.2), [])
+        with self.assertRaisesMessage(ValueError, "executor: process (baseline inline)"):
+            compare_to_baseline(self.results(executor="process"), baseline, 0.2)
+
+    def test_warm_up_is_not_counted(self):
+        executor = GradingExecutor(mode="inline", workers=1)
+        results = run_cohort(build_exam({"mcq": 1, "short": 1}), 3, executor)
+        self.assertEqual({t: m["answers"] for t, m in results["types"].items()}, {"mcq": 3, "short": 3})
+        self.assertEqual(sum(stats["answers"] for stats in executor.stats().values()), 6)
@@ -0,0 +1,43 @@
+"""
+Compact JSON encoding for plain data (dicts, lists and the values()/
+values_list() types: Decimal, datetime, date, time, UUID).
+
+Output matches what DRF serializers plus JSONRenderer produce for the same
+fields under the default settings: decimals as strings, datetimes in ISO
+8601 with "Z" for UTC, no whitespace, non-ASCII left as is. orjson is used
+when it is installed, the standard library encoder otherwise.
+"""
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            data,
+            default=_default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(
+        data, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode()
@@ -0,0 +1,124 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, Optional, Sequence
+
+# Upper bounds of the latency buckets, in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Upper bounds of the per-request SQL query count buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+
+class Histogram:
+    """Fixed-bucket histogram with sum, count and max"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percentile: float) -> float:
+        """Upper bound of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = percentile / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict:
+        buckets = {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.status = defaultdict(int)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.timings = {
+            name: Histogram(LATENCY_BUCKETS_MS)
+            for name in ("db_ms", "view_ms", "serialize_ms", "total_ms")
+        }
+
+    def snapshot(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "status": dict(self.status),
+            "queries": self.queries.snapshot(),
+            **{name: histogram.snapshot() for name, histogram in self.timings.items()},
+        }
+
+
+class MetricsRegistry:
+    """
+    In-process request metrics, keyed by "<METHOD> <route>".
+
+    Each gunicorn worker keeps its own registry; numbers cover the requests
+    that worker served since it started (or since the last reset).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteMetrics] = defaultdict(RouteMetrics)
+        self._timers: Dict[str, Histogram] = {}
+
+    def record_request(self, route: str, status_code: int, queries: Optional[int],
+                       db_ms: Optional[float], view_ms: float, serialize_ms: float,
+                       total_ms: float):
+        """queries and db_ms are None when unknown (streaming responses)"""
+        with self._lock:
+            metrics = self._routes[route]
+            metrics.requests += 1
+            metrics.status[f"{status_code // 100}xx"] += 1
+            if queries is not None:
+                metrics.queries.observe(queries)
+                metrics.timings["db_ms"].observe(db_ms)
+            metrics.timings["view_ms"].observe(view_ms)
+            metrics.timings["serialize_ms"].observe(serialize_ms)
+            metrics.timings["total_ms"].observe(total_ms)
+
+    def observe(self, name: str, value_ms: float):
+        """Record a named timing outside the request cycle (e.g. hashing)"""
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = Histogram(LATENCY_BUCKETS_MS)
+            histogram.observe(value_ms)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "routes": {route: metrics.snapshot() for route, metrics in self._routes.items()},
+                "timers": {name: histogram.snapshot() for name, histogram in self._timers.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._timers.clear()
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,100 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .metrics import registry
+
+
+class _RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.view_started = None
+        self.view_finished = None
+        self.render_finished = None
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Records SQL query count, DB time, view time and serialization time for
+    every request.
+
+    "serialize" is the response rendering phase (DRF's JSON rendering of
+    Response data); serializer work done inside the view counts as view time.
+    Timings are returned in a Server-Timing header and aggregated per route in
+    utils.metrics.registry, which staff can read from the metrics endpoint.
+
+    Streaming responses run most of their queries while the body streams,
+    after the headers are sent and this middleware has returned, so the db
+    metric and query count are left out for them rather than under-reported.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = _RequestTimings()
+        request._request_timings = timings
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings.execute_wrapper))
+            response = self.get_response(request)
+
+        finished = time.perf_counter()
+        view_started = timings.view_started or timings.started
+        view_finished = timings.view_finished or finished
+        render_finished = timings.render_finished or view_finished
+
+        total_ms = (finished - timings.started) * 1000
+        db_ms = timings.db_seconds * 1000
+        view_ms = (view_finished - view_started) * 1000
+        serialize_ms = (render_finished - view_finished) * 1000
+
+        metrics = [
+            f"view;dur={view_ms:.2f}",
+            f"serialize;dur={serialize_ms:.2f}",
+            f"total;dur={total_ms:.2f}",
+        ]
+        queries = timings.queries
+        if response.streaming:
+            queries = db_ms = None
+        else:
+            metrics.insert(0, f'db;dur={db_ms:.2f};desc="{queries} queries"')
+        response["Server-Timing"] = ", ".join(metrics)
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "<unmatched>"
+        registry.record_request(
+            f"{request.method} {route}",
+            response.status_code,
+            queries,
+            db_ms,
+            view_ms,
+            serialize_ms,
+            total_ms,
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._request_timings.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        timings = request._request_timings
+        timings.view_finished = time.perf_counter()
+
+        def rendered(response):
+            timings.render_finished = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -1,4 +1,10 @@
-from rest_framework.pagination import PageNumberPagination
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 from .responses import custom_response
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -21,3 +27,92 @@ class StandardResultsSetPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on (ordering_field, id), newest first.
+
+    Each page continues strictly after the last row of the previous one, so a
+    page costs one index range scan however deep the history goes. Back it
+    with a composite index ending in (-ordering_field, -id).
+    """
+
+    ordering_field = "submitted_at"
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def encode_cursor(self, row):
+        # Rows are model instances or values() dicts
+        if isinstance(row, dict):
+            value, pk = row[self.ordering_field], row["id"]
+        else:
+            value, pk = getattr(row, self.ordering_field), row.pk
+        raw = f"{value.isoformat()}|{pk}"
+        return urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = urlsafe_b64decode(cursor.encode()).decode()
+            value, pk = raw.rsplit("|", 1)
+            value, pk = parse_datetime(value), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+        queryset = queryset.order_by(f"-{self.ordering_field}", "-id")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{self.ordering_field}__lt": value})
+                | Q(**{self.ordering_field: value, "id__lt": pk})
+            )
+
+        # One extra row tells us whether another page exists
+        rows = list(queryset[: self.page_size_value + 1])
+        self.has_next = len(rows) > self.page_size_value
+        self.page = rows[: self.page_size_value]
+        self.next_cursor = self.encode_cursor(self.page[-1]) if self.has_next else None
+        return self.page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_data(self, data):
+        return {
+            "page_size": self.page_size_value,
+            "next_cursor": self.next_cursor,
+            "next": self.get_next_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(
+        self,
+        data,
+        message
+        ):
+        return custom_response(
+            status_code= 200,
+            message= message,
+            data = self.get_paginated_data(data),
+        )
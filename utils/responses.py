@@ -1,5 +1,10 @@
+import json
+
+from django.http import HttpResponse
 from rest_framework.response import Response
 
+from .fast_json import dumps
+
 
 def custom_response(
     *,
@@ -16,3 +21,47 @@ def custom_response(
         },
         status=status_code
     )
+
+
+def prerendered_response(
+    data: bytes,
+    *,
+    message="",
+    status_code=200,
+    success=True,
+    headers=None
+):
+    """
+    Same envelope as custom_response, around `data` that is already JSON
+    encoded (e.g. a cached payload), so it is never parsed or re-rendered.
+    """
+    body = b"".join([
+        b'{"success":', b"true" if success else b"false",
+        b',"message":', json.dumps(message).encode(),
+        b',"data":', data,
+        b"}",
+    ])
+    return HttpResponse(
+        body, content_type="application/json", status=status_code, headers=headers
+    )
+
+
+def fast_response(
+    *,
+    data=None,
+    message="",
+    status_code=200,
+    success=True,
+    headers=None
+):
+    """
+    custom_response for plain data (dicts and lists built from values()),
+    encoded with utils.fast_json instead of going through DRF's renderer.
+    """
+    return prerendered_response(
+        dumps(data),
+        message=message,
+        status_code=status_code,
+        success=success,
+        headers=headers,
+    )
@@ -0,0 +1,93 @@
+"""
+Streaming readers for CSV and JSONL uploads, shared by the bulk import
+paths (question banks, student rosters).
+
+Rows are read lazily from the file, so memory does not depend on its size.
+CSV files need a header row. List fields are given in CSV either as a JSON
+array or as values separated by "|".
+"""
+import csv
+import io
+import json
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# (line number, row data, None) or (line number, None, errors)
+Row = Tuple[int, Optional[Dict], Optional[Dict]]
+
+
+class ImportFormatError(ValueError):
+    """The file as a whole cannot be read in the requested format"""
+
+
+def detect_format(filename: str, requested: Optional[str] = None) -> str:
+    if requested:
+        requested = requested.lower()
+        if requested not in IMPORT_FORMATS:
+            raise ImportFormatError(f"Unsupported format '{requested}' (use csv or jsonl)")
+        return requested
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ImportFormatError("Cannot tell the file format from its name; pass file_format=csv or jsonl")
+
+
+def _text_stream(fileobj) -> io.TextIOBase:
+    # Uploaded files wrap the underlying (in-memory or temporary) file object
+    raw = getattr(fileobj, "file", fileobj)
+    if isinstance(raw, io.TextIOBase):
+        return raw
+    return io.TextIOWrapper(raw, encoding="utf-8-sig", newline="")
+
+
+def _csv_row(row: Dict, list_fields: Sequence[str]) -> Dict:
+    data = {}
+    for field, value in row.items():
+        if field is None:
+            # More cells than header columns
+            raise ValueError("Row has more columns than the header")
+        field = field.strip()
+        value = (value or "").strip()
+        if value == "":
+            continue
+        if field in list_fields:
+            value = json.loads(value) if value.startswith("[") else [
+                item.strip() for item in value.split("|") if item.strip()
+            ]
+        data[field] = value
+    return data
+
+
+def iter_rows(fileobj, fmt: str, list_fields: Sequence[str] = ()) -> Iterator[Row]:
+    """
+    Yield (line number, row data, None) per row, or (line number, None,
+    errors) for rows that cannot even be parsed.
+    """
+    stream = _text_stream(fileobj)
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV file is empty or has no header row")
+        for row in reader:
+            try:
+                yield reader.line_num, _csv_row(row, list_fields), None
+            except ValueError as exc:
+                yield reader.line_num, None, {"non_field_errors": [str(exc)]}
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield line_number, None, {"non_field_errors": [f"Invalid JSON: {exc}"]}
+            continue
+        if not isinstance(data, dict):
+            yield line_number, None, {"non_field_errors": ["Expected a JSON object"]}
+            continue
+        yield line_number, data, None
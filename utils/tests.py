@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from Acad_ai_app.models import Exam, Submission
+from course_module.models import Course
+from utils.metrics import MetricsRegistry
+from utils.middleware import RequestMetricsMiddleware
+from utils.pagination import KeysetPagination
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user("student", "student@example.com")
+        course = Course.objects.create(name="Testing", code="T100")
+        exam = Exam.objects.create(course=course, title="Exam", duration_minutes=30)
+        Submission.objects.bulk_create([
+            Submission(student=self.student, exam=exam, status="graded") for _ in range(7)
+        ])
+        # Three distinct timestamps, with ties on each, so pages split inside a tie
+        now = timezone.now()
+        ids = list(Submission.objects.order_by("id").values_list("id", flat=True))
+        for index, submission_id in enumerate(ids):
+            Submission.objects.filter(id=submission_id).update(
+                submitted_at=now - timedelta(minutes=index % 3)
+            )
+        self.expected = list(
+            Submission.objects.order_by("-submitted_at", "-id").values_list("id", flat=True)
+        )
+
+    def paginate(self, **params):
+        paginator = KeysetPagination()
+        request = Request(APIRequestFactory().get("/exam/submissions", params))
+        page = paginator.paginate_queryset(Submission.objects.all(), request)
+        return paginator, [submission.id for submission in page]
+
+    def test_cursors_walk_every_row_once_in_order(self):
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 3, **({"cursor": cursor} if cursor else {})}
+            paginator, page = self.paginate(**params)
+            seen += page
+            cursor = paginator.next_cursor
+            if cursor is None:
+                break
+            self.assertEqual(len(page), 3)
+
+        self.assertEqual(seen, self.expected)
+
+    def test_last_page_has_no_cursor(self):
+        paginator, page = self.paginate(page_size=7)
+        self.assertEqual(page, self.expected)
+        self.assertIsNone(paginator.next_cursor)
+        self.assertIsNone(paginator.get_next_link())
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.paginate(page_size=0)[1]), 1)
+        self.assertEqual(KeysetPagination().get_page_size(
+            Request(APIRequestFactory().get("/", {"page_size": 1000}))
+        ), KeysetPagination.max_page_size)
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-base64!", "bm90LWEtY3Vyc29y", "MjAyNi0wMS0wMXx4"):
+            with self.subTest(cursor=cursor), self.assertRaises(NotFound):
+                self.paginate(cursor=cursor)
+
+    def test_history_endpoint_pages_values_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.student)
+        seen, url = [], "/exam/submissions?page_size=4"
+        while url:
+            data = client.get(url).json()["data"]
+            seen += [row["id"] for row in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, self.expected)
+
+
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        patcher = mock.patch("utils.middleware.registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def respond(self, response_class):
+        def view(request):
+            list(Course.objects.all())
+            # Queries made while the body streams run after the middleware
+            return response_class(Course.objects.values_list("code", flat=True).iterator())
+
+        return RequestMetricsMiddleware(view)(RequestFactory().get("/"))
+
+    def route(self):
+        return self.registry.snapshot()["routes"]["GET <unmatched>"]
+
+    def test_db_time_and_queries_are_reported(self):
+        response = self.respond(HttpResponse)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="2 queries", view;')
+        self.assertEqual((self.route()["queries"]["count"], self.route()["db_ms"]["count"]), (1, 1))
+
+    def test_streaming_responses_leave_out_db(self):
+        response = self.respond(StreamingHttpResponse)
+        self.assertRegex(response["Server-Timing"], r"^view;dur=[\d.]+, serialize;dur=[\d.]+, total;dur=[\d.]+$")
+        b"".join(response.streaming_content)
+        route = self.route()
+        self.assertEqual((route["requests"], route["queries"]["count"], route["db_ms"]["count"]), (1, 0, 0))
+        self.assertEqual(route["total_ms"]["count"], 1)
@@ -0,0 +1,33 @@
+from rest_framework.views import APIView
+
+from Acad_ai_app.permissions import IsStaffUser
+from grading.cache import get_grading_cache
+from grading.executor import get_executor
+from grading.pipeline import queue_stats
+from .metrics import registry
+from .responses import custom_response
+
+
+class MetricsView(APIView):
+    """
+    Staff-only view of this worker's in-process request metrics: per-route
+    query counts and DB/view/serialization timing histograms, plus grading
+    cache and executor counters and the grading queue's submission counts.
+    """
+
+    permission_classes = [IsStaffUser]
+
+    def get(self, request):
+        data = registry.snapshot()
+        data["grading"] = {
+            "cache": get_grading_cache().stats(),
+            "executor": get_executor().stats(),
+            "queue": queue_stats(),
+        }
+        return custom_response(data=data, message="Metrics retrieved successfully")
+
+    def delete(self, request):
+        registry.reset()
+        get_grading_cache().reset_stats()
+        get_executor().reset_stats()
+        return custom_response(message="Metrics reset")